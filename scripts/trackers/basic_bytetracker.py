@@ -19,7 +19,9 @@ _TRACKERS_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(REPO_ROOT / "src"))
 sys.path.insert(0, str(_TRACKERS_DIR))
 
+from detection_cache import DetectionCache
 from roi_utils import compute_roi, yolo_detections_with_roi
+from video_io import FramePrefetcher, writer_from_config
 
 # ============================================================
 # 설정  ← 이것만 수정하면 됨
@@ -30,6 +32,10 @@ CONFIG = {
     "model_path":  "runs/yolo26_custom_tomato/trained_yolo26_custom.pt",
     "output_path": "tracking_result/basic_bytetrack.mp4",
     "show_window": True,
+    "prefetch_frames": 4,   # 백그라운드 디코드 큐 크기 (0 = 직렬 cap.read)
+    "encode_policy":  "block",   # 영상 저장 큐가 찼을 때: block / drop_oldest / every_nth
+    "encode_queue":   8,
+    "encode_every_n": 1,         # every_nth 일 때 N
 
     # Detection
     "conf": 0.5,
@@ -76,12 +82,12 @@ def open_source(source: str) -> cv2.VideoCapture:
     return cap
 
 
-def make_writer(output_path: Optional[str], width: int, height: int, fps: float):
+def make_writer(output_path: Optional[str], width: int, height: int, fps: float, config: dict):
     if not output_path:
         return None
     out = REPO_ROOT / output_path
     out.parent.mkdir(parents=True, exist_ok=True)
-    return cv2.VideoWriter(str(out), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    return writer_from_config(str(out), fps, (width, height), config)
 
 
 def make_tracker(config: dict, fps: float) -> sv.ByteTrack:
@@ -103,7 +109,9 @@ def run(config: dict) -> dict:
             total_frames (int)
             unique_ids  (Dict[int, set]): {class_id: set of track_ids}
     """
-    model = get_model(config["model_path"])
+    # detection_cache: benchmark.py 가 만든 검출 캐시 경로 (있으면 YOLO 없이 재생)
+    cache = DetectionCache.load(config["detection_cache"]) if config.get("detection_cache") else None
+    model = get_model(config["model_path"]) if cache is None else None
     cap   = open_source(config["source"])
     fps   = cap.get(cv2.CAP_PROP_FPS) or 30.0
     w     = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -111,6 +119,9 @@ def run(config: dict) -> dict:
     roi   = compute_roi(w, h, config.get("roi_half_width"))
     if roi is not None:
         print(f"[ByteTrack] ROI x=[{roi[0]}, {roi[2]}] (roi_half_width={config.get('roi_half_width')})")
+    if cache is not None:
+        cache.check(w, h, roi)
+        print(f"[ByteTrack] {cache.format_stats()}")
 
     trackers:      Dict[int, sv.ByteTrack]     = {cid: make_tracker(config, fps) for cid in CLASS_NAMES}
     # raw tracker ID → stable ID (클래스별, cy-cx 오름차순으로 발급)
@@ -119,7 +130,7 @@ def run(config: dict) -> dict:
     seen_ids:      Dict[int, set]             = {cid: set() for cid in CLASS_NAMES}
     mot_rows:      List[Tuple]                = []
 
-    writer        = make_writer(config.get("output_path"), w, h, fps)
+    writer        = make_writer(config.get("output_path"), w, h, fps, config)
     show_window   = config.get("show_window", False)
     show_trace    = config.get("show_trace", False)
 
@@ -133,16 +144,21 @@ def run(config: dict) -> dict:
     import time
     print(f"[ByteTrack] 시작...")
 
+    reader = FramePrefetcher(cap, config.get("prefetch_frames", 4))
+
     while True:
         t0 = time.perf_counter()
-        ret, frame = cap.read()
+        ret, frame = reader.read()
         if not ret:
             break
         frame_idx += 1
 
-        all_dets = yolo_detections_with_roi(
-            model, frame, config["conf"], config["iou"], roi,
-        )
+        if cache is not None:
+            all_dets = cache.frame(frame_idx - 1)
+        else:
+            all_dets = yolo_detections_with_roi(
+                model, frame, config["conf"], config["iou"], roi,
+            )
 
         boxes_l, confs_l, cls_l, tid_l = [], [], [], []
 
@@ -225,20 +241,24 @@ def run(config: dict) -> dict:
                 if key in (ord("q"), 27):
                     break
 
-    cap.release()
+    reader.release()
     if writer:
         writer.release()
     if show_window:
         cv2.destroyAllWindows()
 
     print(f"[ByteTrack] 완료 | {frame_idx}프레임 | FPS={fps_acc:.1f} | "
-          f"ripe={len(seen_ids[0])} unripe={len(seen_ids[1])}")
+          f"ripe={len(seen_ids[0])} unripe={len(seen_ids[1])} | "
+          f"decode wait={reader.mean_wait_ms:.1f}ms/frame (prefetch={reader.capacity})")
+    if writer:
+        print(f"[ByteTrack] {writer.format_stats()}")
 
     return {
         "mot_rows":     mot_rows,
         "fps_avg":      fps_acc,
         "total_frames": frame_idx,
         "unique_ids":   seen_ids,
+        "encode_stats": writer.stats() if writer else None,
     }
 
 
@@ -24,7 +24,9 @@ _TRACKERS_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(REPO_ROOT / "src"))
 sys.path.insert(0, str(_TRACKERS_DIR))
 
+from detection_cache import DetectionCache
 from roi_utils import compute_roi, yolo_detections_with_roi
+from video_io import FramePrefetcher, writer_from_config
 
 # ============================================================
 # 설정  ← 이것만 수정하면 됨
@@ -35,6 +37,10 @@ CONFIG = {
     "model_path":  "runs/yolo26_custom_tomato/trained_yolo26_custom.pt",
     "output_path": "tracking_result/basic_deepsort.mp4",
     "show_window": True,
+    "prefetch_frames": 4,   # 백그라운드 디코드 큐 크기 (0 = 직렬 cap.read)
+    "encode_policy":  "block",   # 영상 저장 큐가 찼을 때: block / drop_oldest / every_nth
+    "encode_queue":   8,
+    "encode_every_n": 1,         # every_nth 일 때 N
 
     # Detection
     "conf": 0.5,
@@ -81,12 +87,12 @@ def open_source(source: str) -> cv2.VideoCapture:
     return cap
 
 
-def make_writer(output_path: Optional[str], width: int, height: int, fps: float):
+def make_writer(output_path: Optional[str], width: int, height: int, fps: float, config: dict):
     if not output_path:
         return None
     out = REPO_ROOT / output_path
     out.parent.mkdir(parents=True, exist_ok=True)
-    return cv2.VideoWriter(str(out), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    return writer_from_config(str(out), fps, (width, height), config)
 
 
 def make_deepsort(config: dict) -> DeepSort:
@@ -121,7 +127,9 @@ def run(config: dict) -> dict:
             total_frames (int)
             unique_ids  (Dict[int, set]): {class_id: set of track_ids}
     """
-    model = get_model(config["model_path"])
+    # detection_cache: benchmark.py 가 만든 검출 캐시 경로 (있으면 YOLO 없이 재생)
+    cache = DetectionCache.load(config["detection_cache"]) if config.get("detection_cache") else None
+    model = get_model(config["model_path"]) if cache is None else None
     cap   = open_source(config["source"])
     fps   = cap.get(cv2.CAP_PROP_FPS) or 30.0
     w     = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -129,6 +137,9 @@ def run(config: dict) -> dict:
     roi   = compute_roi(w, h, config.get("roi_half_width"))
     if roi is not None:
         print(f"[DeepSORT] ROI x=[{roi[0]}, {roi[2]}] (roi_half_width={config.get('roi_half_width')})")
+    if cache is not None:
+        cache.check(w, h, roi)
+        print(f"[DeepSORT] {cache.format_stats()}")
 
     trackers:      Dict[int, DeepSort]        = {cid: make_deepsort(config) for cid in CLASS_NAMES}
     # raw tracker ID → stable ID (클래스별, cy-cx 오름차순으로 발급)
@@ -138,7 +149,7 @@ def run(config: dict) -> dict:
     mot_rows:      List[Tuple]               = []
     traces:        dict                      = {}
 
-    writer      = make_writer(config.get("output_path"), w, h, fps)
+    writer      = make_writer(config.get("output_path"), w, h, fps, config)
     show_window = config.get("show_window", False)
     show_trace  = config.get("show_trace", False)
     trace_len   = config.get("trace_length", 30)
@@ -149,17 +160,22 @@ def run(config: dict) -> dict:
 
     print(f"[DeepSORT] 시작...")
 
+    reader = FramePrefetcher(cap, config.get("prefetch_frames", 4))
+
     while True:
         t0 = time.perf_counter()
-        ret, frame = cap.read()
+        ret, frame = reader.read()
         if not ret:
             break
         frame_idx += 1
         active_ids.clear()
 
-        all_dets = yolo_detections_with_roi(
-            model, frame, config["conf"], config["iou"], roi,
-        )
+        if cache is not None:
+            all_dets = cache.frame(frame_idx - 1)
+        else:
+            all_dets = yolo_detections_with_roi(
+                model, frame, config["conf"], config["iou"], roi,
+            )
 
         cls_dets: Dict[int, list] = {cid: [] for cid in CLASS_NAMES}
         if len(all_dets) > 0 and all_dets.class_id is not None:
@@ -245,20 +261,24 @@ def run(config: dict) -> dict:
                 if key in (ord("q"), 27):
                     break
 
-    cap.release()
+    reader.release()
     if writer:
         writer.release()
     if show_window:
         cv2.destroyAllWindows()
 
     print(f"[DeepSORT] 완료 | {frame_idx}프레임 | FPS={fps_acc:.1f} | "
-          f"ripe={len(seen_ids[0])} unripe={len(seen_ids[1])}")
+          f"ripe={len(seen_ids[0])} unripe={len(seen_ids[1])} | "
+          f"decode wait={reader.mean_wait_ms:.1f}ms/frame (prefetch={reader.capacity})")
+    if writer:
+        print(f"[DeepSORT] {writer.format_stats()}")
 
     return {
         "mot_rows":     mot_rows,
         "fps_avg":      fps_acc,
         "total_frames": frame_idx,
         "unique_ids":   seen_ids,
+        "encode_stats": writer.stats() if writer else None,
     }
 
 
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+StableIdAssigner 마이크로 벤치마크 (YOLO·영상 불필요)
+
+합성 트랙/검출로 StableIdAssigner 내부 단계별 소요 시간을 측정합니다.
+
+  cost   ─ 2단계 매칭: 이중 루프 dense 행렬 + 헝가리안(기존) vs 벡터화 dense(_all_pairs → _solve_dense, 기본)
+           vs 격자 게이팅 후보 쌍(_gate_pairs → _solve_pairs, stage2_gating=True — 매칭이 다를 수 있어 차이 수만 표시)
+  solve  ─ 게이팅된 후보 쌍 헝가리안: 한 행렬(기존) vs 연결 성분별 분해(_solve_pairs), 송이 단위 배치
+  order  ─ 순서 제약: 매 프레임 정렬 + 전체 LIS(기존) vs 증분 x 순서 + 역전 구간 LIS(_apply_order_constraint)
+  warp   ─ 모션 보정 박스 워핑: 트랙별 _warp_box(기존) vs (N,4,3) 일괄 행렬곱(_warp_all_tracks)
+  reid   ─ 프레임당 ReID 특징 추출: 박스별 변환(기존) vs HSV 1회 변환(_extract_reid_features)
+
+각 항목의 기존 구현과 결과가 같아야 하는 열 (same / identical / bit-equal) 이 하나라도 다르면 중단합니다.
+
+사용법:
+  python scripts/trackers/bench_assigner.py
+  python scripts/trackers/bench_assigner.py --sizes 10,50,100,200 --repeat 20
+  python scripts/trackers/bench_assigner.py --only warp,reid
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+import tracker
+from tracker import StableIdAssigner
+
+# ============================================================
+# 설정
+# ============================================================
+CONFIG = {
+    "sizes":  [10, 25, 50, 100, 200, 400],   # 트랙 수 (검출 수도 동일)
+    "solve_sizes": [50, 100, 200, 400, 800, 1600],   # 넓은 전체 프레임(roi_half_width=None) 규모까지
+    "reid_sizes": [10, 30, 60, 120],          # 프레임당 검출 수
+    "repeat": 10,
+    "seed":   0,
+    "frame_w": 1280,
+    "frame_h": 720,
+    "roi_half_width": 320,
+    "reid_dim": 32 * 3 + 3,
+    "order_inversions": 2,                    # order: 프레임당 x 순서가 역전된 매칭 수
+    "truss_gap": 400,                         # solve: 송이 중심 간 x 간격 (px)
+}
+# ============================================================
+
+TRACKER_CONFIG = tracker.TrackerConfig(
+    use_reid=True,
+    reid_weight=0.3,
+    center_max_dist=200,
+    max_y_diff=100.0,
+    max_area_ratio=3.0,
+    max_backward_x=50.0,
+    max_movement_unknown=300,
+    reid_hist_bins=32,
+)
+
+
+def _synthetic(assigner: StableIdAssigner, n: int, rng: np.random.Generator):
+    """assigner 에 n 개의 이전 트랙을 채우고, 약간 이동한 n 개의 검출을 반환"""
+    w, h, dim = CONFIG["frame_w"], CONFIG["frame_h"], CONFIG["reid_dim"]
+    cx = rng.uniform(0, w, n)
+    cy = rng.uniform(0, h, n)
+    s  = rng.uniform(20, 60, n)
+    prev_xyxy = np.stack([cx - s / 2, cy - s / 2, cx + s / 2, cy + s / 2], axis=1).astype(np.float32)
+    curr_xyxy = (prev_xyxy + rng.normal(0, 8, (n, 4)).astype(np.float32)
+                 + np.array([6, 0, 6, 0], dtype=np.float32))
+    feats = rng.random((n, dim)).astype(np.float32)
+    tt = assigner.tracks
+    tt.clear()
+    prev = np.array([tt.add(0, i + 1) for i in range(n)], dtype=np.intp)
+    tt.xyxy[prev] = prev_xyxy
+    tt.warped_xyxy[prev] = prev_xyxy
+    for i, s in enumerate(prev.tolist()):
+        tt.set_reid(s, feats[i])
+    curr_feats = feats + rng.normal(0, 0.05, feats.shape).astype(np.float32)
+    return prev, curr_xyxy, curr_feats
+
+
+def cost_matrix_loop(assigner: StableIdAssigner, prev: np.ndarray,
+                     curr_xyxy: np.ndarray, curr_feats: np.ndarray) -> np.ndarray:
+    """벡터화 이전의 2단계 비용 행렬 (기준 구현)"""
+    tt = assigner.tracks
+    cost = np.full((len(prev), len(curr_xyxy)), 9999.0)
+    reid_w   = assigner.cfg.reid_weight
+    max_dist = assigner.cfg.center_max_dist
+    for ii, ps in enumerate(prev.tolist()):
+        pb = assigner._match_box(ps)
+        for jj in range(len(curr_xyxy)):
+            if not assigner._structural_ok(pb, curr_xyxy[jj]):
+                continue
+            dist = assigner._center_dist(pb, curr_xyxy[jj])
+            dn = min(dist / max_dist, 1.0)
+            sim = assigner._cosine_sim(tt.reid[ps], curr_feats[jj]) if tt.has_reid[ps] else 0.0
+            cost[ii, jj] = (1 - reid_w) * dn + reid_w * (1 - sim)
+    return cost
+
+
+def _time(fn: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+GATE = 300.0   # ReID on 일 때 2단계 게이팅 반경 (StableIdAssigner.assign 과 동일)
+
+
+def _require(same: bool, section: str, n: int):
+    """기존 구현과 결과가 다르면 중단 (결과가 같아야 하는 최적화만 비교)"""
+    if not same:
+        raise RuntimeError(f"[{section}] {n}: 기존 구현과 결과가 다릅니다")
+
+
+def loop_matches(assigner: StableIdAssigner, prev: np.ndarray,
+                 curr_xyxy: np.ndarray, curr_feats: np.ndarray) -> set:
+    """기존 방식: 이중 루프 비용 행렬 → 헝가리안. 9999 강제 · 반경 밖 매칭 포함 (순서 제약 입력)"""
+    from scipy.optimize import linear_sum_assignment
+
+    ri, ci = linear_sum_assignment(cost_matrix_loop(assigner, prev, curr_xyxy, curr_feats))
+    return set(zip(ri.tolist(), ci.tolist()))
+
+
+def dense_matches(assigner: StableIdAssigner, prev: np.ndarray,
+                  curr_xyxy: np.ndarray, curr_feats: np.ndarray) -> set:
+    """assign 기본 경로: 벡터화 dense 비용 → 헝가리안 (순서 제약 입력)"""
+    pi, ci, dist, ok = assigner._all_pairs(prev, curr_xyxy)
+    cost, _ = assigner._pair_costs(prev, pi, ci, dist, curr_feats)
+    k = assigner._solve_dense(len(prev), len(curr_xyxy), cost, ok)
+    return set(zip(pi[k].tolist(), ci[k].tolist()))
+
+
+def gated_matches(assigner: StableIdAssigner, prev: np.ndarray,
+                  curr_xyxy: np.ndarray, curr_feats: np.ndarray) -> set:
+    """stage2_gating=True 경로: 게이팅 후보 쌍만 헝가리안"""
+    pi, ci, dist = assigner._gate_pairs(prev, curr_xyxy, GATE)
+    cost, _ = assigner._pair_costs(prev, pi, ci, dist, curr_feats)
+    k = assigner._solve_pairs(pi, ci, cost)
+    return set(zip(pi[k].tolist(), ci[k].tolist()))
+
+
+def _feasible(assigner: StableIdAssigner, prev: np.ndarray, curr_xyxy: np.ndarray, matches: set) -> set:
+    """구조 제약을 통과한 매칭만 (9999 강제 매칭 제외)"""
+    tt = assigner.tracks
+    return {(i, j) for i, j in matches if assigner._structural_ok(tt.warped_xyxy[prev[i]], curr_xyxy[j])}
+
+
+def _acceptable(assigner: StableIdAssigner, prev: np.ndarray, curr_xyxy: np.ndarray, matches: set) -> set:
+    """구조 제약 통과 + 게이팅 반경 이내 매칭만 (dense 매칭 중 게이팅 경로에도 있을 수 있는 것)"""
+    tt = assigner.tracks
+    return {(i, j) for i, j in _feasible(assigner, prev, curr_xyxy, matches)
+            if assigner._center_dist(tt.warped_xyxy[prev[i]], curr_xyxy[j]) <= GATE}
+
+
+def bench_cost(sizes: List[int], repeat: int, rng: np.random.Generator):
+    assigner = StableIdAssigner(TRACKER_CONFIG)
+    assigner.detected_direction = "L2R"
+    print(f"\n[cost] 2단계 매칭 {CONFIG['frame_w']}x{CONFIG['frame_h']} 전체 프레임 (best of {repeat}, ms)")
+    print(f"{'tracks':>7} {'loop':>10} {'dense':>10} {'speedup':>9} {'same':>6} "
+          f"{'gated':>10} {'speedup':>9} {'gated diff':>11}")
+    for n in sizes:
+        prev, curr_xyxy, curr_feats = _synthetic(assigner, n, rng)
+        t_loop  = _time(lambda: loop_matches(assigner, prev, curr_xyxy, curr_feats), repeat)
+        t_dense = _time(lambda: dense_matches(assigner, prev, curr_xyxy, curr_feats), repeat)
+        t_gated = _time(lambda: gated_matches(assigner, prev, curr_xyxy, curr_feats), repeat)
+        # 기본 경로는 순서 제약 전 매칭이 이중 루프와 같아야 한다. 9999 칸끼리는 비용이 같아 어느 강제 매칭을
+        # 고를지는 실제 비용의 float32 마지막 비트 (루프 np.dot vs 벡터 einsum) 에 따라 갈릴 수 있으므로
+        # 구조 제약 통과 매칭 (반경 밖 포함) 은 그대로, 강제 매칭은 개수만 비교
+        loop  = loop_matches(assigner, prev, curr_xyxy, curr_feats)
+        dense = dense_matches(assigner, prev, curr_xyxy, curr_feats)
+        same = (len(loop) == len(dense)
+                and _feasible(assigner, prev, curr_xyxy, loop) == _feasible(assigner, prev, curr_xyxy, dense))
+        # 게이팅 경로는 의도적으로 다를 수 있음 (assign 2단계 주석) → 수락 가능한 매칭 기준 차이 쌍 수만
+        diff = len(_acceptable(assigner, prev, curr_xyxy, dense)
+                   ^ gated_matches(assigner, prev, curr_xyxy, curr_feats))
+        print(f"{n:>7} {t_loop:>10.2f} {t_dense:>10.3f} {t_loop / t_dense:>8.1f}x {str(same):>6} "
+              f"{t_gated:>10.3f} {t_loop / t_gated:>8.1f}x {diff:>11}")
+        _require(same, "cost", n)
+
+
+def solve_compact(pi: np.ndarray, ci: np.ndarray, cost: np.ndarray) -> np.ndarray:
+    """연결 성분 분해 이전: 후보 행/열 전체를 한 행렬(빈 칸 9999)로 풀기 (기준 구현)"""
+    from scipy.optimize import linear_sum_assignment
+
+    rows, r_inv = np.unique(pi, return_inverse=True)
+    cols, c_inv = np.unique(ci, return_inverse=True)
+    mat = np.full((len(rows), len(cols)), 9999.0)
+    mat[r_inv, c_inv] = cost
+    pair = np.full(mat.shape, -1, dtype=np.intp)
+    pair[r_inv, c_inv] = np.arange(len(pi))
+    ri, cj = linear_sum_assignment(mat)
+    k = pair[ri, cj]
+    return k[k >= 0]
+
+
+def _truss_synthetic(assigner: StableIdAssigner, n: int, rng: np.random.Generator):
+    """송이(4~8개) 단위로 모인 n 개 트랙 + 이동한 검출. 송이 간격 = truss_gap (레일 방향으로 길게 배치)"""
+    prev, curr_xyxy, curr_feats = _synthetic(assigner, n, rng)
+    tt = assigner.tracks
+    sizes = []
+    while sum(sizes) < n:
+        sizes.append(int(rng.integers(4, 9)))
+    truss = np.repeat(np.arange(len(sizes)), sizes)[:n]
+    tx = truss * CONFIG["truss_gap"] + rng.uniform(-40, 40, n)
+    ty = rng.uniform(100, CONFIG["frame_h"] - 100, len(sizes))[truss] + rng.uniform(-60, 60, n)
+    boxes = tt.xyxy[prev]
+    shift = np.stack([tx, ty, tx, ty], axis=1) - np.repeat(
+        0.5 * (boxes[:, 0:2] + boxes[:, 2:4]), 2, axis=1)[:, [0, 1, 0, 1]]
+    tt.xyxy[prev] += shift.astype(np.float32)
+    tt.warped_xyxy[prev] = tt.xyxy[prev]
+    return prev, curr_xyxy + shift.astype(np.float32), curr_feats
+
+
+def bench_solve(sizes: List[int], repeat: int, rng: np.random.Generator):
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    assigner = StableIdAssigner(TRACKER_CONFIG)
+    assigner.detected_direction = "L2R"
+    print(f"\n[solve] 송이 간격 {CONFIG['truss_gap']}px, 게이팅 후 헝가리안 (best of {repeat}, ms)")
+    print(f"{'tracks':>7} {'pairs':>7} {'comps':>6} {'max blk':>8} {'compact':>10} {'components':>11} "
+          f"{'speedup':>9} {'same match':>11}")
+    for n in sizes:
+        prev, curr_xyxy, curr_feats = _truss_synthetic(assigner, n, rng)
+        pi, ci, dist = assigner._gate_pairs(prev, curr_xyxy, GATE)
+        cost, _ = assigner._pair_costs(prev, pi, ci, dist, curr_feats)
+        r_ids = np.unique(pi, return_inverse=True)[1]
+        c_ids = np.unique(ci, return_inverse=True)[1]
+        nr = int(r_ids.max()) + 1 if len(pi) else 0
+        nc = int(c_ids.max()) + 1 if len(pi) else 0
+        g = coo_matrix((np.ones(len(pi)), (r_ids, nr + c_ids)), shape=(nr + nc, nr + nc))
+        n_comp, labels = connected_components(g, directed=False)
+        max_blk = int(np.bincount(labels).max()) if n_comp else 0
+
+        t_compact = _time(lambda: solve_compact(pi, ci, cost), repeat)
+        t_comp    = _time(lambda: assigner._solve_pairs(pi, ci, cost), repeat)
+        same = set(solve_compact(pi, ci, cost).tolist()) == set(assigner._solve_pairs(pi, ci, cost).tolist())
+        print(f"{n:>7} {len(pi):>7} {n_comp:>6} {max_blk:>8} {t_compact:>10.3f} {t_comp:>11.3f} "
+              f"{t_compact / t_comp:>8.1f}x {str(same):>11}")
+        _require(same, "solve", n)
+
+
+def order_constraint_full(matches, prev_boxes: np.ndarray, curr_boxes: np.ndarray):
+    """증분 갱신 이전: pcx 로 정렬 후 역전이 하나라도 있으면 전체 LIS (기준 구현)"""
+    if len(matches) < 2:
+        return matches
+    data = []
+    for ii, jj in matches:
+        pb = prev_boxes[ii]
+        data.append((0.5 * (pb[0] + pb[2]), 0.5 * (curr_boxes[jj][0] + curr_boxes[jj][2]), (ii, jj)))
+    data.sort(key=lambda x: x[0])
+    curr_xs = [d[1] for d in data]
+    if all(curr_xs[i] <= curr_xs[i + 1] for i in range(len(curr_xs) - 1)):
+        return matches
+    members = set(StableIdAssigner._lis_members(curr_xs))
+    return [data[i][2] for i in range(len(data)) if i in members]
+
+
+def bench_order(sizes: List[int], repeat: int, rng: np.random.Generator):
+    assigner = StableIdAssigner(TRACKER_CONFIG)
+    print(f"\n[order] 레일 주행, 프레임당 역전 {CONFIG['order_inversions']}개 (best of {repeat}, ms)")
+    print(f"{'matches':>7} {'full':>10} {'incr':>10} {'speedup':>9} {'same':>6}")
+    for n in sizes:
+        prev, curr_xyxy, _ = _synthetic(assigner, n, rng)
+        tt = assigner.tracks
+        x = np.sort(rng.uniform(0, 20 * n, n)).astype(np.float32)
+        tt.warped_xyxy[prev] = np.stack([x - 15, x * 0 + 300, x + 15, x * 0 + 330], axis=1)
+        curr = tt.warped_xyxy[prev] + np.float32(6)
+        for i in rng.integers(0, n, CONFIG["order_inversions"]):
+            curr[i, [0, 2]] -= np.float32(60)
+        assigner._update_x_order(prev)   # 지난 프레임 순서
+        matches = [(i, i) for i in range(n)]
+        t_full = _time(lambda: order_constraint_full(matches, tt.warped_xyxy[prev], curr), repeat)
+        t_incr = _time(lambda: (assigner._update_x_order(prev),
+                                assigner._apply_order_constraint(matches, prev, curr)), repeat)
+        same = (order_constraint_full(matches, tt.warped_xyxy[prev], curr)
+                == assigner._apply_order_constraint(matches, prev, curr))
+        print(f"{n:>7} {t_full:>10.3f} {t_incr:>10.3f} {t_full / t_incr:>8.1f}x {str(same):>6}")
+        _require(same, "order", n)
+
+
+def _synthetic_frame(n: int, rng: np.random.Generator):
+    """ROI 띠(중앙 ±roi_half_width) 안에 토마토 크기 단색 박스 n 개가 그려진 프레임 + 박스"""
+    w, h, half = CONFIG["frame_w"], CONFIG["frame_h"], CONFIG["roi_half_width"]
+    frame = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    cx = rng.uniform(w / 2 - half, w / 2 + half, n)
+    cy = rng.uniform(0, h, n)
+    s  = rng.uniform(20, 60, n)
+    boxes = np.stack([cx - s / 2, cy - s / 2, cx + s / 2, cy + s / 2], axis=1).astype(np.float32)
+    for (x1, y1, x2, y2), col in zip(boxes.astype(int), rng.integers(0, 256, (n, 3))):
+        frame[max(0, y1):y2, max(0, x1):x2] = (frame[max(0, y1):y2, max(0, x1):x2] // 4
+                                               + col.astype(np.uint8) // 4 * 3)
+    return frame, boxes
+
+
+def bench_reid(sizes: List[int], repeat: int, rng: np.random.Generator):
+    extract_one = StableIdAssigner._extract_reid_feature
+    extract_all = StableIdAssigner._extract_reid_features
+    print(f"\n[reid] 프레임당 ReID 특징 추출 {CONFIG['frame_w']}x{CONFIG['frame_h']} "
+          f"(best of {repeat}, ms)")
+    print(f"{'dets':>7} {'per-box':>10} {'batched':>10} {'speedup':>9} {'bit-equal':>10}")
+    for n in sizes:
+        frame, boxes = _synthetic_frame(n, rng)
+        t_loop  = _time(lambda: np.array([extract_one(frame, b) for b in boxes]), repeat)
+        t_batch = _time(lambda: extract_all(frame, boxes), repeat)
+        same = np.array_equal(np.array([extract_one(frame, b) for b in boxes]),
+                              extract_all(frame, boxes))
+        print(f"{n:>7} {t_loop:>10.2f} {t_batch:>10.2f} {t_loop / t_batch:>8.1f}x {str(same):>10}")
+        _require(same, "reid", n)
+
+
+def bench_warp(sizes: List[int], repeat: int, rng: np.random.Generator):
+    assigner = StableIdAssigner(TRACKER_CONFIG)
+    transforms = {
+        "affine": np.array([[1.0, 0.002, 6.0], [-0.001, 1.0, 0.4]]),
+        "homog":  np.array([[1.0, 0.001, 6.0], [0.0005, 1.0, 0.3], [1e-6, 2e-6, 1.0]]),
+    }
+    print(f"\n[warp] 전체 트랙 박스 워핑 (best of {repeat}, ms)")
+    print(f"{'tracks':>7} {'kind':>7} {'loop':>10} {'batched':>10} {'speedup':>9} {'identical':>10}")
+    for n in sizes:
+        prev, _, _ = _synthetic(assigner, n, rng)
+        assigner._active_slots = prev
+        tt = assigner.tracks
+        for kind, tf in transforms.items():
+            t_loop  = _time(lambda: [assigner._warp_box(tt.xyxy[s], tf) for s in prev.tolist()], repeat)
+            t_batch = _time(lambda: assigner._warp_all_tracks(tf), repeat)
+            ref = np.array([assigner._warp_box(tt.xyxy[s], tf) for s in prev.tolist()])
+            assigner._warp_all_tracks(tf)
+            same = np.array_equal(ref, tt.warped_xyxy[prev])
+            print(f"{n:>7} {kind:>7} {t_loop:>10.2f} {t_batch:>10.3f} {t_loop / t_batch:>8.1f}x {str(same):>10}")
+            _require(same, f"warp {kind}", n)
+
+
+SECTIONS = ("cost", "solve", "order", "warp", "reid")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StableIdAssigner micro-benchmark")
+    parser.add_argument("--sizes", type=str, default=None,
+                        help="트랙 수 목록 (comma-separated)")
+    parser.add_argument("--repeat", type=int, default=CONFIG["repeat"])
+    parser.add_argument("--only", type=str, default=",".join(SECTIONS),
+                        help=f"실행할 항목 (comma-separated: {', '.join(SECTIONS)})")
+    args = parser.parse_args()
+
+    only = {t.strip() for t in args.only.split(",")}
+    custom = [int(s) for s in args.sizes.split(",")] if args.sizes else None
+    rng = np.random.default_rng(CONFIG["seed"])
+    if "cost" in only:
+        bench_cost(custom or CONFIG["sizes"], args.repeat, rng)
+    if "solve" in only:
+        bench_solve(custom or CONFIG["solve_sizes"], args.repeat, rng)
+    if "order" in only:
+        bench_order(custom or CONFIG["solve_sizes"], args.repeat, rng)
+    if "warp" in only:
+        bench_warp(custom or CONFIG["sizes"], args.repeat, rng)
+    if "reid" in only:
+        bench_reid(custom or CONFIG["reid_sizes"], args.repeat, rng)
+
+
+if __name__ == "__main__":
+    main()
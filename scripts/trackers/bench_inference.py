@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+배치 추론 브로커 벤치마크 (처리량 vs 지연)
+
+스트림 수만큼 스레드를 띄워 각 스트림이 프레임마다 ROI 크롭 검출을 요청합니다
+(tracker 루프처럼 스트림당 대기 중 요청 1개 + 프레임당 나머지 처리 시간).
+
+  direct  ─ 스트림마다 model(crop) 한 장씩 (모델 하나를 lock 으로 공유, 기존 방식)
+  broker  ─ InferenceBroker 동적 배치 (max_batch × max_latency_ms 조합)
+
+출력: 전체 처리량 (frames/s), 요청 지연 평균 / p95, 평균 배치 크기
+
+사용법:
+  python scripts/trackers/bench_inference.py
+  python scripts/trackers/bench_inference.py --streams 1,4,8 --batches 1,4,8 --deadlines 0,5,20
+  python scripts/trackers/bench_inference.py --simulate 10,20     # YOLO 대신 고정 10ms + 장당 20ms
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import supervision as sv
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from yolo_broker import InferenceBroker
+from roi_utils import compute_roi
+
+# ============================================================
+# 설정
+# ============================================================
+CONFIG = {
+    "model_path":  "runs/yolo26_custom_tomato/trained_yolo26_custom.pt",
+    "conf":        0.5,
+    "iou":         0.3,
+    "frame_w":     1280,
+    "frame_h":     720,
+    "roi_half_width": 320,
+    "frames_per_stream": 40,
+    "other_work_ms": 5,            # 프레임당 검출 외 처리 시간 (ByteTrack · ID 할당 대역)
+    "streams":     [1, 4, 8],
+    "max_batch":   [1, 4, 8],
+    "max_latency_ms": [0, 5, 20],
+    "simulate":    None,           # (고정 ms, 장당 ms) → YOLO 대신 sleep 검출기
+    "seed":        0,
+}
+# ============================================================
+
+
+class SimulatedDetector:
+    """forward 비용만 흉내 내는 검출기 (호출당 fixed_ms + 장당 per_image_ms). 결과는 빈 검출."""
+
+    def __init__(self, fixed_ms: float, per_image_ms: float):
+        self.fixed_ms = fixed_ms
+        self.per_image_ms = per_image_ms
+
+    def __call__(self, images, conf=0.5, verbose=False):
+        images = images if isinstance(images, list) else [images]
+        time.sleep((self.fixed_ms + self.per_image_ms * len(images)) / 1000.0)
+        return [sv.Detections.empty() for _ in images]
+
+
+def load_model(config: dict) -> Tuple[Callable, Callable]:
+    """(model, to_detections)"""
+    if config["simulate"]:
+        return SimulatedDetector(*config["simulate"]), (lambda r: r)
+    from ultralytics import YOLO
+    path = Path(config["model_path"])
+    return YOLO(str(path if path.exists() else REPO_ROOT / path)), sv.Detections.from_ultralytics
+
+
+def _streams(n: int, detect: Callable, frames: List[np.ndarray], roi, n_frames: int,
+             other_ms: float) -> Tuple[float, List[float]]:
+    """스트림 n 개 동시 실행 → (wall 시간, 요청별 지연 목록)"""
+    latencies: List[float] = []
+    lat_lock = threading.Lock()
+
+    def stream(k: int):
+        local = []
+        for i in range(n_frames):
+            frame = frames[(k + i) % len(frames)]
+            t0 = time.perf_counter()
+            detect(frame, roi)
+            local.append(time.perf_counter() - t0)
+            if other_ms:
+                time.sleep(other_ms / 1000.0)
+        with lat_lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=stream, args=(k,)) for k in range(n)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, latencies
+
+
+def _row(label: str, n: int, wall: float, latencies: List[float], mean_batch: float):
+    lat = np.asarray(latencies) * 1000.0
+    fps = len(lat) / wall if wall > 0 else 0.0
+    print(f"{n:>7} {label:>16} {fps:>8.1f} {lat.mean():>9.1f} {np.percentile(lat, 95):>8.1f} "
+          f"{mean_batch:>10.2f}")
+
+
+def run(config: dict):
+    model, to_dets = load_model(config)
+    rng = np.random.default_rng(config["seed"])
+    w, h = config["frame_w"], config["frame_h"]
+    frames = [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for _ in range(8)]
+    roi = compute_roi(w, h, config["roi_half_width"])
+    n_frames, other = config["frames_per_stream"], config["other_work_ms"]
+
+    # 워밍업 (첫 forward 초기화 비용 제외)
+    with InferenceBroker(model, max_batch=1, max_latency_ms=0, to_detections=to_dets) as b:
+        b.detect(frames[0], roi)
+
+    model_lock = threading.Lock()
+
+    def direct(frame, roi_):
+        x0, y0, x1, y1 = roi_
+        with model_lock:
+            res = model(frame[y0:y1 + 1, x0:x1 + 1], conf=config["conf"], verbose=False)[0]
+        dets = to_dets(res).with_nms(threshold=config["iou"])
+        if len(dets) > 0:
+            dets.xyxy = dets.xyxy + np.array([x0, y0, x0, y0], dtype=np.float32)
+        return dets
+
+    print(f"\n[inference] ROI {roi} / 스트림당 {n_frames} frames / 나머지 처리 {other}ms/frame"
+          + (f" / simulate {config['simulate']}" if config["simulate"] else ""))
+    print(f"{'streams':>7} {'mode':>16} {'fps':>8} {'lat ms':>9} {'p95 ms':>8} {'mean batch':>10}")
+    for n in config["streams"]:
+        wall, lat = _streams(n, direct, frames, roi, n_frames, other)
+        _row("direct", n, wall, lat, 1.0)
+        for mb in config["max_batch"]:
+            for dl in config["max_latency_ms"]:
+                broker = InferenceBroker(model, conf=config["conf"], nms=config["iou"],
+                                         max_batch=mb, max_latency_ms=dl, to_detections=to_dets)
+                wall, lat = _streams(n, broker.detect, frames, roi, n_frames, other)
+                broker.close()
+                _row(f"b={mb} dl={dl:g}ms", n, wall, lat, broker.stats()["mean_batch"])
+
+
+def _ints(s: Optional[str], default):
+    return [float(t) if "." in t else int(t) for t in s.split(",")] if s else default
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched inference broker benchmark")
+    parser.add_argument("--streams", type=str, default=None, help="스트림 수 목록 (comma-separated)")
+    parser.add_argument("--batches", type=str, default=None, help="max_batch 목록")
+    parser.add_argument("--deadlines", type=str, default=None, help="max_latency_ms 목록")
+    parser.add_argument("--frames", type=int, default=None, help="스트림당 프레임 수")
+    parser.add_argument("--simulate", type=str, default=None,
+                        help='YOLO 대신 sleep 검출기 "고정ms,장당ms"')
+    args = parser.parse_args()
+
+    config = dict(CONFIG)
+    config["streams"] = _ints(args.streams, config["streams"])
+    config["max_batch"] = _ints(args.batches, config["max_batch"])
+    config["max_latency_ms"] = _ints(args.deadlines, config["max_latency_ms"])
+    if args.frames:
+        config["frames_per_stream"] = args.frames
+    if args.simulate:
+        config["simulate"] = tuple(float(t) for t in args.simulate.split(","))
+    run(config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+MOT 지표 벤치마크: motmetrics (기존 mot_metrics) · TrackEval HOTA vs src/mot_eval.py
+
+GT 파일에서 가설을 합성해 (박스 흔들림 · 누락 · 오검출 · ID 교체 · 조각남) 두 구현의
+지표와 소요 시간을 비교합니다. 긴 영상은 GT 를 프레임 축으로 이어 붙여 만듭니다.
+
+  motmetrics ─ 프레임마다 dict → iou_matrix → MOTAccumulator.update (기존 benchmark.mot_metrics)
+  native     ─ mot_eval.evaluate (정렬 배열 + 묶음 IoU + 프레임 매칭 재현 + 전역 IDF1 매칭)
+
+  TrackEval  ─ metrics.HOTA.eval_sequence (프레임 × alpha 이중 루프, 설치돼 있을 때만: pip install trackeval)
+  native     ─ mot_eval.hota (프레임 매칭 한 번 + alpha 단계 누적합)
+
+same = MATCH / SWITCH / FP / MISS / IDTP 개수와 MOTA · IDF1 · Recall · Prec 가 모두 같음
+hota = alpha 별 HOTA TP 가 같고 HOTA · DetA · AssA · LocA 곡선 차이 < 1e-9 ("-" = TrackEval 미설치)
+
+사용법:
+  python scripts/trackers/bench_metrics.py
+  python scripts/trackers/bench_metrics.py --gt tracking_result/gt_mot.csv --tiles 1,4,16
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from mot_eval import FramePairs, MotData, evaluate, hota
+
+# ============================================================
+# 설정
+# ============================================================
+CONFIG = {
+    "gt":     "tracking_result/gt_mot.csv",
+    "tiles":  [1, 4, 16],     # GT 를 몇 번 이어 붙일지 (영상 길이 배수)
+    "repeat": 3,
+    "seed":   0,
+}
+
+# 합성 가설: (이름, 박스 흔들림 px, 누락 비율, 오검출 비율, ID 교체 수 / 100 프레임, 조각남 확률 / 트랙)
+CASES = [
+    ("perfect", 0.0, 0.0, 0.0, 0.0, 0.0),
+    ("jitter",  4.0, 0.0, 0.0, 0.0, 0.0),
+    ("noisy",   6.0, 0.1, 0.05, 2.0, 0.3),
+    ("hard",   12.0, 0.25, 0.15, 6.0, 0.6),
+]
+# ============================================================
+
+
+def motmetrics_reference(gt_path: str, rows: List[Tuple]) -> Optional[Dict[str, float]]:
+    """기존 benchmark.mot_metrics 의 motmetrics 경로 (기준 구현)"""
+    import csv
+
+    import motmetrics as mm
+    if not hasattr(np, "asfarray"):
+        np.asfarray = lambda a, dtype=np.float64: np.asarray(a, dtype=dtype)  # type: ignore[attr-defined]
+
+    gt_data: Dict[int, Dict[int, list]] = {}
+    with open(gt_path) as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            if len(row) < 6:
+                continue
+            gt_data.setdefault(int(row[0]), {})[int(row[1])] = [float(row[2]), float(row[3]),
+                                                                 float(row[4]), float(row[5])]
+    hyp_data: Dict[int, Dict[int, list]] = {}
+    for row in rows:
+        hyp_data.setdefault(row[0], {})[row[1]] = [row[2], row[3], row[4], row[5]]
+
+    acc = mm.MOTAccumulator(auto_id=True)
+    for fid in sorted(set(list(gt_data) + list(hyp_data))):
+        gt_f, hyp_f = gt_data.get(fid, {}), hyp_data.get(fid, {})
+        gt_ids, hyp_ids = list(gt_f), list(hyp_f)
+        if not gt_ids and not hyp_ids:
+            continue
+        dist = (mm.distances.iou_matrix([gt_f[i] for i in gt_ids],
+                                        [hyp_f[i] for i in hyp_ids], max_iou=0.5)
+                if gt_ids and hyp_ids else np.empty((len(gt_ids), len(hyp_ids))))
+        acc.update(gt_ids, hyp_ids, dist)
+
+    row = mm.metrics.create().compute(
+        acc, metrics=["num_matches", "num_switches", "num_false_positives", "num_misses",
+                      "idtp", "mota", "idf1", "recall", "precision"], name="ref").iloc[0]
+    return {k: float(row[k]) for k in row.index}
+
+
+def trackeval_hota_reference(gt: MotData, hyp: MotData) -> Optional[Dict[str, np.ndarray]]:
+    """TrackEval HOTA (기준 구현). 프레임별 dense IoU 행렬을 만들어 eval_sequence 에 그대로 넣음."""
+    try:
+        from trackeval.metrics import HOTA
+    except ImportError:
+        return None
+
+    g_ids = np.unique(gt.ids, return_inverse=True)[1]
+    h_ids = np.unique(hyp.ids, return_inverse=True)[1]
+    data = {"num_gt_ids": len(np.unique(gt.ids)), "num_tracker_ids": len(np.unique(hyp.ids)),
+            "num_gt_dets": len(gt), "num_tracker_dets": len(hyp),
+            "gt_ids": [], "tracker_ids": [], "similarity_scores": []}
+    for f in np.union1d(gt.frame, hyp.frame):
+        gm, hm = gt.frame == f, hyp.frame == f
+        a, b = gt.boxes[gm], hyp.boxes[hm]
+        lo = np.maximum(a[:, None, :2], b[None, :, :2])
+        hi = np.minimum(a[:, None, :2] + a[:, None, 2:], b[None, :, :2] + b[None, :, 2:])
+        inter = np.prod(np.maximum(hi - lo, 0), axis=2)
+        union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - inter
+        data["gt_ids"].append(g_ids[gm])
+        data["tracker_ids"].append(h_ids[hm])
+        data["similarity_scores"].append(np.divide(inter, union, out=np.zeros_like(inter), where=union > 0))
+    return HOTA().eval_sequence(data)
+
+
+def _same_hota(ref: Optional[Dict[str, np.ndarray]], nat: Dict[str, np.ndarray]) -> str:
+    if ref is None:
+        return "-"
+    if not np.array_equal(ref["HOTA_TP"], nat["hota_tp"]):
+        return "False"
+    return str(all(np.abs(ref[k] - nat[k.lower()]).max() < 1e-9 for k in ("HOTA", "DetA", "AssA", "LocA")))
+
+
+def tile_gt(gt_path: str, tiles: int, out_path: Path) -> Path:
+    """GT 를 프레임 축으로 tiles 번 이어 붙인 파일 (ID 도 겹치지 않게 이동)"""
+    lines = Path(gt_path).read_text().splitlines()
+    header, body = lines[0], [ln.split(",") for ln in lines[1:] if ln.strip()]
+    max_f = max(int(r[0]) for r in body)
+    max_id = max(int(r[1]) for r in body)
+    out = [header]
+    for t in range(tiles):
+        for r in body:
+            out.append(",".join([str(int(r[0]) + t * max_f), str(int(r[1]) + t * max_id)] + r[2:]))
+    out_path.write_text("\n".join(out) + "\n")
+    return out_path
+
+
+def synth_hypothesis(gt: MotData, case: tuple, rng: np.random.Generator) -> List[Tuple]:
+    """GT 에서 가설 MOT 행 합성 (benchmark 트래커 출력처럼 정수 박스)"""
+    _, jitter, drop, fp_rate, swaps_per_100, frag = case
+    n = len(gt)
+    keep = rng.random(n) >= drop
+    boxes = gt.boxes + rng.normal(0, jitter, (n, 4)) if jitter else gt.boxes.copy()
+    ids = gt.ids.copy()
+
+    # 조각남: 트랙 중간부터 새 ID
+    for tid in np.unique(ids):
+        if rng.random() < frag:
+            rows = np.flatnonzero(gt.ids == tid)
+            cut = rows[rng.integers(0, len(rows))]
+            ids[(gt.ids == tid) & (gt.frame >= gt.frame[cut])] += 100000
+    # ID 교체: 같은 프레임의 두 트랙이 그 프레임부터 ID 를 맞바꿈
+    n_frames = int(gt.frame.max() - gt.frame.min() + 1) if n else 0
+    for _ in range(int(swaps_per_100 * n_frames / 100)):
+        f = int(rng.choice(gt.frame))
+        rows = np.flatnonzero(gt.frame == f)
+        if len(rows) < 2:
+            continue
+        a, b = ids[rng.choice(rows, 2, replace=False)]
+        later = gt.frame >= f
+        ma, mb = later & (ids == a), later & (ids == b)
+        ids[ma], ids[mb] = b, a
+
+    rows = [(int(gt.frame[i]), int(ids[i]), *np.round(boxes[i]).astype(int).tolist(), 0.9, int(gt.class_id[i]))
+            for i in np.flatnonzero(keep)]
+    # 오검출: 임의 프레임 · 위치의 새 ID 박스
+    n_fp = int(fp_rate * n)
+    for k in range(n_fp):
+        f = int(rng.choice(gt.frame))
+        x, y = rng.uniform(0, 1200), rng.uniform(0, 650)
+        rows.append((f, 900000 + k % 50, int(x), int(y), 50, 50, 0.6, int(rng.integers(0, 2))))
+    rows.sort(key=lambda r: r[0])
+    return rows
+
+
+def _time(fn, repeat: int):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0, out
+
+
+def _same(ref: Dict[str, float], nat: Dict[str, float]) -> bool:
+    for k in ("num_matches", "num_switches", "num_false_positives", "num_misses", "idtp"):
+        if int(ref[k]) != int(nat[k]):
+            return False
+    return all(abs(ref[k] - nat[k]) < 1e-9 for k in ("mota", "idf1", "recall", "precision"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="motmetrics vs native MOT metrics")
+    parser.add_argument("--gt", type=str, default=CONFIG["gt"])
+    parser.add_argument("--tiles", type=str, default=None, help="GT 반복 수 (comma-separated)")
+    parser.add_argument("--repeat", type=int, default=CONFIG["repeat"])
+    args = parser.parse_args()
+
+    gt_path = Path(args.gt) if Path(args.gt).is_file() else REPO_ROOT / args.gt
+    tiles = [int(t) for t in args.tiles.split(",")] if args.tiles else CONFIG["tiles"]
+    rng = np.random.default_rng(CONFIG["seed"])
+
+    print(f"[metrics] GT {gt_path} (best of {args.repeat}, ms)")
+    print(f"{'case':>8} {'tiles':>5} {'gt rows':>8} {'motmetrics':>11} {'native':>9} {'speedup':>8} "
+          f"{'MOTA':>6} {'IDF1':>6} {'IDSW':>5} {'same':>5} {'TrackEval':>10} {'hota ms':>7} {'HOTA':>6} {'hota':>5}")
+    with tempfile.TemporaryDirectory() as tmp:   # 이어 붙인 GT 는 실행 동안만
+        for t in tiles:
+            path = tile_gt(str(gt_path), t, Path(tmp) / f"gt_x{t}.csv") if t > 1 else gt_path
+            gt = MotData.load(path)
+            for case in CASES:
+                rows = synth_hypothesis(gt, case, rng)
+                repeat = args.repeat if t <= 4 else 1
+                t_ref, ref = _time(lambda: motmetrics_reference(str(path), rows), repeat)
+                t_nat, nat = _time(lambda: evaluate(MotData.load(path), MotData.from_rows(rows)), args.repeat)
+                print(f"{case[0]:>8} {t:>5} {len(gt):>8} {t_ref:>11.1f} {t_nat:>9.1f} {t_ref / t_nat:>7.1f}x "
+                      f"{100 * nat['mota']:>6.1f} {100 * nat['idf1']:>6.1f} {nat['num_switches']:>5} "
+                      f"{str(_same(ref, nat)):>5} ", end="")
+                hyp = MotData.from_rows(rows)
+                t_te, te = _time(lambda: trackeval_hota_reference(gt, hyp), 1)
+                t_h, h = _time(lambda: hota(gt, hyp, FramePairs.build(gt, hyp)), args.repeat)
+                te_s = f"{t_te:>10.1f}" if te is not None else f"{'-':>10}"
+                print(f"{te_s} {t_h:>7.1f} {100 * h['hota'].mean():>6.1f} {_same_hota(te, h):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+영상 처리 루프 end-to-end 벤치마크 (YOLO 불필요)
+
+실제 영상 디코딩 + 프레임당 가상 처리 시간(검출·추적 대역)으로 루프 FPS 를 측정합니다.
+처리 시간은 time.sleep 으로 흉내 냅니다 (GPU 추론 대기처럼 GIL 을 놓는 구간).
+
+  decode   ─ 직렬 cap.read (기존) vs FramePrefetcher 백그라운드 디코드 (capacity 별)
+  pipeline ─ 스테이지 직렬 실행 (기존) vs StagePipeline 스테이지별 스레드 (stage_ms 가상 처리 시간)
+  encode   ─ 루프 안 cv2.VideoWriter.write (기존) vs AsyncVideoWriter 정책별 (block / drop_oldest / every_nth)
+
+사용법:
+  python scripts/trackers/bench_pipeline.py
+  python scripts/trackers/bench_pipeline.py --source notebook/rgb.mp4 --work-ms 0,15,30
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from pipeline import Stage, StagePipeline
+from video_io import AsyncVideoWriter, FramePrefetcher
+
+# ============================================================
+# 설정
+# ============================================================
+CONFIG = {
+    "source":     None,            # None 이면 합성 영상 생성
+    "frame_w":    1280,
+    "frame_h":    720,
+    "n_frames":   240,
+    "work_ms":    [0, 10, 25],     # 프레임당 가상 처리 시간
+    "capacities": [0, 2, 4, 8],    # 0 = 직렬 cap.read
+    "seed":       0,
+    # pipeline: tracker.run 스테이지별 가상 처리 시간 (ms)
+    "stage_ms":   {"motion": 4, "detect": 15, "assign": 3, "annotate": 5, "encode": 6},
+    # encode: 프레임당 가상 처리 시간 (ms) / every_nth 의 N
+    "encode_work_ms": 10,
+    "encode_every_n": 3,
+}
+# ============================================================
+
+
+def _synthetic_video(path: Path, n: int, w: int, h: int, rng: np.random.Generator):
+    """레일 주행처럼 옆으로 흐르는 배경 + 노이즈 (mp4v 디코드 비용이 실제와 비슷하도록)"""
+    bg = rng.integers(0, 256, (h, w * 2, 3), dtype=np.uint8)
+    bg = cv2.GaussianBlur(bg, (7, 7), 0)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 30.0, (w, h))
+    for i in range(n):
+        x = (i * 6) % w
+        writer.write(bg[:, x:x + w])
+    writer.release()
+
+
+def _open(source: str) -> cv2.VideoCapture:
+    cap = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not cap.isOpened():
+        raise RuntimeError(f"영상 소스를 열 수 없습니다: {source}")
+    return cap
+
+
+def run_loop(source: str, capacity: int, work_ms: float, max_frames: Optional[int]) -> dict:
+    """basic_*.run 과 같은 형태의 루프. 디코드 대기 + 처리 시간 포함 FPS."""
+    reader = FramePrefetcher(_open(source), capacity)
+    n = 0
+    t0 = time.perf_counter()
+    while max_frames is None or n < max_frames:
+        ret, frame = reader.read()
+        if not ret:
+            break
+        if work_ms:
+            time.sleep(work_ms / 1000.0)
+        n += 1
+    elapsed = time.perf_counter() - t0
+    reader.release()
+    return {"frames": n, "fps": n / elapsed if elapsed > 0 else 0.0, "wait_ms": reader.mean_wait_ms}
+
+
+def bench_decode(source: str, work_list: List[float], capacities: List[int], max_frames: Optional[int]):
+    print(f"\n[decode] 직렬 cap.read vs FramePrefetcher ({source})")
+    print(f"{'work ms':>8} {'capacity':>9} {'fps':>8} {'wait ms':>8} {'vs serial':>10}")
+    for work in work_list:
+        serial = None
+        for cap_n in capacities:
+            r = run_loop(source, cap_n, work, max_frames)
+            if serial is None:
+                serial = r["fps"] if cap_n == 0 else run_loop(source, 0, work, max_frames)["fps"]
+            gain = r["fps"] / serial if serial else 0.0
+            label = "serial" if cap_n == 0 else str(cap_n)
+            print(f"{work:>8.0f} {label:>9} {r['fps']:>8.1f} {r['wait_ms']:>8.2f} {gain:>9.2f}x")
+
+
+def _sleep_stage(name: str, ms: float) -> Stage:
+    def fn(item):
+        time.sleep(ms / 1000.0)
+        return item
+    return Stage(name, fn)
+
+
+def bench_pipeline(source: str, stage_ms: dict, max_frames: Optional[int]):
+    print(f"\n[pipeline] 스테이지 직렬 vs 스레드 파이프라인 "
+          f"({', '.join(f'{k}={v}' for k, v in stage_ms.items())} ms)")
+    print(f"{'mode':>9} {'fps':>8} {'vs serial':>10}")
+    serial_fps = None
+    for threaded in (False, True):
+        reader = FramePrefetcher(_open(source), 4)
+        frames = (f for i, f in enumerate(reader) if max_frames is None or i < max_frames)
+        pipe = StagePipeline(frames, [_sleep_stage(k, v) for k, v in stage_ms.items()],
+                             capacity=2, threaded=threaded)
+        n = sum(1 for _ in pipe)
+        reader.release()
+        fps = n / pipe.wall_time if pipe.wall_time > 0 else 0.0
+        serial_fps = serial_fps or fps
+        print(f"{'threaded' if threaded else 'serial':>9} {fps:>8.1f} {fps / serial_fps:>9.2f}x")
+        if threaded:
+            print(pipe.format_stats())
+
+
+def bench_encode(source: str, out_dir: Path, work_ms: float, every_n: int, max_frames: Optional[int]):
+    print(f"\n[encode] 동기 VideoWriter vs AsyncVideoWriter (처리 {work_ms:.0f}ms/frame)")
+    print(f"{'writer':>12} {'fps':>8} {'vs sync':>8} {'written':>8} {'dropped':>8} {'enc ms':>7}")
+    cap = _open(source)
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+    sync_fps = None
+    for mode in ("sync", "block", "drop_oldest", "every_nth"):
+        path = str(out_dir / f"encode_{mode}.mp4")
+        if mode == "sync":
+            writer = cv2.VideoWriter(path, fourcc, 30.0, size)
+        else:
+            writer = AsyncVideoWriter(path, fourcc, 30.0, size, policy=mode, every_n=every_n)
+        reader = FramePrefetcher(_open(source), 4)
+        n = 0
+        t0 = time.perf_counter()
+        for item in reader:
+            if max_frames is not None and n >= max_frames:
+                break
+            if work_ms:
+                time.sleep(work_ms / 1000.0)
+            writer.write(item.image)
+            n += 1
+        elapsed = time.perf_counter() - t0   # 루프 FPS (남은 인코딩 대기 제외)
+        writer.release()
+        reader.release()
+        fps = n / elapsed if elapsed > 0 else 0.0
+        sync_fps = sync_fps or fps
+        if mode == "sync":
+            written, dropped, enc = n, 0, ""
+        else:
+            written, dropped, enc = writer.written, writer.dropped, f"{writer.mean_encode_ms:.1f}"
+        print(f"{mode:>12} {fps:>8.1f} {fps / sync_fps:>7.2f}x {written:>8} {dropped:>8} {enc:>7}")
+
+
+SECTIONS = ("decode", "pipeline", "encode")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Video loop end-to-end benchmark")
+    parser.add_argument("--source", type=str, default=CONFIG["source"],
+                        help="영상 경로 (없으면 합성 영상)")
+    parser.add_argument("--frames", type=int, default=None, help="최대 프레임 수")
+    parser.add_argument("--work-ms", type=str, default=None,
+                        help="프레임당 가상 처리 시간 목록 (comma-separated)")
+    parser.add_argument("--capacities", type=str, default=None,
+                        help="prefetch 큐 크기 목록 (comma-separated, 0=직렬)")
+    parser.add_argument("--only", type=str, default=",".join(SECTIONS),
+                        help=f"실행할 항목 (comma-separated: {', '.join(SECTIONS)})")
+    args = parser.parse_args()
+
+    only = {t.strip() for t in args.only.split(",")}
+    work = [float(s) for s in args.work_ms.split(",")] if args.work_ms else CONFIG["work_ms"]
+    caps = [int(s) for s in args.capacities.split(",")] if args.capacities else CONFIG["capacities"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.source
+        if source is None:
+            source = str(Path(tmp) / "synthetic.mp4")
+            _synthetic_video(Path(source), CONFIG["n_frames"], CONFIG["frame_w"], CONFIG["frame_h"],
+                             np.random.default_rng(CONFIG["seed"]))
+        elif not str(source).isdigit() and not Path(source).exists():
+            source = str(REPO_ROOT / source)
+        if "decode" in only:
+            bench_decode(source, work, caps, args.frames)
+        if "pipeline" in only:
+            bench_pipeline(source, CONFIG["stage_ms"], args.frames)
+        if "encode" in only:
+            bench_encode(source, Path(tmp), CONFIG["encode_work_ms"], CONFIG["encode_every_n"], args.frames)
+
+
+if __name__ == "__main__":
+    main()
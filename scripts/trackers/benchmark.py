@@ -16,20 +16,42 @@
   videos/bytetrack.mp4   ─ 결과 영상 (save_video=True 일 때)
   ...
   summary.csv            ─ 지표 요약
+                           (저장소의 benchmark/summary.csv 는 기준 tracker 로 만든 값. 기준 tracker 는
+                            trackers 2.x 의 변환 객체를 받아 모션 보정 (트랙 워핑) 을 하지 못했으므로
+                            지금 돌리면 tracker 행이 달라짐. tnew_stage2_gating=True 면 2단계 매칭도 달라짐)
+  det_cache/<key>.npz    ─ 검출 캐시 (src/detection_cache.py, 모델 · 영상 · conf/iou/ROI 해시가 키)
   comparison.png         ─ 비교 차트
   mot/gt.txt             ─ --gt 사용 시 GT 복사 (표에서 GT 행과 동일)
 
 GT 없이 실행:
   python scripts/benchmark.py
 
-GT 있으면 MOTA·IDF1·IDSW 추가 계산:
+GT 있으면 MOTA·IDF1·IDSW · HOTA (DetA·AssA·LocA) 추가 계산:
   python scripts/benchmark.py --gt benchmark/gt.txt
+  → ripe / unripe 를 따로 매칭한 클래스별 지표도 같이 (summary.csv 의 ripe_MOTA, unripe_IDSW ...)
 
 특정 tracker만 실행:
   python scripts/benchmark.py --trackers bytetrack,tracker
 
+tracker 검출 주기 (tnew_detect_every) 별 정확도 / FPS 비교:
+  python scripts/benchmark.py --trackers tracker --gt tracking_result/gt_mot.csv --detect-every 1,2,3,5
+  → mot/tracker_k2.txt 등 + 변형 비교 표 (검출 비율 · FPS · 카운트 · MOTA · IDF1)
+
+tracker 동적 ROI (tnew_dynamic_roi) on/off 비교 (크롭 면적 절감 · 카운트 차이):
+  python scripts/benchmark.py --trackers tracker --dynamic-roi
+
 설정: CONFIG_SHARED 로 영상·검출·ROI만 통일, 트래커별 권장값은 각 basic_*.py CONFIG 와 동일.
 
+트래커 병렬 실행 (트래커 · 변형마다 별도 프로세스, 워커마다 CPU 고정):
+  python scripts/benchmark.py --jobs 4
+  → 표 · summary.csv 순서는 직렬 실행과 같음 (FPS 는 각 워커가 고정된 코어에서 잰 값)
+
+검출 캐시 (기본 on):
+  영상 디코드 + YOLO 는 처음 한 번만 실행해 det_cache/ 에 저장하고, 모든 트래커는 그 검출을 재생합니다.
+  같은 설정으로 다시 돌리면 YOLO 없이 바로 트래킹만 실행 → 표의 FPS 는 트래킹 (디코드 포함) 속도.
+  YOLO 포함 FPS 가 필요하면:
+    python scripts/benchmark.py --no-cache
+
 GT 파일 형식 (MOT Challenge):
   frame_id, track_id, x, y, w, h, conf, class_id
   (1-based frame_id, bbox는 x_topleft·y_topleft·width·height)
@@ -37,18 +59,24 @@ GT 파일 형식 (MOT Challenge):
 
 import argparse
 import csv
+import importlib
+import multiprocessing as mp
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-import numpy as np
-
 REPO_ROOT = Path(__file__).resolve().parent.parent.parent
 SCRIPTS_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(REPO_ROOT / "src"))
 sys.path.insert(0, str(SCRIPTS_DIR))
 
+from mot_eval import MotData, evaluate, evaluate_classes
+
 
 def resolve_gt_path(gt: str) -> Path:
     """cwd 또는 레포 루트 기준 GT MOT 파일 경로."""
@@ -74,6 +102,12 @@ CONFIG_SHARED = {
     "conf":       0.5,
     "iou":        0.3,
     "roi_half_width": 320,
+    "prefetch_frames": 4,   # 백그라운드 디코드 큐 크기 (0 = 직렬 cap.read)
+    "encode_policy":  "block",   # 영상 저장 큐가 찼을 때: block / drop_oldest / every_nth
+    "encode_queue":   8,
+    "encode_every_n": 1,         # every_nth 일 때 N
+    "use_detection_cache": True,  # 검출 한 번 → 모든 트래커 재생 (False = 트래커마다 YOLO)
+    "cache_dir":      "benchmark/det_cache",
 }
 
 # basic_bytetracker.py CONFIG (ByteTrack 블록)
@@ -116,6 +150,7 @@ TRACKER_RECOMMENDED = {
     "tnew_reid_weight":       0.3,
     "tnew_reid_threshold":    0.5,
     "tnew_reid_hist_bins":    32,
+    "tnew_stage2_gating":     False,   # True = 격자 게이팅 2단계 (빠름, 매칭이 dense 와 다를 수 있음)
     "tnew_lost_buffer_frames":    20,
     "tnew_lost_buffer_uncounted": 150,
     "tnew_use_order_constraint":  True,
@@ -135,9 +170,22 @@ TRACKER_RECOMMENDED = {
     "tnew_count_unknown_ema_threshold":    3.0,
     "tnew_counting_entry_offset":          50,
     "tnew_counting_min_consecutive":       3,
+    "tnew_detect_every":                   1,
+    "tnew_detect_motion_threshold":        40.0,
+    "tnew_detect_uncertainty_threshold":   0.5,
+    "tnew_dynamic_roi":                    False,
+    "tnew_dynamic_roi_margin":             150,
+    "tnew_dynamic_roi_stable_frames":      30,
+    "tnew_dynamic_roi_probe_every":        60,
     "tnew_trace_length":                   80,
 }
 
+# --jobs N 병렬 실행
+CONFIG_PARALLEL = {
+    "start_method": "spawn",   # 워커 프로세스 시작 방식 (spawn / fork / forkserver)
+    "pin_cpus":     True,      # 워커마다 CPU 를 나눠 고정 (FPS 가 서로 간섭받지 않도록)
+}
+
 # main()·경로용 (output_dir, save_video)
 CONFIG = CONFIG_SHARED
 # ============================================================
@@ -156,6 +204,9 @@ class TrackerResult:
     fps_avg: float = 0.0
     total_frames: int = 0
     unique_ids: Dict[int, set] = field(default_factory=lambda: {0: set(), 1: set()})
+    detect_ratio: Optional[float] = None   # tracker 만: YOLO 를 실제로 돌린 프레임 비율
+    crop_ratio: Optional[float] = None     # tracker 만: 검출 크롭 면적 / ROI 면적
+    counts: Optional[Dict[int, int]] = None   # tracker 만: 입구 라인 통과 수
 
 
 def _from_run_result(name: str, result: dict) -> TrackerResult:
@@ -166,6 +217,9 @@ def _from_run_result(name: str, result: dict) -> TrackerResult:
         fps_avg=result["fps_avg"],
         total_frames=result["total_frames"],
         unique_ids=result["unique_ids"],
+        detect_ratio=result.get("detect_ratio"),
+        crop_ratio=result.get("crop_ratio"),
+        counts=result.get("counts"),
     )
 
 
@@ -210,9 +264,9 @@ def load_gt_tracker_result(gt_path: Path) -> TrackerResult:
 # 각 tracker 실행 (basic 스크립트 run() 호출)
 # ---------------------------------------------------------------------------
 
-def _bytetrack_config(video_path: Optional[Path]) -> dict:
+def _bytetrack_config(video_path: Optional[Path], shared: Optional[dict] = None) -> dict:
     return {
-        **CONFIG_SHARED,
+        **(shared or CONFIG_SHARED),
         **BYTETRACK_RECOMMENDED,
         "output_path": str(video_path) if video_path else None,
         "show_window": False,
@@ -220,9 +274,9 @@ def _bytetrack_config(video_path: Optional[Path]) -> dict:
     }
 
 
-def _sort_config(video_path: Optional[Path]) -> dict:
+def _sort_config(video_path: Optional[Path], shared: Optional[dict] = None) -> dict:
     return {
-        **CONFIG_SHARED,
+        **(shared or CONFIG_SHARED),
         **SORT_RECOMMENDED,
         "output_path": str(video_path) if video_path else None,
         "show_window": False,
@@ -230,9 +284,9 @@ def _sort_config(video_path: Optional[Path]) -> dict:
     }
 
 
-def _deepsort_config(video_path: Optional[Path]) -> dict:
+def _deepsort_config(video_path: Optional[Path], shared: Optional[dict] = None) -> dict:
     return {
-        **CONFIG_SHARED,
+        **(shared or CONFIG_SHARED),
         **DEEPSORT_RECOMMENDED,
         "output_path": str(video_path) if video_path else None,
         "show_window": False,
@@ -240,18 +294,159 @@ def _deepsort_config(video_path: Optional[Path]) -> dict:
     }
 
 
-def _tracker_config(video_path: Optional[Path]) -> dict:
-    return {
-        **CONFIG_SHARED,
+def _tracker_config(video_path: Optional[Path], detect_every: Optional[int] = None,
+                    dynamic_roi: Optional[bool] = None, shared: Optional[dict] = None) -> dict:
+    config = {
+        **(shared or CONFIG_SHARED),
         **TRACKER_RECOMMENDED,
         "output_path": str(video_path) if video_path else None,
     }
+    # tracker 만 ROI 키가 따로 (tnew_roi_half_width) — 다르면 캐시 ROI 와 안 맞으므로 직접 검출
+    if config["tnew_roi_half_width"] != config.get("roi_half_width"):
+        config.pop("detection_cache", None)
+    if detect_every is not None:
+        config["tnew_detect_every"] = detect_every
+    if dynamic_roi is not None:
+        config["tnew_dynamic_roi"] = dynamic_roi
+    return config
+
+
+# ---------------------------------------------------------------------------
+# 검출 캐시 (디코드 + YOLO 한 번)
+# ---------------------------------------------------------------------------
+
+def _repo_path(path: str) -> Path:
+    """레포 루트 기준 경로가 있으면 그것, 아니면 그대로 (basic_*.py 와 같은 해석)"""
+    p = REPO_ROOT / path
+    return p if p.exists() else Path(path)
+
+
+def prepare_detection_cache(config: dict) -> Path:
+    """CONFIG_SHARED 검출 설정의 캐시 파일 경로. 없으면 디코드 + YOLO 로 만들어 저장."""
+    import cv2
+    from detection_cache import DetectionCache, cache_key
+    from roi_utils import compute_roi, yolo_detections_with_roi
+
+    source     = _repo_path(config["source"])
+    model_path = _repo_path(config["model_path"])
+    cap = cv2.VideoCapture(str(source))
+    if not cap.isOpened():
+        raise RuntimeError(f"영상 소스를 열 수 없습니다: {config['source']}")
+    w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    roi = compute_roi(w, h, config.get("roi_half_width"))
+
+    key  = cache_key(model_path, source, config["conf"], config["iou"], roi)
+    path = REPO_ROOT / config["cache_dir"] / f"{key}.npz"
+    if path.is_file():
+        print(f"[cache] 재사용: {path}")
+        return path
+
+    from ultralytics import YOLO
+    model = YOLO(str(model_path))
+    print(f"[cache] 검출 캐시 생성 ({config['source']}, conf={config['conf']} iou={config['iou']} roi={roi})...")
+    cache = DetectionCache.build(
+        source,
+        lambda frame: yolo_detections_with_roi(model, frame, config["conf"], config["iou"], roi),
+        meta={"key": key, "source": str(config["source"]), "model": str(config["model_path"]),
+              "conf": config["conf"], "iou": config["iou"], "roi": list(roi) if roi else None},
+        prefetch=config.get("prefetch_frames", 4),
+    )
+    cache.save(path)
+    print(f"[cache] {cache.format_stats()} → {path}")
+    return path
+
+
+# ---------------------------------------------------------------------------
+# 트래커 작업 (직렬 / --jobs 프로세스 병렬)
+# ---------------------------------------------------------------------------
+
+# runner → (모듈, run 함수)
+_RUNNERS = {
+    "bytetrack": ("basic_bytetracker", "run"),
+    "sort":      ("basic_sort", "run"),
+    "deepsort":  ("basic_deepsort", "run"),
+    "tracker":   ("tracker", "run_benchmark"),
+}
+
+
+def build_jobs(to_run: List[str], shared: dict, video_dir: Path,
+               detect_every: List[int], dynamic_roi: List[bool]) -> List[dict]:
+    """실행할 트래커 · 변형 목록 (표 순서). job: name / runner / config / mot (파일명)"""
+    def _video(stem: str) -> Optional[Path]:
+        return video_dir / f"{stem}.mp4" if CONFIG["save_video"] else None
+
+    jobs = []
+    if "bytetrack" in to_run:
+        jobs.append({"name": "ByteTrack", "runner": "bytetrack", "mot": "bytetrack.txt",
+                     "config": _bytetrack_config(_video("bytetrack"), shared)})
+    if "sort" in to_run:
+        jobs.append({"name": "SORT", "runner": "sort", "mot": "sort.txt",
+                     "config": _sort_config(_video("sort"), shared)})
+    if "deepsort" in to_run:
+        jobs.append({"name": "DeepSORT", "runner": "deepsort", "mot": "deepsort.txt",
+                     "config": _deepsort_config(_video("deepsort"), shared)})
+    if "tracker" in to_run:
+        for k in detect_every:
+            for droi in dynamic_roi:
+                stem = "tracker" + (f"_k{k}" if k != 1 else "") + ("_droi" if droi else "")
+                name = "tracker" + (f" k={k}" if k != 1 else "") + (" droi" if droi else "")
+                jobs.append({"name": name, "runner": "tracker", "mot": f"{stem}.txt",
+                             "config": _tracker_config(_video(stem), k, droi, shared)})
+    return jobs
+
+
+def _run_job(runner: str, config: dict) -> dict:
+    """트래커 하나 실행 → run() 반환 dict (워커 프로세스에서도 호출)"""
+    module, fn = _RUNNERS[runner]
+    return getattr(importlib.import_module(module), fn)(config)
+
+
+def _init_worker(slots):
+    """워커 프로세스 시작 시 CPU 묶음 하나를 가져가 고정 (스레드 수도 그만큼으로 제한)"""
+    from multi_stream import _limit_threads
+    cpus = slots.get()
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+        _limit_threads(len(cpus))
+
+
+def run_jobs(jobs: List[dict], n_jobs: int = 1) -> List[TrackerResult]:
+    """jobs 순서대로 TrackerResult. n_jobs > 1 이면 프로세스 풀 (결과 순서는 직렬과 같음)."""
+    if n_jobs <= 1 or len(jobs) <= 1:
+        return [_from_run_result(j["name"], _run_job(j["runner"], j["config"])) for j in jobs]
+
+    from multi_stream import _cpu_sets
+    workers = min(n_jobs, len(jobs))
+    ctx = mp.get_context(CONFIG_PARALLEL["start_method"])
+    cpu_sets = _cpu_sets("auto" if CONFIG_PARALLEL["pin_cpus"] else None, workers)
+    if CONFIG_PARALLEL["pin_cpus"] and len({tuple(c or ()) for c in cpu_sets}) < workers:
+        print(f"[WARN] CPU {os.cpu_count()}개 < jobs {workers} → 워커끼리 코어를 공유하므로 FPS 가 간섭받음")
+    slots = ctx.Queue()
+    for i in range(workers):
+        slots.put(cpu_sets[i % len(cpu_sets)])
+
+    print(f"[jobs] {len(jobs)}개 트래커 실행 / {workers} workers ({CONFIG_PARALLEL['start_method']}, "
+          f"CPU {cpu_sets if CONFIG_PARALLEL['pin_cpus'] else '고정 안 함'})")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(slots,)) as pool:
+        futures = [pool.submit(_run_job, j["runner"], j["config"]) for j in jobs]
+        return [_from_run_result(j["name"], f.result()) for j, f in zip(jobs, futures)]
 
 
 # ---------------------------------------------------------------------------
 # MOT 파일 저장
 # ---------------------------------------------------------------------------
 
+def check_detect_ratio(jobs: List[dict], results: List[TrackerResult]):
+    """tnew_detect_every > 1 인데 모든 프레임을 검출했으면 경고 (카메라 변환을 못 읽어 스케줄러가 건너뛰지 못함)"""
+    for job, r in zip(jobs, results):
+        k = job["config"].get("tnew_detect_every", 1)
+        if k > 1 and r.detect_ratio is not None and r.detect_ratio >= 1.0:
+            print(f"[WARN] {r.name}: tnew_detect_every={k} 인데 detect_ratio={r.detect_ratio:.2f} "
+                  f"(모든 프레임 YOLO) → MotionEstimator 변환 형식 확인 (tracker.transform_matrix)")
+
+
 def save_mot(result: TrackerResult, path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
     with open(path, "w", newline="") as f:
@@ -270,7 +465,7 @@ def proxy_metrics(result: TrackerResult) -> dict:
     total_ids  = len(result.unique_ids[0]) + len(result.unique_ids[1])
     avg_dets   = len(result.mot_rows) / result.total_frames if result.total_frames else 0
     instability = total_ids / avg_dets if avg_dets > 0 else float("inf")
-    return {
+    metrics = {
         "ripe_ids":       len(result.unique_ids[0]),
         "unripe_ids":     len(result.unique_ids[1]),
         "total_ids":      total_ids,
@@ -278,81 +473,60 @@ def proxy_metrics(result: TrackerResult) -> dict:
         "avg_dets":       round(avg_dets, 1),
         "id_instability": round(instability, 2),
     }
+    if result.detect_ratio is not None:
+        metrics["detect_ratio"] = round(result.detect_ratio, 3)
+    if result.crop_ratio is not None:
+        metrics["crop_ratio"] = round(result.crop_ratio, 3)
+    if result.counts is not None:
+        metrics["ripe_count"] = result.counts[0]
+        metrics["unripe_count"] = result.counts[1]
+    return metrics
 
 
 # ---------------------------------------------------------------------------
 # MOT 지표 (GT 있을 때)
 # ---------------------------------------------------------------------------
 
-def _np_asfarray_shim() -> None:
-    """NumPy 2.0에서 제거된 np.asfarray — motmetrics.distances.iou_matrix 호환."""
-    if hasattr(np, "asfarray"):
-        return
-
-    def _asfarray(a, dtype=np.float64):
-        return np.asarray(a, dtype=dtype)
+@lru_cache(maxsize=4)
+def _load_gt(gt_path: str) -> MotData:
+    return MotData.load(gt_path)
 
-    np.asfarray = _asfarray  # type: ignore[method-assign]
 
+# 클래스별 열 (summary.csv 에서 ripe_MOTA, unripe_IDSW ...)
+CLASS_METRIC_COLS = ["MOTA", "IDF1", "IDSW", "HOTA", "DetA", "AssA", "FP", "FN"]
 
-def mot_metrics(result: TrackerResult, gt_path: str) -> Optional[dict]:
-    try:
-        import motmetrics as mm
-    except ImportError:
-        print("[WARN] motmetrics 미설치 → pip install motmetrics")
-        return None
-
-    _np_asfarray_shim()
-
-    def _load(path):
-        data: Dict[int, Dict[int, list]] = {}
-        with open(path) as f:
-            reader = csv.reader(f)
-            next(reader)
-            for row in reader:
-                if len(row) < 6:
-                    continue
-                fid, tid = int(row[0]), int(row[1])
-                data.setdefault(fid, {})[tid] = [float(row[2]), float(row[3]),
-                                                  float(row[4]), float(row[5])]
-        return data
-
-    gt_data  = _load(gt_path)
-    hyp_data: Dict[int, Dict[int, list]] = {}
-    for row in result.mot_rows:
-        hyp_data.setdefault(row[0], {})[row[1]] = [row[2], row[3], row[4], row[5]]
-
-    acc = mm.MOTAccumulator(auto_id=True)
-    for fid in sorted(set(list(gt_data) + list(hyp_data))):
-        gt_f  = gt_data.get(fid, {})
-        hyp_f = hyp_data.get(fid, {})
-        gt_ids, hyp_ids = list(gt_f), list(hyp_f)
-        if not gt_ids and not hyp_ids:
-            continue
-        dist = (mm.distances.iou_matrix([gt_f[i] for i in gt_ids],
-                                        [hyp_f[i] for i in hyp_ids], max_iou=0.5)
-                if gt_ids and hyp_ids else np.empty((len(gt_ids), len(hyp_ids))))
-        acc.update(gt_ids, hyp_ids, dist)
-
-    mh  = mm.metrics.create()
-    row = mh.compute(
-        acc,
-        metrics=["num_switches", "mota", "idf1", "recall",
-                 "precision", "num_false_positives", "num_misses"],
-        name=result.name,
-    ).iloc[0]
 
+def _mot_columns(m: dict) -> dict:
     return {
-        "MOTA":  round(float(row["mota"]) * 100, 1),
-        "IDF1":  round(float(row["idf1"]) * 100, 1),
-        "IDSW":  int(row["num_switches"]),
-        "Recall": round(float(row["recall"]) * 100, 1),
-        "Prec":  round(float(row["precision"]) * 100, 1),
-        "FP":    int(row["num_false_positives"]),
-        "FN":    int(row["num_misses"]),
+        "MOTA":  round(m["mota"] * 100, 1),
+        "IDF1":  round(m["idf1"] * 100, 1),
+        "IDSW":  int(m["num_switches"]),
+        "Recall": round(m["recall"] * 100, 1),
+        "Prec":  round(m["precision"] * 100, 1),
+        "FP":    int(m["num_false_positives"]),
+        "FN":    int(m["num_misses"]),
+        "HOTA":  round(m["hota"] * 100, 1),
+        "DetA":  round(m["deta"] * 100, 1),
+        "AssA":  round(m["assa"] * 100, 1),
+        "LocA":  round(m["loca"] * 100, 1),
     }
 
 
+def mot_metrics(result: TrackerResult, gt_path: str, max_frame: Optional[int] = None,
+                per_class: bool = True) -> Optional[dict]:
+    """GT 대비 MOTA · IDF1 · IDSW · HOTA 등 (src/mot_eval.py, motmetrics · TrackEval 과 같은 정의).
+    max_frame 이 있으면 그 프레임 (1부터) 까지만 비교. per_class 면 클래스별 열도 (클래스끼리만 매칭)."""
+    gt, hyp = _load_gt(str(gt_path)), MotData.from_rows(result.mot_rows)
+    if not per_class:
+        return _mot_columns(evaluate(gt, hyp, max_frame=max_frame, with_hota=True))
+    by_class = evaluate_classes(gt, hyp, CLASS_NAMES, max_frame=max_frame)
+    metrics = _mot_columns(by_class[None])
+    for cid, name in CLASS_NAMES.items():
+        cols = _mot_columns(by_class[cid])
+        metrics.update({f"{name}_{k}": cols[k] for k in CLASS_METRIC_COLS})
+    return metrics
+
+
 # ---------------------------------------------------------------------------
 # 결과 출력 및 차트
 # ---------------------------------------------------------------------------
@@ -363,7 +537,7 @@ def print_table(results: List[TrackerResult], metrics_list: List[dict]):
     print(f"{'Tracker':<16} {'FPS':>6} {'ripe IDs':>9} {'unripe IDs':>11} "
           f"{'total IDs':>10} {'ID instab.':>11}", end="")
     if has_mot:
-        print(f" {'MOTA':>7} {'IDF1':>7} {'IDSW':>6}", end="")
+        print(f" {'MOTA':>7} {'IDF1':>7} {'IDSW':>6} {'HOTA':>6}", end="")
     print()
     print("-" * 80)
     for r, m in zip(results, metrics_list):
@@ -377,12 +551,50 @@ def print_table(results: List[TrackerResult], metrics_list: List[dict]):
             mota = m.get("MOTA", "-")
             idf1 = m.get("IDF1", "-")
             idsw = m.get("IDSW", "-")
-            line += (f" {str(mota):>7} {str(idf1):>7} {str(idsw):>6}")
+            hota = m.get("HOTA", "-")
+            line += (f" {str(mota):>7} {str(idf1):>7} {str(idsw):>6} {str(hota):>6}")
         print(line)
     print("=" * 80)
     print("※ ID instability = 총 unique IDs / 프레임당 평균 검출 수  (낮을수록 ID switching 적음)")
     if has_mot:
-        print("※ GT 행: MOTA·IDF1·IDSW 는 GT 대 GT (이론상 완전 일치 시 상한선)")
+        print("※ GT 행: MOTA·IDF1·IDSW·HOTA 는 GT 대 GT (이론상 완전 일치 시 상한선)")
+
+
+def print_class_breakdown(results: List[TrackerResult], metrics_list: List[dict]):
+    """클래스별 (ripe / unripe 를 따로 매칭) MOTA · IDF1 · IDSW · HOTA 와 HOTA 분해 (DetA · AssA · LocA)"""
+    if not any("HOTA" in m for m in metrics_list):
+        return
+    names = list(CLASS_NAMES.values())
+    print(f"\n{'Tracker':<16} {'HOTA':>6} {'DetA':>6} {'AssA':>6} {'LocA':>6}"
+          + "".join(f" | {n + ' MOTA':>12} {'IDF1':>6} {'IDSW':>5} {'HOTA':>6}" for n in names))
+    for r, m in zip(results, metrics_list):
+        if "HOTA" not in m:
+            continue
+        line = f"{r.name:<16} {m['HOTA']:>6} {m['DetA']:>6} {m['AssA']:>6} {m['LocA']:>6}"
+        for n in names:
+            line += (f" | {str(m.get(f'{n}_MOTA', '-')):>12} {str(m.get(f'{n}_IDF1', '-')):>6} "
+                     f"{str(m.get(f'{n}_IDSW', '-')):>5} {str(m.get(f'{n}_HOTA', '-')):>6}")
+        print(line)
+    print("※ HOTA = √(DetA × AssA), IoU 0.05 … 0.95 평균. 클래스별 열은 그 클래스 GT · 결과끼리만 매칭")
+
+
+def print_tracker_variants(results: List[TrackerResult], metrics_list: List[dict]):
+    """tracker 변형 (--detect-every / --dynamic-roi) 비교. 첫 변형 대비 FPS 배율 · 카운트 차이."""
+    rows = [(r, m) for r, m in zip(results, metrics_list) if r.detect_ratio is not None]
+    if len(rows) < 2:
+        return
+    base_r, base_m = rows[0]
+    print(f"\n{'Variant':<22} {'detect %':>9} {'crop %':>7} {'FPS':>7} {'FPS x':>6} "
+          f"{'count R/U':>10} {'Δcount':>8} {'MOTA':>7} {'IDF1':>7} {'IDSW':>6}")
+    for r, m in rows:
+        speedup = m["fps"] / base_m["fps"] if base_m["fps"] else 0.0
+        counts = f"{r.counts[0]}/{r.counts[1]}"
+        delta = f"{r.counts[0] - base_r.counts[0]:+d}/{r.counts[1] - base_r.counts[1]:+d}"
+        print(f"{r.name:<22} {100.0 * r.detect_ratio:>8.0f}% {100.0 * r.crop_ratio:>6.0f}% "
+              f"{m['fps']:>7.1f} {speedup:>6.2f} {counts:>10} {delta:>8} "
+              f"{str(m.get('MOTA', '-')):>7} {str(m.get('IDF1', '-')):>7} {str(m.get('IDSW', '-')):>6}")
+    print(f"※ {base_r.name} 기준. detect % = YOLO 를 실제로 돌린 프레임 비율, "
+          f"crop % = 검출 크롭 면적 / ROI 면적 (검출 프레임 평균)")
 
 
 def save_summary_csv(results, metrics_list, path: Path):
@@ -412,8 +624,11 @@ def plot_comparison(results: List[TrackerResult], metrics_list: List[dict], out_
         return
 
     has_mot = any("MOTA" in m for m in metrics_list)
+    has_hota = any("HOTA" in m for m in metrics_list)
     ncols   = 4 if has_mot else 3
-    fig, axes = plt.subplots(1, ncols, figsize=(5 * ncols, 5))
+    nrows   = 2 if has_hota else 1
+    fig, axes = plt.subplots(nrows, ncols, figsize=(5 * ncols, 5 * nrows), squeeze=False)
+    axes    = axes.ravel()
     fig.suptitle("Tracker Comparison", fontsize=14, fontweight="bold")
     names   = [r.name for r in results]
     nt_idx  = [i for i, r in enumerate(results) if r.name != "GT"]
@@ -440,6 +655,24 @@ def plot_comparison(results: List[TrackerResult], metrics_list: List[dict], out_
         ax.tick_params(axis="x", rotation=15)
         ax.grid(axis="y", alpha=0.3)
 
+    def _group_bar(ax, series: Dict[str, list], title, ylabel, bar_names):
+        """트래커마다 series (라벨 → 값) 를 나란히 (HOTA 분해 · 클래스별 비교)"""
+        width = 0.8 / len(series)
+        for k, (label, values) in enumerate(series.items()):
+            xs = [i + (k - (len(series) - 1) / 2) * width for i in range(len(bar_names))]
+            bars = ax.bar(xs, values, width=width, color=palette[k % len(palette)], label=label)
+            for bar, val in zip(bars, values):
+                ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height(),
+                        f"{val}", ha="center", va="bottom", fontsize=7)
+        vmax = max((v for values in series.values() for v in values), default=0)
+        ax.set_ylim(0, vmax * 1.25 if vmax > 0 else 1)
+        ax.set_xticks(range(len(bar_names)))
+        ax.set_xticklabels(bar_names, rotation=15)
+        ax.set_title(title)
+        ax.set_ylabel(ylabel)
+        ax.legend(fontsize=8)
+        ax.grid(axis="y", alpha=0.3)
+
     _bar(axes[0], [m["total_ids"] for m in metrics_list],
          "Total Unique IDs\n(↓ fewer = less ID switch)", "# IDs", lower_better=True)
     _bar(axes[1], [m["id_instability"] for m in metrics_list],
@@ -457,6 +690,22 @@ def plot_comparison(results: List[TrackerResult], metrics_list: List[dict], out_
         _bar(axes[3], mota_vals,
              "MOTA (%)\n(↑ higher = better)", "%", lower_better=False,
              bar_names=mota_names)
+    if has_hota:
+        h_idx = [i for i in nt_idx if "HOTA" in metrics_list[i]]
+        h_names = [results[i].name for i in h_idx]
+        cls = list(CLASS_NAMES.values())
+
+        def _series(keys):
+            return {k.split("_")[0]: [metrics_list[i].get(k, 0) for i in h_idx] for k in keys}
+
+        _group_bar(axes[4], _series(["HOTA", "DetA", "AssA", "LocA"]),
+                   "HOTA = √(DetA × AssA) (%)\n(↑ higher = better)", "%", h_names)
+        _group_bar(axes[5], _series([f"{c}_IDF1" for c in cls]),
+                   "IDF1 per class (%)\n(↑ higher = better)", "%", h_names)
+        _group_bar(axes[6], _series([f"{c}_IDSW" for c in cls]),
+                   "ID Switches per class\n(↓ fewer = better)", "# IDSW", h_names)
+        _group_bar(axes[7], _series([f"{c}_HOTA" for c in cls]),
+                   "HOTA per class (%)\n(↑ higher = better)", "%", h_names)
 
     plt.tight_layout()
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -476,7 +725,16 @@ def main():
     parser.add_argument("--trackers", type=str,
                         default="bytetrack,sort,deepsort,tracker",
                         help="실행할 tracker 목록 (comma-separated)")
+    parser.add_argument("--detect-every", type=str, default=None,
+                        help="tracker 검출 주기 목록 (예: 1,2,3,5) → 주기별로 tracker 실행 후 비교")
+    parser.add_argument("--dynamic-roi", action="store_true",
+                        help="tracker 를 동적 ROI off / on 으로 각각 실행 후 비교")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="검출 캐시 없이 트래커마다 YOLO 실행 (YOLO 포함 FPS)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="트래커 · 변형을 N 개 프로세스로 병렬 실행 (1 = 직렬)")
     args = parser.parse_args()
+    t_start = time.perf_counter()
 
     out_dir   = REPO_ROOT / CONFIG["output_dir"]
     mot_dir   = out_dir / "mot"
@@ -484,43 +742,21 @@ def main():
     out_dir.mkdir(parents=True, exist_ok=True)
 
     to_run  = [t.strip() for t in args.trackers.split(",")]
-    results: List[TrackerResult] = []
 
-    # ── ByteTrack ────────────────────────────────────────────
-    if "bytetrack" in to_run:
-        import basic_bytetracker
-        vp = video_dir / "bytetrack.mp4" if CONFIG["save_video"] else None
-        r  = _from_run_result("ByteTrack",
-                               basic_bytetracker.run(_bytetrack_config(vp)))
-        save_mot(r, mot_dir / "bytetrack.txt")
-        results.append(r)
-
-    # ── SORT ─────────────────────────────────────────────────
-    if "sort" in to_run:
-        import basic_sort
-        vp = video_dir / "sort.mp4" if CONFIG["save_video"] else None
-        r  = _from_run_result("SORT",
-                               basic_sort.run(_sort_config(vp)))
-        save_mot(r, mot_dir / "sort.txt")
-        results.append(r)
-
-    # ── DeepSORT ─────────────────────────────────────────────
-    if "deepsort" in to_run:
-        import basic_deepsort
-        vp = video_dir / "deepsort.mp4" if CONFIG["save_video"] else None
-        r  = _from_run_result("DeepSORT",
-                               basic_deepsort.run(_deepsort_config(vp)))
-        save_mot(r, mot_dir / "deepsort.txt")
-        results.append(r)
-
-    # ── tracker (src/tracker.py) ─────────────────────────────
-    if "tracker" in to_run:
-        import tracker
-        vp = video_dir / "tracker.mp4" if CONFIG["save_video"] else None
-        r  = _from_run_result("tracker",
-                               tracker.run_benchmark(_tracker_config(vp)))
-        save_mot(r, mot_dir / "tracker.txt")
-        results.append(r)
+    # ── 검출 캐시: 디코드 + YOLO 한 번 → 모든 트래커 재생 ──────
+    shared = dict(CONFIG_SHARED)
+    if CONFIG.get("use_detection_cache") and not args.no_cache:
+        shared["detection_cache"] = str(prepare_detection_cache(CONFIG))
+
+    # ── 트래커 실행 (ByteTrack / SORT / DeepSORT / tracker 변형) ──
+    detect_every = ([int(t) for t in args.detect_every.split(",")] if args.detect_every
+                    else [TRACKER_RECOMMENDED["tnew_detect_every"]])
+    dynamic_roi  = [False, True] if args.dynamic_roi else [TRACKER_RECOMMENDED["tnew_dynamic_roi"]]
+    jobs = build_jobs(to_run, shared, video_dir, detect_every, dynamic_roi)
+    results = run_jobs(jobs, args.jobs)
+    for job, r in zip(jobs, results):
+        save_mot(r, mot_dir / job["mot"])
+    check_detect_ratio(jobs, results)
 
     if not results:
         print("[ERROR] 실행된 tracker가 없습니다.")
@@ -557,9 +793,13 @@ def main():
 
     # ── 출력 ─────────────────────────────────────────────────
     print_table(results, metrics_list)
+    print_class_breakdown(results, metrics_list)
+    if "tracker" in to_run:
+        print_tracker_variants(results, metrics_list)
     save_summary_csv(results, metrics_list, out_dir / "summary.csv")
     plot_comparison(results, metrics_list, out_dir / "comparison.png")
-    print(f"\n[완료] 결과: {out_dir}")
+    print(f"\n[완료] 결과: {out_dir} (wall {time.perf_counter() - t_start:.1f}s"
+          + (", 검출 캐시 재생)" if "detection_cache" in shared else ", 트래커별 YOLO)"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+여러 레일 카메라 영상 동시 트래킹 (프로세스 풀)
+
+스트림(영상 소스 + 설정) 목록을 받아 스트림마다 워커 프로세스 하나에서
+src/tracker.py run_benchmark 를 실행합니다. 워커마다 StableIdAssigner ·
+클래스별 ByteTrack · YOLO 모델이 따로 생성되므로 스트림끼리 상태를 공유하지 않습니다.
+
+결과:
+  multi_stream/
+    mot/<name>.txt   ─ 스트림별 MOT 행 (benchmark.py 와 같은 형식)
+    summary.csv      ─ 스트림별 프레임 수 · FPS · 카운트 · 고유 ID 수 + 합계 행
+    report.json      ─ 같은 내용 + 실행 설정 (workers, CPU 고정)
+
+사용법:
+  python scripts/trackers/multi_stream.py
+  python scripts/trackers/multi_stream.py --sources cart1.mp4,cart2.mp4,cart3.mp4 --workers 2
+  python scripts/trackers/multi_stream.py --sources cart1.mp4,cart2.mp4 --pin auto --threads 2
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from benchmark import CONFIG_SHARED, TRACKER_RECOMMENDED, _from_run_result, save_mot
+
+# ============================================================
+# 설정
+#   streams   — 스트림별 name / source (+ 덮어쓸 tracker 키, 예: "tnew_roi_half_width")
+#   나머지 키는 모든 스트림 공통 (benchmark.py CONFIG_SHARED + TRACKER_RECOMMENDED 기준)
+# ============================================================
+CONFIG = {
+    "streams": [
+        {"name": "cart1", "source": "notebook/rgb.mp4"},
+    ],
+    "output_dir":  "multi_stream",
+    "save_video":  False,
+
+    # 처리량 제어
+    "max_workers":        None,    # None = min(스트림 수, CPU 수)
+    "cpu_affinity":       None,    # None / "auto" (CPU 를 워커 수로 균등 분할) / [[0, 1], [2, 3], ...]
+    "threads_per_worker": None,    # 워커별 OpenCV · torch 스레드 수 (None = 라이브러리 기본)
+    "start_method":       "spawn", # 워커 프로세스 시작 방식 (spawn / fork / forkserver)
+}
+# ============================================================
+
+
+# ---------------------------------------------------------------------------
+# 워커
+# ---------------------------------------------------------------------------
+
+def _limit_threads(n: Optional[int]):
+    if not n:
+        return
+    import cv2
+    cv2.setNumThreads(n)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(n)
+
+
+def _run_stream(job: dict) -> dict:
+    """워커 프로세스: 스트림 하나 트래킹 (run_benchmark) 후 결과 반환"""
+    if job["cpus"] and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, job["cpus"])
+    _limit_threads(job["threads"])
+
+    import tracker
+
+    t0 = time.perf_counter()
+    result = tracker.run_benchmark(job["config"])
+    result["wall_time"] = time.perf_counter() - t0
+    result["pid"] = os.getpid()
+    return result
+
+
+# ---------------------------------------------------------------------------
+# 실행
+# ---------------------------------------------------------------------------
+
+def _cpu_sets(affinity, workers: int) -> List[Optional[List[int]]]:
+    """워커 번호별 고정할 CPU 목록"""
+    if affinity is None:
+        return [None]
+    if affinity == "auto":
+        if not hasattr(os, "sched_getaffinity"):
+            return [None]
+        cpus = sorted(os.sched_getaffinity(0))
+        k = max(1, len(cpus) // workers)
+        return [cpus[i * k:(i + 1) * k] or cpus for i in range(workers)]
+    return [list(c) for c in affinity]
+
+
+def stream_config(stream: dict, config: dict, video_dir: Optional[Path]) -> dict:
+    """공통 설정 + 스트림 덮어쓰기 → run_benchmark 설정"""
+    overrides = {k: v for k, v in stream.items() if k != "name"}
+    cfg = {**CONFIG_SHARED, **TRACKER_RECOMMENDED, **overrides}
+    cfg["output_path"] = str(video_dir / f"{stream['name']}.mp4") if video_dir else None
+    if not Path(str(cfg["source"])).exists() and not str(cfg["source"]).isdigit():
+        cfg["source"] = str(REPO_ROOT / cfg["source"])
+    return cfg
+
+
+def run_streams(config: dict) -> Dict[str, dict]:
+    """모든 스트림을 프로세스 풀로 실행. {name: run_benchmark 결과 (+ wall_time) 또는 {"error": ...}}"""
+    streams = config["streams"]
+    names = [s["name"] for s in streams]
+    if len(set(names)) != len(names):
+        raise ValueError(f"스트림 name 이 중복됩니다: {names}")
+
+    out_dir = REPO_ROOT / config["output_dir"]
+    video_dir = out_dir / "videos" if config.get("save_video") else None
+    workers = config.get("max_workers") or min(len(streams), os.cpu_count() or 1)
+    cpu_sets = _cpu_sets(config.get("cpu_affinity"), workers)
+
+    jobs = [{
+        "name": s["name"],
+        "config": stream_config(s, config, video_dir),
+        "cpus": cpu_sets[i % len(cpu_sets)],
+        "threads": config.get("threads_per_worker"),
+    } for i, s in enumerate(streams)]
+
+    print(f"[multi] {len(jobs)} streams / {workers} workers "
+          f"(affinity={config.get('cpu_affinity')}, threads={config.get('threads_per_worker')})")
+    results: Dict[str, dict] = {}
+    ctx = mp.get_context(config.get("start_method", "spawn"))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = {pool.submit(_run_stream, job): job["name"] for job in jobs}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                results[name] = fut.result()
+            except Exception as e:   # 한 스트림 실패가 나머지 결과를 막지 않도록
+                print(f"[multi] {name} 실패: {e!r}")
+                results[name] = {"error": repr(e)}
+            else:
+                print(f"[multi] {name} 완료 ({results[name]['total_frames']} frames, "
+                      f"{results[name]['wall_time']:.1f}s)")
+    return {name: results[name] for name in names}
+
+
+# ---------------------------------------------------------------------------
+# 집계
+# ---------------------------------------------------------------------------
+
+SUMMARY_FIELDS = ["stream", "source", "frames", "fps", "wall_s", "ripe_count", "unripe_count",
+                  "ripe_ids", "unripe_ids", "mot_rows", "error"]
+
+
+def summarize(config: dict, results: Dict[str, dict], wall_time: float) -> List[dict]:
+    """스트림별 행 + 합계 행. MOT 행은 스트림별 파일로 저장."""
+    out_dir = REPO_ROOT / config["output_dir"]
+    sources = {s["name"]: s["source"] for s in config["streams"]}
+    rows = []
+    for name, r in results.items():
+        if "error" in r:
+            rows.append({"stream": name, "source": sources[name], "error": r["error"]})
+            continue
+        save_mot(_from_run_result(name, r), out_dir / "mot" / f"{name}.txt")
+        rows.append({
+            "stream":       name,
+            "source":       sources[name],
+            "frames":       r["total_frames"],
+            "fps":          round(r["fps_avg"], 1),
+            "wall_s":       round(r["wall_time"], 2),
+            "ripe_count":   r["counts"][0],
+            "unripe_count": r["counts"][1],
+            "ripe_ids":     len(r["unique_ids"][0]),
+            "unripe_ids":   len(r["unique_ids"][1]),
+            "mot_rows":     len(r["mot_rows"]),
+            "error":        "",
+        })
+
+    ok = [row for row in rows if not row.get("error")]
+    total_frames = sum(row["frames"] for row in ok)
+    rows.append({
+        "stream":       "TOTAL",
+        "source":       f"{len(ok)}/{len(rows)} ok",
+        "frames":       total_frames,
+        "fps":          round(total_frames / wall_time, 1) if wall_time > 0 else 0.0,   # 전체 처리량
+        "wall_s":       round(wall_time, 2),
+        **{k: sum(row[k] for row in ok)
+           for k in ("ripe_count", "unripe_count", "ripe_ids", "unripe_ids", "mot_rows")},
+        "error":        "",
+    })
+    return rows
+
+
+def save_report(config: dict, rows: List[dict]):
+    out_dir = REPO_ROOT / config["output_dir"]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / "summary.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        w.writeheader()
+        w.writerows(rows)
+    report = {
+        "config": {k: v for k, v in config.items() if k != "streams"},
+        "streams": rows[:-1],
+        "total": rows[-1],
+    }
+    with open(out_dir / "report.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[multi] 저장: {out_dir / 'summary.csv'} / report.json")
+
+
+def print_table(rows: List[dict]):
+    print(f"\n{'stream':>10} {'frames':>7} {'fps':>7} {'wall s':>7} {'ripe':>5} {'unripe':>7} "
+          f"{'ids R/U':>9} {'mot':>7}")
+    for row in rows:
+        if row.get("error"):
+            print(f"{row['stream']:>10}  ERROR {row['error']}")
+            continue
+        ids = f"{row['ripe_ids']}/{row['unripe_ids']}"
+        print(f"{row['stream']:>10} {row['frames']:>7} {row['fps']:>7.1f} {row['wall_s']:>7.2f} "
+              f"{row['ripe_count']:>5} {row['unripe_count']:>7} {ids:>9} {row['mot_rows']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-camera tracking (process pool)")
+    parser.add_argument("--sources", type=str, default=None,
+                        help="영상 경로 목록 (comma-separated, 이름은 파일명)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--pin", type=str, default=None,
+                        help='CPU 고정: "auto" 또는 "0-1;2-3" 형식의 워커별 CPU 목록')
+    parser.add_argument("--threads", type=int, default=None, help="워커별 OpenCV·torch 스레드 수")
+    args = parser.parse_args()
+
+    config = dict(CONFIG)
+    if args.sources:
+        config["streams"] = [{"name": Path(s).stem, "source": s}
+                             for s in (t.strip() for t in args.sources.split(",")) if s]
+    if args.workers:
+        config["max_workers"] = args.workers
+    if args.pin:
+        config["cpu_affinity"] = "auto" if args.pin == "auto" else [
+            [c for part in group.split(",")
+             for c in (range(int(part.split("-")[0]), int(part.split("-")[-1]) + 1))]
+            for group in args.pin.split(";")
+        ]
+    if args.threads:
+        config["threads_per_worker"] = args.threads
+
+    t0 = time.perf_counter()
+    results = run_streams(config)
+    rows = summarize(config, results, time.perf_counter() - t0)
+    print_table(rows)
+    save_report(config, rows)
+
+
+if __name__ == "__main__":
+    main()
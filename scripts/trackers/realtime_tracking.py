@@ -22,6 +22,12 @@ CONFIG = {
     "output_path": "notebook/output_bytetrack_new.mp4",              # 출력 영상 파일 경로
     "show_window": True,              # 창 표시 여부
     "save_results": None,             # 결과 저장 경로 (예: "out/result")
+    "prefetch_frames": 4,             # 백그라운드 디코드 큐 크기 (0 = 직렬 cap.read)
+    "pipelined": True,                # 모션·검출·ID·시각화·인코딩 스테이지 스레드 병렬 (결과 동일)
+    "encode_policy": "block",         # 영상 저장 큐가 찼을 때: block / drop_oldest / every_nth
+    "encode_every_n": 1,              # every_nth 일 때 N
+    "snapshot_dir": None,             # 시각화 프레임 JPG 저장 폴더 (None=저장 안 함)
+    "snapshot_every": 0,              # 스냅샷 간격 (프레임). 창·영상·스냅샷 모두 없으면 시각화 생략 (headless)
     
     # Detection
     "conf": 0.5,              # 검출 신뢰도 (낮춰서 miss 감소)
@@ -80,6 +86,19 @@ CONFIG = {
     "motion_ransac_reproj_threshold": 1.0,
     "trace_length": 80,
 
+    # 적응형 검출 주기 (레일 이동이 느리고 일정할 때 YOLO 호출 절감)
+    # 건너뛴 프레임은 직전 검출 박스를 카메라 변환으로 옮겨 ByteTrack · ID 할당에 사용
+    "detect_every": 1,                   # 최대 K 프레임마다 검출 (1 = 매 프레임)
+    "detect_motion_threshold": 40.0,     # 마지막 검출 후 누적 이동 (px) 이 넘으면 바로 검출
+    "detect_uncertainty_threshold": 0.5, # 신규·미매칭 검출 비율이 넘으면 다음 프레임도 검출
+
+    # 동적 ROI: 방향이 안정되면 검출 크롭을 입구 쪽 (입구 라인 + margin) 으로 좁힘
+    # 카운팅 라인 · ID 할당 ROI 는 그대로, 방향이 UNKNOWN 이 되면 전체 ROI 로 복귀
+    "dynamic_roi": False,
+    "dynamic_roi_margin": 150,           # 입구 라인 너머로 더 검출할 폭 (px)
+    "dynamic_roi_stable_frames": 30,     # 같은 방향이 이만큼 이어져야 좁힘
+    "dynamic_roi_probe_every": 60,       # 좁힌 동안에도 이 주기마다 잠깐 전체 ROI 로 방향 재확인
+
     # 군집 내 순서 제약 (실내 환경 전용)
     # 같은 클래스의 토마토 x좌표 순서가 프레임 간 보존되는지 검증
     # 바람 없는 실내에서 물리적 순서는 불변 → ID swap 방지
@@ -90,7 +109,7 @@ CONFIG = {
 }
 # ============================================================
 
-# CONFIG를 tracker 모듈에 주입
+# CONFIG를 tracker 모듈에 주입 (기존 방식 호환용, run 에는 TrackerConfig 를 직접 전달)
 tracker.CONFIG = CONFIG
 
 
@@ -103,6 +122,13 @@ def main():
         output_path=CONFIG["output_path"],
         show_window=CONFIG["show_window"],
         save_results=CONFIG["save_results"],
+        config=tracker.TrackerConfig.from_dict(CONFIG),
+        prefetch=CONFIG["prefetch_frames"],
+        pipelined=CONFIG["pipelined"],
+        encode_policy=CONFIG["encode_policy"],
+        encode_every_n=CONFIG["encode_every_n"],
+        snapshot_dir=CONFIG["snapshot_dir"],
+        snapshot_every=CONFIG["snapshot_every"],
     )
 
 
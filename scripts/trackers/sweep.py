@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""
+tracker 파라미터 스윕 (검출 캐시 재생, GT 기준 MOTA · IDF1 · IDSW 순위)
+
+benchmark.py TRACKER_RECOMMENDED 의 tnew_* 키 조합을 grid / random / successive halving 으로 탐색합니다.
+  1. 검출 캐시 (benchmark.py 와 같은 det_cache/<key>.npz) — YOLO 는 처음 한 번만
+  2. 트랙 재생 파일 (det_cache/tracks_<key>.npz) — 기준 설정으로 ByteTrack · 카메라 모션 추정을 한 번 돌린 결과
+  3. 조합마다 재생 파일 위에서 StableIdAssigner · LineCounter 만 다시 실행 (프로세스 풀)
+     → GT 와 비교해 MOTA · IDF1 · IDSW, rank_by 순으로 정렬
+
+스윕 가능한 키 = StableIdAssigner · LineCounter 만 읽는 tnew_* (SEARCH_SPACE 에 넣을 수 있는 키).
+검출 · ByteTrack · 모션 추정 입력을 바꾸는 키 (byte_* / tnew_roi_half_width / tnew_motion_* 추정 파라미터 /
+tnew_detect_* / tnew_dynamic_roi*) 는 재생할 수 없으므로 benchmark.py 로 비교합니다.
+
+결과 (output_dir):
+  results.csv   ─ 순위 · 프레임 수 · 조합 · MOTA · IDF1 · IDSW · HOTA · DetA · AssA · Recall · Prec · FP · FN · 카운트
+  best.json     ─ 1위 조합 (TRACKER_RECOMMENDED 에 덮어쓸 키) + 지표
+
+사용법:
+  python scripts/trackers/sweep.py --gt tracking_result/gt_mot.csv
+  python scripts/trackers/sweep.py --method random --trials 200 --jobs 8
+  python scripts/trackers/sweep.py --method halving --trials 243 --eta 3
+  python scripts/trackers/sweep.py --space tnew_reid_weight=0,0.2,0.4 --space tnew_use_reid=true,false
+
+successive halving:
+  trials 개 조합을 앞쪽 일부 프레임으로 평가 → 상위 1/eta 만 남기고 프레임을 eta 배로 → ... → 마지막 라운드는 전체 영상.
+  results.csv 는 전체 영상까지 살아남은 조합이 위, 중간에 떨어진 조합은 평가한 프레임 수와 함께 아래.
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import supervision as sv
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from benchmark import (CONFIG_SHARED, TRACKER_RECOMMENDED, _from_run_result, _repo_path,
+                       _tracker_config, mot_metrics, prepare_detection_cache, resolve_gt_path)
+from detection_cache import DetectionCache
+from tracker import (FrameResult, LineCounter, MotRecorder, SessionObserver, TrackerConfig,
+                     TrackingSession, _centered_roi)
+from video_io import FramePrefetcher
+
+# ============================================================
+# 설정
+#   SEARCH_SPACE — 스윕할 TRACKER_RECOMMENDED 키 → 후보 값 목록 (나머지 키는 TRACKER_RECOMMENDED 그대로)
+# ============================================================
+CONFIG = {
+    "gt":           "tracking_result/gt_mot.csv",
+    "output_dir":   "benchmark/sweep",
+    "method":       "grid",      # grid / random / halving
+    "trials":       100,         # random · halving 조합 수 (grid 는 전체 조합)
+    "seed":         0,
+    "eta":          3,           # halving: 라운드마다 상위 1/eta 만 남기고 프레임 수 eta 배
+    "jobs":         None,        # 워커 프로세스 수 (None = CPU 수)
+    "start_method": "spawn",     # 워커 프로세스 시작 방식 (spawn / fork / forkserver)
+    "rank_by":      ["IDF1", "MOTA", "-IDSW"],   # 정렬 기준 (앞이 우선, "-" = 작을수록 좋음, "HOTA" 도 가능)
+    "top":          15,          # 출력할 상위 조합 수
+}
+
+SEARCH_SPACE = {
+    "tnew_reid_weight":           [0.0, 0.15, 0.3, 0.45, 0.6],
+    "tnew_reid_threshold":        [0.35, 0.5, 0.65],
+    "tnew_center_max_dist":       [120, 160, 200, 260],
+    "tnew_lost_buffer_frames":    [10, 20, 40],
+    "tnew_lost_buffer_uncounted": [60, 100, 150, 220],
+}
+# ============================================================
+
+# 검출 · ByteTrack · 모션 추정 입력을 바꾸는 키 (재생 파일 키에 포함, 스윕 불가)
+UPSTREAM_KEYS = (
+    "byte_track_activation_threshold", "byte_minimum_matching_threshold", "byte_lost_track_buffer",
+    "tnew_roi_half_width",
+    "tnew_motion_max_points", "tnew_motion_min_distance", "tnew_motion_block_size",
+    "tnew_motion_quality_level", "tnew_motion_ransac_reproj_threshold",
+    "tnew_detect_every", "tnew_detect_motion_threshold", "tnew_detect_uncertainty_threshold",
+    "tnew_dynamic_roi", "tnew_dynamic_roi_margin", "tnew_dynamic_roi_stable_frames",
+    "tnew_dynamic_roi_probe_every",
+)
+# 결과에 영향 없는 키 (시각화 전용)
+IGNORED_KEYS = ("tnew_trace_length",)
+
+METRIC_COLS = ["MOTA", "IDF1", "IDSW", "HOTA", "DetA", "AssA", "Recall", "Prec", "FP", "FN",
+               "ripe_count", "unripe_count", "total_ids", "time_s"]
+
+
+# ---------------------------------------------------------------------------
+# 트랙 재생 (ByteTrack 출력 + 카메라 변환, 기준 설정으로 한 번)
+# ---------------------------------------------------------------------------
+
+class _ReplayRecorder(SessionObserver):
+    """assign 직전 입력 (ByteTrack 통과 검출 · ByteTrack ID · 프레임 간 카메라 변환) 을 프레임별로 모음"""
+
+    def __init__(self):
+        self.frames: List[tuple] = []
+
+    def on_frame(self, session: TrackingSession, result: FrameResult):
+        dets = result.dets
+        self.frames.append((dets.xyxy, dets.confidence, dets.class_id,
+                            result.bytetrack_ids, result.frame_motion))
+
+
+class TrackReplay:
+    """프레임별 클래스별 ByteTrack 출력 (xyxy / confidence / class_id / tracker_id) + 카메라 변환.
+
+    DetectionCache 와 같은 이어 붙인 배열 + offsets 형식. transforms 는 (F, 3, 3) 프레임 간 변환
+    (FrameResult.frame_motion), tf_rows 는 프레임별 변환 행 수 (0 = 변환 없음, 2 = affine, 3 = homography).
+    """
+
+    def __init__(self, xyxy: np.ndarray, confidence: np.ndarray, class_id: np.ndarray,
+                 tracker_id: np.ndarray, offsets: np.ndarray, transforms: np.ndarray,
+                 tf_rows: np.ndarray, meta: Optional[Dict] = None):
+        self.xyxy = xyxy
+        self.confidence = confidence
+        self.class_id = class_id
+        self.tracker_id = tracker_id
+        self.offsets = offsets
+        self.transforms = transforms
+        self.tf_rows = tf_rows
+        self.meta: Dict = dict(meta or {})
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def roi(self) -> Optional[Tuple[int, int, int, int]]:
+        roi = self.meta.get("roi")
+        return tuple(roi) if roi is not None else None
+
+    @classmethod
+    def record(cls, config: dict) -> "TrackReplay":
+        """run_benchmark 와 같은 세션 (검출 캐시 재생) 을 돌리며 assign 직전 입력을 모음"""
+        cfg   = TrackerConfig.from_benchmark(config)
+        cache = DetectionCache.load(config["detection_cache"])
+        cap   = cv2.VideoCapture(str(_repo_path(config["source"])))
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open: {config['source']}")
+        w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps  = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        roi  = _centered_roi(w, h, config.get("tnew_roi_half_width", 320))
+        cache.check(w, h, roi)
+
+        recorder = _ReplayRecorder()
+        session  = TrackingSession(cfg, roi, fps=fps, observers=[recorder], cache=cache)
+        reader   = FramePrefetcher(cap, config.get("prefetch_frames", 4))
+        t0 = time.perf_counter()
+        try:
+            while True:
+                ret, frame = reader.read()
+                if not ret:
+                    break
+                session.step(frame)
+        finally:
+            reader.release()
+            session.close()
+
+        n_frames = len(recorder.frames)
+        counts = [0] + [len(f[0]) for f in recorder.frames]
+        transforms = np.zeros((n_frames, 3, 3), dtype=np.float64)
+        tf_rows = np.zeros(n_frames, dtype=np.int8)
+        for i, (_, _, _, _, tf) in enumerate(recorder.frames):
+            if isinstance(tf, np.ndarray):
+                transforms[i, :tf.shape[0]] = tf
+                tf_rows[i] = tf.shape[0]
+
+        def _cat(idx: int, dtype, width: Optional[int] = None) -> np.ndarray:
+            parts = [np.asarray(f[idx], dtype=dtype) for f in recorder.frames if len(f[0])]
+            if parts:
+                return np.concatenate(parts)
+            return np.empty((0, width) if width else 0, dtype=dtype)
+
+        return cls(
+            xyxy=_cat(0, np.float32, 4),
+            confidence=_cat(1, np.float32),
+            class_id=_cat(2, np.int16),
+            tracker_id=_cat(3, np.int64),
+            offsets=np.cumsum(counts, dtype=np.int64),
+            transforms=transforms,
+            tf_rows=tf_rows,
+            meta={"source": str(config["source"]), "roi": list(roi) if roi else None,
+                  "width": w, "height": h, "fps": fps,
+                  "record_s": round(time.perf_counter() - t0, 2)},
+        )
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez_compressed(tmp, xyxy=self.xyxy, confidence=self.confidence, class_id=self.class_id,
+                            tracker_id=self.tracker_id, offsets=self.offsets,
+                            transforms=self.transforms, tf_rows=self.tf_rows,
+                            meta=np.array(json.dumps(self.meta)))
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path) -> "TrackReplay":
+        with np.load(str(path), allow_pickle=False) as z:
+            return cls(z["xyxy"], z["confidence"], z["class_id"], z["tracker_id"], z["offsets"],
+                       z["transforms"], z["tf_rows"], json.loads(str(z["meta"])))
+
+    def frame(self, i: int):
+        """i 번째 프레임 (0부터) → (sv.Detections with tracker_id, 카메라 변환 or None)"""
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        rows = int(self.tf_rows[i])
+        tf = self.transforms[i, :rows].copy() if rows else None
+        if lo == hi:
+            return sv.Detections.empty(), tf
+        dets = sv.Detections(
+            xyxy=self.xyxy[lo:hi].copy(),
+            confidence=self.confidence[lo:hi].copy(),
+            class_id=self.class_id[lo:hi].astype(int),
+            tracker_id=self.tracker_id[lo:hi].astype(int),
+        )
+        return dets, tf
+
+    def format_stats(self) -> str:
+        return (f"track replay: {len(self)} frames, {len(self.xyxy)} tracked dets, "
+                f"record {self.meta.get('record_s', '?')}s")
+
+
+def replay_key(config: dict) -> str:
+    """검출 캐시 키 + 검출 · ByteTrack · 모션 추정 설정이 같으면 같은 키"""
+    parts = {"detection_cache": Path(config["detection_cache"]).stem,
+             **{k: config.get(k) for k in UPSTREAM_KEYS},
+             "tnew_motion_compensation": config.get("tnew_motion_compensation"),
+             "transforms": "frame_motion"}   # 저장 형식 (예전 파일은 누적 변환을 버려 변환이 비어 있음)
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def prepare_track_replay(config: dict) -> Path:
+    """기준 설정의 트랙 재생 파일 경로. 없으면 한 번 돌려서 저장."""
+    path = REPO_ROOT / config["cache_dir"] / f"tracks_{replay_key(config)}.npz"
+    if path.is_file():
+        print(f"[sweep] 트랙 재생 재사용: {path}")
+        return path
+    print("[sweep] 트랙 재생 생성 (ByteTrack · 모션 추정 한 번)...")
+    replay = TrackReplay.record(config)
+    replay.save(path)
+    print(f"[sweep] {replay.format_stats()} → {path}")
+    return path
+
+
+class ReplaySession(TrackingSession):
+    """begin / detect 를 TrackReplay 재생으로 바꾼 TrackingSession (assign 이후는 run_benchmark 와 같음)"""
+
+    def __init__(self, cfg: TrackerConfig, replay: TrackReplay, observers=()):
+        # 검출은 replay 가 대신하므로 model 자리는 쓰이지 않음
+        super().__init__(cfg, replay.roi, model=replay, fps=replay.meta.get("fps", 30.0),
+                         observers=observers)
+        self.replay = replay
+        self.motion_estimator = None
+        self.scheduler = None
+        self.directional_roi = None
+
+    def begin(self, frame: Optional[np.ndarray]) -> FrameResult:
+        t0 = time.perf_counter()
+        result = FrameResult(frame_idx=self._next_idx, frame=frame)
+        result.dets, result.frame_motion = self.replay.frame(self._next_idx)
+        self._next_idx += 1
+        self._timed(result, "motion", t0)
+        return result
+
+    def detect(self, result: FrameResult) -> FrameResult:
+        dets = result.dets
+        result.bytetrack_ids = dets.tracker_id.copy() if dets.tracker_id is not None else None
+        return result
+
+
+# ---------------------------------------------------------------------------
+# 조합 하나 평가 (워커 프로세스)
+# ---------------------------------------------------------------------------
+
+_worker: Dict = {}
+
+
+def _init_worker(replay_path: str, base: dict, gt_path: str, threads: Optional[int]):
+    """워커 시작 시 재생 파일 · 기준 설정을 한 번만 로드"""
+    if threads:
+        from multi_stream import _limit_threads
+        _limit_threads(threads)
+    _worker.clear()
+    _worker.update(replay=TrackReplay.load(replay_path), base=base, gt=gt_path)
+
+
+def replay_run(config: dict, replay: TrackReplay, max_frames: Optional[int] = None) -> dict:
+    """재생 파일로 tracker 한 번 실행 → run_benchmark 와 같은 형식의 결과"""
+    cfg = TrackerConfig.from_benchmark(config)
+    counter, recorder = LineCounter(cfg, replay.roi, mark_counted=False), MotRecorder()
+    session = ReplaySession(cfg, replay, [counter, recorder])
+    n = len(replay) if max_frames is None else min(max_frames, len(replay))
+
+    # ReID 를 쓸 때만 디코드 (히스토그램 특징은 프레임 픽셀이 필요)
+    reader = None
+    if cfg.use_reid:
+        cap = cv2.VideoCapture(str(_repo_path(config["source"])))
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open: {config['source']}")
+        reader = FramePrefetcher(cap, config.get("prefetch_frames", 4))
+    t0 = time.perf_counter()
+    try:
+        for _ in range(n):
+            frame = None
+            if reader is not None:
+                ret, frame = reader.read()
+                if not ret:
+                    break
+            session.step(frame)
+    finally:
+        if reader is not None:
+            reader.release()
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "mot_rows":     recorder.rows,
+        "fps_avg":      session.frames / elapsed if elapsed > 0 else 0.0,
+        "total_frames": session.frames,
+        "unique_ids":   recorder.seen_ids,
+        "counts":       {0: counter.count_ripe, 1: counter.count_unripe},
+    }
+
+
+def _run_trial(overrides: dict, max_frames: Optional[int]) -> dict:
+    t0 = time.perf_counter()
+    result = _from_run_result("sweep", replay_run({**_worker["base"], **overrides},
+                                                  _worker["replay"], max_frames))
+    metrics = mot_metrics(result, _worker["gt"], max_frame=result.total_frames, per_class=False) or {}
+    metrics.update(
+        ripe_count=result.counts[0],
+        unripe_count=result.counts[1],
+        total_ids=len(result.unique_ids[0]) + len(result.unique_ids[1]),
+        time_s=round(time.perf_counter() - t0, 2),
+        frames=result.total_frames,
+    )
+    return metrics
+
+
+# ---------------------------------------------------------------------------
+# 탐색 (grid / random / successive halving)
+# ---------------------------------------------------------------------------
+
+def check_space(space: Dict[str, list], base: dict):
+    for key, values in space.items():
+        if key not in TRACKER_RECOMMENDED:
+            raise ValueError(f"TRACKER_RECOMMENDED 에 없는 키: {key}")
+        if key in UPSTREAM_KEYS or key in IGNORED_KEYS:
+            raise ValueError(f"{key} 는 검출 · ByteTrack 입력을 바꾸거나 결과와 무관해 재생으로 스윕할 수 없습니다 "
+                             f"(benchmark.py 로 비교)")
+        if not values:
+            raise ValueError(f"{key}: 후보 값이 없습니다")
+    if True in space.get("tnew_motion_compensation", []) and not base.get("tnew_motion_compensation"):
+        raise ValueError("tnew_motion_compensation=True 를 스윕하려면 기준 설정에서 켜야 합니다 "
+                         "(재생 파일에 카메라 변환이 있어야 함)")
+
+
+def grid_size(space: Dict[str, list]) -> int:
+    return int(np.prod([len(v) for v in space.values()])) if space else 1
+
+
+def sample_space(space: Dict[str, list], method: str, trials: int, seed: int) -> List[dict]:
+    """grid = 전체 조합, random / halving = 전체 조합 중 trials 개 (중복 없이, seed 고정)"""
+    keys = list(space)
+    size = grid_size(space)
+    if method == "grid" or trials >= size:
+        return [dict(zip(keys, combo)) for combo in itertools.product(*(space[k] for k in keys))]
+    rng = np.random.default_rng(seed)
+    picks = np.sort(rng.choice(size, size=trials, replace=False))
+    idx = np.unravel_index(picks, [len(space[k]) for k in keys])
+    return [{k: space[k][int(idx[d][t])] for d, k in enumerate(keys)} for t in range(trials)]
+
+
+def rank_key(metrics: dict, rank_by: List[str]) -> tuple:
+    """정렬 키 (작을수록 상위). 지표가 없으면 맨 뒤."""
+    key = []
+    for name in rank_by:
+        sign = 1.0 if name.startswith("-") else -1.0
+        v = metrics.get(name.lstrip("-"))
+        key.append(sign * float(v) if v is not None else float("inf"))
+    return tuple(key)
+
+
+class TrialRunner:
+    """조합 목록을 (프로세스 풀에서) 평가. jobs <= 1 이면 현재 프로세스에서."""
+
+    def __init__(self, replay_path: Path, base: dict, gt_path: Path, jobs: int, start_method: str):
+        self.jobs = jobs
+        initargs = (str(replay_path), base, str(gt_path), 1 if jobs > 1 else None)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        if jobs > 1:
+            self.pool = ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context(start_method),
+                                            initializer=_init_worker, initargs=initargs)
+        else:
+            _init_worker(*initargs)
+        self.done = 0
+
+    def evaluate(self, trials: List[dict], max_frames: Optional[int], label: str) -> List[dict]:
+        """trials 순서대로 지표 dict"""
+        out: List[Optional[dict]] = [None] * len(trials)
+        t0 = time.perf_counter()
+
+        def _progress(i: int):
+            m = out[i]
+            k = sum(o is not None for o in out)
+            eta = (time.perf_counter() - t0) / k * (len(trials) - k)
+            print(f"[sweep] {label} {k}/{len(trials)} IDF1={m.get('IDF1', '-')} MOTA={m.get('MOTA', '-')} "
+                  f"IDSW={m.get('IDSW', '-')} | 남은 시간 ~{eta:.0f}s")
+
+        if self.pool is None:
+            for i, overrides in enumerate(trials):
+                out[i] = _run_trial(overrides, max_frames)
+                _progress(i)
+        else:
+            futures = {self.pool.submit(_run_trial, overrides, max_frames): i
+                       for i, overrides in enumerate(trials)}
+            for f in as_completed(futures):
+                i = futures[f]
+                out[i] = f.result()
+                _progress(i)
+        self.done += len(trials)
+        return out
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def successive_halving(runner: TrialRunner, trials: List[dict], total_frames: int,
+                       eta: int, rank_by: List[str]) -> List[dict]:
+    """라운드마다 상위 1/eta 만 남기고 프레임 수 eta 배. 마지막 라운드 = 전체 영상."""
+    rounds = max(1, math.ceil(math.log(len(trials), eta))) if len(trials) > 1 else 1
+    alive = list(range(len(trials)))
+    latest: Dict[int, dict] = {}
+    for r in range(rounds):
+        frames = max(1, total_frames // eta ** (rounds - 1 - r))
+        label = f"round {r + 1}/{rounds} ({len(alive)} configs × {frames} frames)"
+        print(f"\n[sweep] {label}")
+        metrics = runner.evaluate([trials[i] for i in alive], frames if frames < total_frames else None, label)
+        for i, m in zip(alive, metrics):
+            latest[i] = m
+        if r < rounds - 1:
+            alive.sort(key=lambda i: rank_key(latest[i], rank_by))
+            alive = sorted(alive[:max(1, math.ceil(len(alive) / eta))])
+    return [latest[i] for i in range(len(trials))]
+
+
+# ---------------------------------------------------------------------------
+# 결과
+# ---------------------------------------------------------------------------
+
+def rank_rows(trials: List[dict], metrics: List[dict], rank_by: List[str]) -> List[dict]:
+    """평가 프레임 수 많은 순 → rank_by 순. row: trial 번호 · overrides · 지표"""
+    rows = [{"trial": i, "overrides": t, **m} for i, (t, m) in enumerate(zip(trials, metrics))]
+    rows.sort(key=lambda r: (-r["frames"],) + rank_key(r, rank_by))
+    for rank, r in enumerate(rows, 1):
+        r["rank"] = rank
+    return rows
+
+
+def _fmt(v) -> str:
+    return f"{v:g}" if isinstance(v, float) else str(v)
+
+
+def print_ranking(rows: List[dict], base_metrics: dict, space: Dict[str, list], top: int):
+    keys = list(space)
+    short = [k.replace("tnew_", "") for k in keys]
+    head = f"{'rank':>4} {'frames':>6} " + " ".join(f"{s:>{max(len(s), 6)}}" for s in short)
+    head += f" {'MOTA':>6} {'IDF1':>6} {'IDSW':>5} {'HOTA':>6} {'R/U count':>10}"
+    print("\n" + head)
+    print("-" * len(head))
+
+    def _line(rank, values: dict, m: dict) -> str:
+        return (f"{rank:>4} {m['frames']:>6} "
+                + " ".join(f"{_fmt(values[k]):>{max(len(s), 6)}}" for k, s in zip(keys, short))
+                + f" {_fmt(m.get('MOTA', '-')):>6} {_fmt(m.get('IDF1', '-')):>6} {_fmt(m.get('IDSW', '-')):>5}"
+                + f" {_fmt(m.get('HOTA', '-')):>6} {str(m['ripe_count']) + '/' + str(m['unripe_count']):>10}")
+
+    print(_line("base", TRACKER_RECOMMENDED, base_metrics))
+    for r in rows[:top]:
+        print(_line(r["rank"], r["overrides"], r))
+    print(f"※ {len(rows)}개 조합 중 상위 {min(top, len(rows))}개, base = TRACKER_RECOMMENDED")
+
+
+def save_results(rows: List[dict], space: Dict[str, list], base_metrics: dict, out_dir: Path,
+                 meta: dict):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    keys = list(space)
+    path = out_dir / "results.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "trial", "frames"] + keys + METRIC_COLS)
+        writer.writerow(["base", "", base_metrics["frames"]] + [TRACKER_RECOMMENDED[k] for k in keys]
+                        + [base_metrics.get(c, "") for c in METRIC_COLS])
+        for r in rows:
+            writer.writerow([r["rank"], r["trial"], r["frames"]] + [r["overrides"][k] for k in keys]
+                            + [r.get(c, "") for c in METRIC_COLS])
+    print(f"\n[저장] {path}")
+
+    best = rows[0]
+    with open(out_dir / "best.json", "w", encoding="utf-8") as f:
+        json.dump({"overrides": best["overrides"],
+                   "metrics": {c: best.get(c) for c in METRIC_COLS},
+                   "base_metrics": {c: base_metrics.get(c) for c in METRIC_COLS},
+                   **meta}, f, ensure_ascii=False, indent=2)
+    print(f"[저장] {out_dir / 'best.json'}")
+
+
+# ---------------------------------------------------------------------------
+# main
+# ---------------------------------------------------------------------------
+
+def _parse_value(text: str):
+    low = text.strip().lower()
+    if low in ("true", "false"):
+        return low == "true"
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text.strip()
+
+
+def parse_space(items: Optional[List[str]]) -> Dict[str, list]:
+    """--space key=v1,v2 (여러 번) → SEARCH_SPACE. 없으면 SEARCH_SPACE 그대로."""
+    if not items:
+        return dict(SEARCH_SPACE)
+    space = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        space[key.strip()] = [_parse_value(v) for v in values.split(",") if v.strip()]
+    return space
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tracker parameter sweep over cached detections")
+    parser.add_argument("--gt", type=str, default=CONFIG["gt"], help="GT MOT 파일")
+    parser.add_argument("--method", choices=("grid", "random", "halving"), default=CONFIG["method"])
+    parser.add_argument("--trials", type=int, default=CONFIG["trials"],
+                        help="random · halving 조합 수 (grid 는 전체)")
+    parser.add_argument("--eta", type=int, default=CONFIG["eta"], help="halving 감소 비율")
+    parser.add_argument("--seed", type=int, default=CONFIG["seed"])
+    parser.add_argument("--jobs", type=int, default=CONFIG["jobs"], help="워커 프로세스 수 (기본 CPU 수)")
+    parser.add_argument("--space", action="append", default=None,
+                        help="스윕 키=후보,후보,... (여러 번 지정, 없으면 SEARCH_SPACE)")
+    args = parser.parse_args()
+    if args.eta < 2:
+        parser.error("--eta 는 2 이상")
+    t_start = time.perf_counter()
+
+    gt_path = resolve_gt_path(args.gt)
+    space = parse_space(args.space)
+    shared = {**CONFIG_SHARED, "detection_cache": str(prepare_detection_cache(CONFIG_SHARED))}
+    base = _tracker_config(None, shared=shared)
+    if "detection_cache" not in base:
+        raise SystemExit("[ERROR] tnew_roi_half_width ≠ roi_half_width → 검출 캐시를 재생할 수 없습니다")
+    check_space(space, base)
+
+    replay_path = prepare_track_replay(base)
+    replay = TrackReplay.load(replay_path)
+    trials = sample_space(space, args.method, args.trials, args.seed)
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(trials)))
+    print(f"[sweep] {args.method}: {len(trials)}개 조합 (전체 {grid_size(space)}) / {len(replay)} frames / "
+          f"{jobs} workers | rank_by={CONFIG['rank_by']}")
+
+    runner = TrialRunner(replay_path, base, gt_path, jobs, CONFIG["start_method"])
+    try:
+        base_metrics = runner.evaluate([{}], None, "base")[0]
+        if args.method == "halving":
+            metrics = successive_halving(runner, trials, len(replay), args.eta, CONFIG["rank_by"])
+        else:
+            metrics = runner.evaluate(trials, None, args.method)
+    finally:
+        runner.close()
+
+    rows = rank_rows(trials, metrics, CONFIG["rank_by"])
+    print_ranking(rows, base_metrics, space, CONFIG["top"])
+    save_results(rows, space, base_metrics, REPO_ROOT / CONFIG["output_dir"], meta={
+        "method": args.method, "trials": len(trials), "evaluations": runner.done,
+        "rank_by": CONFIG["rank_by"], "gt": str(args.gt), "space": space,
+    })
+    print(f"\n[sweep] 완료 | 평가 {runner.done}회 | {time.perf_counter() - t_start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+asyncio 트래킹 API
+
+이벤트 루프를 막지 않고 프레임별 트래킹 결과를 받는 async generator.
+디코딩은 FramePrefetcher + 디코드 전용 스레드, 검출 · ByteTrack · ID 할당 · 카운팅은
+추론 전용 스레드 1개에서 실행한다 (StableIdAssigner 상태는 그 스레드에만 있음).
+
+사용법:
+  from contextlib import aclosing
+
+  async with aclosing(track_stream("notebook/rgb.mp4", TrackerConfig())) as events:
+      async for ev in events:
+          print(ev.frame_idx, ev.count_ripe, ev.count_unripe, ev.direction)
+
+  - 중간에 break 하거나 태스크가 취소되면 진행 중인 프레임 처리가 끝난 뒤
+    VideoCapture 와 출력 영상이 닫힌다 (aclosing 을 쓰면 즉시, 아니면 generator 정리 시점)
+  - 영상 창 · CSV/JSON 저장은 하지 않는다 (필요하면 이벤트를 받아서 처리)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from yolo_broker import InferenceBroker
+from tracker import (LineCounter, TrackerConfig, TrackingSession, TrackOverlay, VideoSink,
+                     _centered_roi, _default_model_path)
+from video_io import AsyncVideoWriter, FramePrefetcher, PrefetchedFrame
+
+
+@dataclass(frozen=True)
+class TrackEvent:
+    """프레임 하나의 트래킹 결과 (배열 행 순서는 모두 같은 검출)"""
+    frame_idx: int                  # 0부터
+    timestamp_ms: Optional[float]   # 영상 내 위치 (CAP_PROP_POS_MSEC)
+    xyxy: np.ndarray                # (N, 4) 전역 좌표
+    class_id: np.ndarray            # (N,)
+    confidence: np.ndarray          # (N,)
+    stable_ids: np.ndarray          # (N,) -1 = 아직 ID 없음
+    count_ripe: int                 # 누적 입구 라인 통과 수
+    count_unripe: int
+    direction: str                  # "L2R" / "R2L" / "UNKNOWN"
+
+    @property
+    def counts(self) -> Dict[int, int]:
+        return {0: self.count_ripe, 1: self.count_unripe}
+
+
+async def track_stream(
+    source,
+    config: Optional[TrackerConfig] = None,
+    *,
+    model_path: Optional[str] = None,
+    roi_half_width: Optional[int] = 320,
+    output_path: Optional[str] = None,
+    prefetch: int = 4,
+    broker: Optional[InferenceBroker] = None,
+    encode_policy: str = "block",
+) -> AsyncIterator[TrackEvent]:
+    """
+    영상 소스를 트래킹하며 프레임마다 TrackEvent 를 yield
+
+    Args:
+        source:         영상 소스 (0=웹캠, 파일 경로, 스트림 URL)
+        config:         트래커 설정 (None=TrackerConfig 기본값)
+        model_path:     YOLO 모델 경로 (None=기본)
+        roi_half_width: ROI 반폭 픽셀 (None=전체 프레임)
+        output_path:    박스 · ID 를 그린 영상 저장 경로 (None=저장 안 함)
+        prefetch:       백그라운드 디코드 큐 크기
+        broker:         여러 스트림이 공유하는 InferenceBroker (있으면 모델을 로드하지 않음)
+        encode_policy:  영상 저장 큐가 찼을 때 정책 (block / drop_oldest / every_nth)
+    """
+    cfg = config if config is not None else TrackerConfig()
+    if model_path is None:
+        model_path = _default_model_path()
+
+    loop = asyncio.get_running_loop()
+    decode_pool = ThreadPoolExecutor(1, thread_name_prefix="track_stream-decode")
+    infer_pool  = ThreadPoolExecutor(1, thread_name_prefix="track_stream-infer")
+    reader: Optional[FramePrefetcher] = None
+    session: Optional[TrackingSession] = None
+
+    try:
+        cap = await loop.run_in_executor(
+            decode_pool, cv2.VideoCapture, int(source) if str(source).isdigit() else source
+        )
+        if not cap.isOpened():
+            cap.release()
+            raise RuntimeError(f"Cannot open: {source}")
+        w   = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        h   = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        reader = FramePrefetcher(cap, prefetch, timestamps="pos_msec")
+
+        roi = _centered_roi(w, h, roi_half_width)
+
+        model = None
+        if broker is None:
+            model = await loop.run_in_executor(infer_pool, YOLO, model_path)
+
+        counter = LineCounter(cfg, roi)
+        session = TrackingSession(cfg, roi, model=model, broker=broker, fps=fps, observers=[counter])
+        if output_path:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            sink = VideoSink(AsyncVideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h),
+                                              policy=encode_policy))
+            session.add_observer(TrackOverlay(roi, [sink], counter=counter))
+            session.add_observer(sink)
+
+        # 추론 스레드에서만 호출 (트래커 상태 공유 없음)
+        def step(item: PrefetchedFrame) -> TrackEvent:
+            result = session.step(item.image)
+            dets, n = result.dets, len(result.dets)
+            count_ripe, count_unripe = result.counts
+            return TrackEvent(
+                frame_idx=result.frame_idx,
+                timestamp_ms=item.timestamp,
+                xyxy=dets.xyxy.copy() if n else np.empty((0, 4), dtype=np.float32),
+                class_id=dets.class_id.copy() if n else np.empty(0, dtype=int),
+                confidence=(dets.confidence.copy() if n and dets.confidence is not None
+                            else np.zeros(n, dtype=np.float32)),
+                stable_ids=np.asarray(result.stable_ids, dtype=int).copy() if n else np.empty(0, dtype=int),
+                count_ripe=count_ripe,
+                count_unripe=count_unripe,
+                direction=result.direction,
+            )
+
+        while True:
+            item = await loop.run_in_executor(decode_pool, reader.read_frame)
+            if item is None:
+                break
+            yield await loop.run_in_executor(infer_pool, step, item)
+
+    finally:
+        # 스레드 풀은 FIFO 이므로 진행 중인 read / step 이 끝난 뒤에 닫힌다
+        pending = []
+        if session is not None:
+            pending.append(infer_pool.submit(session.close))   # writer release
+        if reader is not None:
+            pending.append(decode_pool.submit(reader.release))
+        if pending:
+            # 이미 풀에 들어간 작업이므로 이 대기가 다시 취소돼도 정리는 실행된다
+            await asyncio.shield(asyncio.gather(*(asyncio.wrap_future(f) for f in pending)))
+        decode_pool.shutdown(wait=False)
+        infer_pool.shutdown(wait=False)
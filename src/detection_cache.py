@@ -0,0 +1,179 @@
+"""
+검출 캐시 (디코드 + YOLO 한 번, 트래커는 재생만)
+
+같은 영상 · 모델 · 검출 설정으로 여러 트래커를 비교할 때 (scripts/trackers/benchmark.py)
+프레임별 검출 결과 (xyxy / confidence / class_id) 를 .npz 한 파일에 저장해 두고
+각 트래커는 YOLO 대신 캐시에서 같은 검출을 꺼내 쓴다.
+
+파일 형식 (np.savez_compressed):
+  xyxy        (N, 4) float32   모든 프레임 검출을 이어 붙인 것 (전역 좌표)
+  confidence  (N,)   float32
+  class_id    (N,)   int16
+  offsets     (F+1,) int64     프레임 i 검출 = [offsets[i], offsets[i+1])
+  meta        ()     str       JSON (key, 모델 · 영상 해시, conf, iou, roi, 해상도, fps)
+
+캐시 키 = sha1(모델 파일 해시, 영상 파일 해시, conf, iou, roi) 앞 16자리.
+설정이 하나라도 바뀌면 다른 파일이 되므로 오래된 캐시를 덮어쓰지 않는다.
+
+사용법:
+  key   = cache_key(model_path, source, conf, iou, roi)
+  cache = DetectionCache.build(source, detect_fn, meta={...})   # detect_fn(frame) → sv.Detections
+  cache.save(cache_dir / f"{key}.npz")
+  cache = DetectionCache.load(path)
+  dets  = cache.frame(i)                                       # 0부터
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from video_io import FramePrefetcher
+
+_HASH_CHUNK = 1 << 20
+
+
+def file_sha1(path) -> str:
+    """파일 내용 sha1 (없는 경로면 경로 문자열 자체의 해시, 예: 웹캠 번호 · 자동 다운로드 모델 이름)"""
+    p = Path(str(path))
+    h = hashlib.sha1()
+    if not p.is_file():
+        h.update(str(path).encode("utf-8"))
+        return h.hexdigest()
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(model_path, source, conf: float, iou: float,
+              roi: Optional[Tuple[int, int, int, int]]) -> str:
+    """모델 · 영상 · 검출 설정이 같으면 같은 키"""
+    parts = {
+        "model": file_sha1(model_path),
+        "source": file_sha1(source),
+        "conf": float(conf),
+        "iou": float(iou),
+        "roi": list(roi) if roi is not None else None,
+    }
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class DetectionCache:
+    """프레임별 검출 결과 (한 영상 전체). build / load 로 만들고 frame(i) 로 재생."""
+
+    def __init__(self, xyxy: np.ndarray, confidence: np.ndarray, class_id: np.ndarray,
+                 offsets: np.ndarray, meta: Optional[Dict] = None):
+        self.xyxy = xyxy
+        self.confidence = confidence
+        self.class_id = class_id
+        self.offsets = offsets
+        self.meta: Dict = dict(meta or {})
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def roi(self) -> Optional[Tuple[int, int, int, int]]:
+        roi = self.meta.get("roi")
+        return tuple(roi) if roi is not None else None
+
+    # ------------------------------------------------------------------
+    # 생성 · 저장
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, source, detect: Callable[[np.ndarray], sv.Detections],
+              meta: Optional[Dict] = None, prefetch: int = 4) -> "DetectionCache":
+        """영상을 끝까지 디코드하며 detect(frame) 결과를 모음"""
+        cap = cv2.VideoCapture(int(source) if str(source).isdigit() else str(source))
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open: {source}")
+        meta = dict(meta or {})
+        meta.setdefault("width", int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        meta.setdefault("height", int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        meta.setdefault("fps", cap.get(cv2.CAP_PROP_FPS) or 30.0)
+
+        boxes_l: List[np.ndarray] = []
+        confs_l: List[np.ndarray] = []
+        cls_l: List[np.ndarray] = []
+        counts = [0]
+        t0 = time.perf_counter()
+        reader = FramePrefetcher(cap, prefetch)
+        try:
+            while True:
+                ret, frame = reader.read()
+                if not ret:
+                    break
+                dets = detect(frame)
+                n = len(dets)
+                if n:
+                    boxes_l.append(np.asarray(dets.xyxy, dtype=np.float32))
+                    confs_l.append(np.asarray(dets.confidence, dtype=np.float32)
+                                   if dets.confidence is not None else np.ones(n, dtype=np.float32))
+                    cls_l.append(np.asarray(dets.class_id, dtype=np.int16))
+                counts.append(n)
+        finally:
+            reader.release()
+        meta["build_s"] = round(time.perf_counter() - t0, 2)
+
+        return cls(
+            xyxy=np.concatenate(boxes_l) if boxes_l else np.empty((0, 4), dtype=np.float32),
+            confidence=np.concatenate(confs_l) if confs_l else np.empty(0, dtype=np.float32),
+            class_id=np.concatenate(cls_l) if cls_l else np.empty(0, dtype=np.int16),
+            offsets=np.cumsum(counts, dtype=np.int64),
+            meta=meta,
+        )
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez_compressed(tmp, xyxy=self.xyxy, confidence=self.confidence, class_id=self.class_id,
+                            offsets=self.offsets, meta=np.array(json.dumps(self.meta)))
+        tmp.replace(path)   # 쓰는 도중 중단돼도 반쯤 쓴 캐시가 남지 않도록
+        return path
+
+    @classmethod
+    def load(cls, path) -> "DetectionCache":
+        with np.load(str(path), allow_pickle=False) as z:
+            return cls(z["xyxy"], z["confidence"], z["class_id"], z["offsets"],
+                       json.loads(str(z["meta"])))
+
+    # ------------------------------------------------------------------
+    # 재생
+    # ------------------------------------------------------------------
+
+    def check(self, width: int, height: int, roi: Optional[Tuple[int, int, int, int]]):
+        """재생하려는 영상 · ROI 가 캐시를 만든 설정과 같은지 확인"""
+        size = (self.meta.get("width"), self.meta.get("height"))
+        if size != (width, height):
+            raise ValueError(f"검출 캐시 해상도 {size} ≠ 영상 {(width, height)}")
+        if self.roi != (tuple(roi) if roi is not None else None):
+            raise ValueError(f"검출 캐시 ROI {self.roi} ≠ {roi}")
+
+    def frame(self, i: int, roi: Optional[Tuple[int, int, int, int]] = None) -> sv.Detections:
+        """i 번째 프레임 (0부터) 검출. roi 가 캐시 ROI 보다 좁으면 박스 중심이 그 안에 있는 것만."""
+        if i >= len(self):
+            raise IndexError(f"검출 캐시는 {len(self)} 프레임입니다 (요청 {i})")
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        if lo == hi:
+            return sv.Detections.empty()
+        dets = sv.Detections(
+            xyxy=self.xyxy[lo:hi].copy(),
+            confidence=self.confidence[lo:hi].copy(),
+            class_id=self.class_id[lo:hi].astype(int),
+        )
+        if roi is not None and tuple(roi) != self.roi:
+            cx = 0.5 * (dets.xyxy[:, 0] + dets.xyxy[:, 2])
+            dets = dets[(cx >= roi[0]) & (cx <= roi[2])]
+        return dets
+
+    def format_stats(self) -> str:
+        return (f"detection cache {self.meta.get('key', '?')}: {len(self)} frames, "
+                f"{len(self.xyxy)} dets, build {self.meta.get('build_s', '?')}s")
@@ -0,0 +1,500 @@
+"""
+MOT 지표 (CLEAR-MOT · IDF1 · HOTA) — motmetrics / TrackEval 과 같은 정의를 NumPy 로 계산
+
+benchmark.py / sweep.py 의 GT 비교용. motmetrics 는 프레임마다 dict → iou_matrix → acc.update
+(pandas 이벤트 행 추가) 를 반복하므로 긴 영상에서는 트래킹보다 느리다. 여기서는
+  1. MOT 행을 프레임 순으로 정렬한 배열 (MotData) 로 올리고
+  2. 프레임 묶음 단위로 GT × 가설 IoU 를 한 번에 계산해 매칭 가능한 쌍 (IoU ≥ 0.5) 만 남긴 뒤
+  3. CLEAR-MOT: 프레임 순서대로 MOTAccumulator.update 와 같은 규칙
+     (직전 대응 유지 → 남은 쌍 헝가리안 → 직전 대응과 다른 가설이면 SWITCH)
+  4. IDF1: (GT ID, 가설 ID) 별 매칭 가능 프레임 수로 전역 이분 매칭 (연결 성분별 헝가리안)
+  5. HOTA: 겹치는 쌍 전부 (IoU > 0) 로 프레임 매칭을 한 번만 하고, alpha (0.05 … 0.95) 는
+     매칭된 쌍의 IoU 를 단계로 바꿔 누적합 → 19 단계 곡선이 IoU 한 번 계산한 비용과 비슷
+
+motmetrics 1.4 와 같게 맞춘 부분 (scripts/trackers/bench_metrics.py 로 확인):
+  - 같은 프레임에 같은 ID 행이 여러 개면 기존 dict 입력과 같이 순서는 첫 행, 박스는 마지막 행
+  - IoU 는 distances.boxiou 와 같은 연산 순서 (float64), 거리 1 - IoU > 0.5 이면 매칭 불가
+  - 프레임 헝가리안은 lap.lsa_solve_scipy 와 같이 매칭 불가 칸을 큰 상수로 채운 행렬
+HOTA 는 TrackEval (metrics/hota.py) 과 같은 정의 (전역 정렬 점수 × IoU 로 프레임 매칭, alpha - eps 이상만 TP).
+
+사용법:
+  gt  = MotData.load("tracking_result/gt_mot.csv")
+  hyp = MotData.from_rows(result.mot_rows)      # (frame, id, x, y, w, h, conf, class)
+  m   = evaluate(gt, hyp)                        # {"mota", "idf1", "num_switches", ...} (motmetrics 이름)
+  m   = evaluate(gt, hyp, with_hota=True)        # + {"hota", "deta", "assa", "loca", ...} (alpha 평균)
+  by  = evaluate_classes(gt, hyp, [0, 1])        # {None: 전체, 0: ripe 만, 1: unripe 만} (스레드 병렬)
+"""
+
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+IOU_THRESHOLD = 0.5
+HOTA_ALPHAS = np.arange(0.05, 0.99, 0.05)   # TrackEval 과 같은 19 단계
+_EPS = np.finfo(float).eps
+_BLOCK_PAIRS = 1 << 20   # IoU 를 한 번에 계산할 최대 (GT, 가설) 쌍 수
+
+
+# ---------------------------------------------------------------------------
+# MOT 행 배열
+# ---------------------------------------------------------------------------
+
+@dataclass
+class MotData:
+    """MOT 행 (프레임 오름차순, 프레임 안에서는 입력 순서). (frame, id) 는 중복 없음."""
+    frame: np.ndarray      # (N,) int64, 1부터
+    ids: np.ndarray        # (N,) int64
+    boxes: np.ndarray      # (N, 4) float64 x, y, w, h
+    class_id: np.ndarray   # (N,) int64 (-1 = 없음)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @classmethod
+    def from_arrays(cls, frame, ids, boxes, class_id=None) -> "MotData":
+        frame = np.asarray(frame, dtype=np.int64).reshape(-1)
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        class_id = (np.full(len(frame), -1, dtype=np.int64) if class_id is None
+                    else np.asarray(class_id, dtype=np.int64).reshape(-1))
+        n = len(frame)
+        if n == 0:
+            return cls(frame, ids, boxes, class_id)
+
+        # (frame, id) 중복: 위치는 첫 행, 값은 마지막 행 (data[fid][tid] = box 와 같음)
+        order = np.lexsort((np.arange(n), ids, frame))
+        f_s, i_s = frame[order], ids[order]
+        new = np.ones(n, dtype=bool)
+        new[1:] = (f_s[1:] != f_s[:-1]) | (i_s[1:] != i_s[:-1])
+        starts = np.flatnonzero(new)
+        first = order[starts]
+        last = order[np.r_[starts[1:], n] - 1]
+        keep = np.lexsort((first, frame[first]))
+        first, last = first[keep], last[keep]
+        return cls(frame[first], ids[first], boxes[last], class_id[last])
+
+    @classmethod
+    def load(cls, path) -> "MotData":
+        """MOT CSV (헤더 1줄: frame_id, track_id, x, y, w, h[, conf, class_id])"""
+        try:
+            arr = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+        except ValueError:
+            arr = None   # 열 수가 다른 행이 섞임 → 한 줄씩 (6열 미만 행은 건너뜀)
+        if arr is not None and (arr.shape[1] >= 6 or len(arr) == 0):
+            if len(arr) == 0:
+                return cls.from_arrays([], [], np.empty((0, 4)), [])
+            classes = arr[:, 7] if arr.shape[1] > 7 else None
+            return cls.from_arrays(arr[:, 0], arr[:, 1], arr[:, 2:6], classes)
+
+        frame, ids, boxes, classes = [], [], [], []
+        with open(path) as f:
+            reader = csv.reader(f)
+            next(reader)
+            for row in reader:
+                if len(row) < 6:
+                    continue
+                frame.append(int(row[0]))
+                ids.append(int(row[1]))
+                boxes.append([float(row[2]), float(row[3]), float(row[4]), float(row[5])])
+                classes.append(int(float(row[7])) if len(row) > 7 and row[7] != "" else -1)
+        return cls.from_arrays(frame, ids, boxes, classes)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple]) -> "MotData":
+        """benchmark MOT 행 (frame_id, track_id, x, y, w, h, conf, class_id)"""
+        if not rows:
+            return cls.from_arrays([], [], np.empty((0, 4)), [])
+        arr = np.asarray([r[:6] for r in rows], dtype=np.float64)
+        classes = [r[7] if len(r) > 7 else -1 for r in rows]
+        return cls.from_arrays(arr[:, 0], arr[:, 1], arr[:, 2:6], classes)
+
+    def select(self, mask: np.ndarray) -> "MotData":
+        return MotData(self.frame[mask], self.ids[mask], self.boxes[mask], self.class_id[mask])
+
+    def until(self, max_frame: Optional[int]) -> "MotData":
+        return self if max_frame is None else self.select(self.frame <= max_frame)
+
+
+# ---------------------------------------------------------------------------
+# 프레임별 IoU (묶음 단위 벡터화)
+# ---------------------------------------------------------------------------
+
+def _corners(boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """x,y,w,h → x1, y1, x2, y2, 면적 (motmetrics.distances.boxiou 와 같은 연산 순서)"""
+    lo = boxes[:, :2]
+    hi = lo + boxes[:, 2:]
+    size = np.maximum(hi - lo, 0)
+    return (np.ascontiguousarray(lo[:, 0]), np.ascontiguousarray(lo[:, 1]),
+            np.ascontiguousarray(hi[:, 0]), np.ascontiguousarray(hi[:, 1]), size[:, 0] * size[:, 1])
+
+
+@dataclass
+class FramePairs:
+    """GT · 가설을 같은 프레임 축으로 맞춘 인덱스 + 프레임 안 모든 (GT, 가설) 쌍 IoU"""
+    frames: np.ndarray     # (F,) 둘 중 하나라도 행이 있는 프레임
+    g_lo: np.ndarray       # (F,) 프레임 f 의 GT 행 = [g_lo, g_hi)
+    g_hi: np.ndarray
+    h_lo: np.ndarray
+    h_hi: np.ndarray
+    pair_lo: np.ndarray    # (F+1,) 프레임 f 의 쌍 = [pair_lo[f], pair_lo[f+1])
+    gi: np.ndarray         # (P,) GT 행
+    hj: np.ndarray         # (P,) 가설 행
+    iou: np.ndarray        # (P,)
+
+    @classmethod
+    def build(cls, gt: MotData, hyp: MotData, max_dist: float = 1.0) -> "FramePairs":
+        """겹치는 (IoU > 0) 쌍 중 거리 1 - IoU ≤ max_dist 인 것만 (기본 = 겹치는 쌍 전부)"""
+        frames = np.union1d(gt.frame, hyp.frame)
+        g_lo = np.searchsorted(gt.frame, frames, "left")
+        g_hi = np.searchsorted(gt.frame, frames, "right")
+        h_lo = np.searchsorted(hyp.frame, frames, "left")
+        h_hi = np.searchsorted(hyp.frame, frames, "right")
+        ng, nh = g_hi - g_lo, h_hi - h_lo
+        n_pair = ng * nh
+        cum = np.cumsum(n_pair)
+
+        gx1, gy1, gx2, gy2, g_area = _corners(gt.boxes)
+        hx1, hy1, hx2, hy2, h_area = _corners(hyp.boxes)
+        gi_l, hj_l, iou_l, cnt = [], [], [], np.zeros(len(frames), dtype=np.int64)
+        start = 0
+        while start < len(frames):
+            base = cum[start - 1] if start else 0
+            end = max(start + 1, int(np.searchsorted(cum, base + _BLOCK_PAIRS, "right")))
+            fb = np.arange(start, end)
+            per = n_pair[fb]
+            total = int(per.sum())
+            if total:
+                fr = np.repeat(fb, per)
+                k = np.arange(total) - np.repeat(np.cumsum(per) - per, per)
+                gi = g_lo[fr] + k // nh[fr]
+                hj = h_lo[fr] + k % nh[fr]
+                # x 로 먼저 거르고 (대부분의 쌍은 여기서 빠짐) 남은 쌍만 IoU
+                iw = np.minimum(gx2[gi], hx2[hj]) - np.maximum(gx1[gi], hx1[hj])
+                ok = iw > 0
+                fr, gi, hj, iw = fr[ok], gi[ok], hj[ok], iw[ok]
+                ih = np.minimum(gy2[gi], hy2[hj]) - np.maximum(gy1[gi], hy1[hj])
+                ok = ih > 0
+                fr, gi, hj, i_vol = fr[ok], gi[ok], hj[ok], iw[ok] * ih[ok]
+                iou = i_vol / (g_area[gi] + h_area[hj] - i_vol)
+                ok = 1.0 - iou <= max_dist
+                gi_l.append(gi[ok])
+                hj_l.append(hj[ok])
+                iou_l.append(iou[ok])
+                cnt[fb] = np.bincount(fr[ok] - start, minlength=len(fb))
+            start = end
+
+        def _cat(parts, dtype):
+            return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+        return cls(frames, g_lo, g_hi, h_lo, h_hi, np.r_[0, np.cumsum(cnt)],
+                   _cat(gi_l, np.int64), _cat(hj_l, np.int64), _cat(iou_l, np.float64))
+
+
+# ---------------------------------------------------------------------------
+# CLEAR-MOT · IDF1
+# ---------------------------------------------------------------------------
+
+def _lsa_motmetrics(costs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """motmetrics.lap.lsa_solve_scipy 와 같은 풀이 (NaN = 매칭 불가, 결과에서 제외)"""
+    valid = np.isfinite(costs)
+    if not valid.any():
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    if valid.all():
+        finite = costs
+    else:
+        c = np.abs(costs[valid]).max() + 1
+        finite = np.where(valid, costs, 2 * min(costs.shape) * c + 1)
+    rids, cids = linear_sum_assignment(finite)
+    keep = valid[rids, cids]
+    return rids[keep], cids[keep]
+
+
+def _max_weight_matching(rows: np.ndarray, cols: np.ndarray, weight: np.ndarray) -> float:
+    """이분 그래프 (rows[k], cols[k], weight[k] > 0) 최대 가중 매칭 합 — 연결 성분별 헝가리안"""
+    if len(rows) == 0:
+        return 0.0
+    r_ids, r_inv = np.unique(rows, return_inverse=True)
+    c_ids, c_inv = np.unique(cols, return_inverse=True)
+    nr, nc = len(r_ids), len(c_ids)
+    g = coo_matrix((np.ones(len(rows)), (r_inv, nr + c_inv)), shape=(nr + nc, nr + nc))
+    n_comp, labels = connected_components(g, directed=False)
+    comp = labels[r_inv]
+    order = np.argsort(comp, kind="stable")
+    bounds = np.r_[0, np.cumsum(np.bincount(comp, minlength=n_comp))]
+    total = 0.0
+    for c in range(n_comp):
+        ks = order[bounds[c]:bounds[c + 1]]
+        if len(ks) == 1:
+            total += float(weight[ks[0]])
+            continue
+        ru, ri = np.unique(r_inv[ks], return_inverse=True)
+        cu, ci = np.unique(c_inv[ks], return_inverse=True)
+        mat = np.zeros((len(ru), len(cu)))
+        mat[ri, ci] = weight[ks]
+        a, b = linear_sum_assignment(mat, maximize=True)
+        total += float(mat[a, b].sum())
+    return total
+
+
+def _dense_ids(ids: np.ndarray) -> Tuple[np.ndarray, int]:
+    uniq, inv = np.unique(ids, return_inverse=True)
+    return inv.astype(np.int64), len(uniq)
+
+
+def _conflict_frame_matches(D: np.ndarray, og: np.ndarray, oh: np.ndarray, p: np.ndarray,
+                            h_pos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """MOTAccumulator.update 1 · 2 단계 그대로 (D: 거리, NaN = 매칭 불가, p: GT 행별 직전 대응 가설 ID)"""
+    ng, nh = D.shape
+    g_used = np.zeros(ng, dtype=bool)
+    h_used = np.zeros(nh, dtype=bool)
+
+    # 1. 직전 대응 유지 (GT 행 순서대로, 가설 하나는 먼저 온 GT 가 가져감)
+    h_pos[oh] = np.arange(nh)
+    rows = np.flatnonzero(p >= 0)
+    cols = h_pos[p[rows]]
+    h_pos[oh] = -1
+    ok = cols >= 0
+    rows, cols = rows[ok], cols[ok]
+    ok = np.isfinite(D[rows, cols])
+    rows, cols = rows[ok], cols[ok]
+    _, first = np.unique(cols, return_index=True)
+    first.sort()
+    rows, cols = rows[first], cols[first]
+    g_used[rows] = True
+    h_used[cols] = True
+
+    # 2. 남은 GT · 가설 헝가리안
+    D = D.copy()
+    D[g_used, :] = np.nan
+    D[:, h_used] = np.nan
+    ri, ci = _lsa_motmetrics(D)
+    return np.r_[rows, ri].astype(np.int64), np.r_[cols, ci].astype(np.int64)
+
+
+def _conflict_frames(gi: np.ndarray, hj: np.ndarray, pf: np.ndarray, n_gt: int, n_hyp: int,
+                     n_frames: int) -> np.ndarray:
+    """(F,) bool: 한 GT 행이나 가설 행이 쌍 2개 이상에 걸린 프레임 (헝가리안이 필요한 프레임)"""
+    deg_g = np.bincount(gi, minlength=n_gt)
+    deg_h = np.bincount(hj, minlength=n_hyp)
+    bad = (deg_g[gi] > 1) | (deg_h[hj] > 1)
+    conflict = np.zeros(n_frames, dtype=bool)
+    conflict[pf[bad]] = True
+    return conflict
+
+
+def clear_mot(gt: MotData, hyp: MotData, pairs: FramePairs, max_dist: float) -> Dict[str, int]:
+    """MOTAccumulator.update 를 프레임 순서대로 적용한 것과 같은 MATCH / SWITCH / FP / MISS 수.
+
+    매칭 가능한 쌍이 프레임 안에서 서로 겹치지 않으면 (GT · 가설 모두 쌍 1개 이하) 그 쌍은
+    직전 대응과 무관하게 모두 매칭되므로 한 번에 처리하고, 겹치는 프레임만 순서대로 1 · 2 단계를
+    재현한다. SWITCH = 같은 GT ID 의 직전 매칭 가설과 다른 가설에 매칭된 경우 (max_switch_time 무한대).
+    """
+    g_dense, n_g = _dense_ids(gt.ids)
+    h_dense, n_h = _dense_ids(hyp.ids)
+    n_frames = len(pairs.frames)
+    ok = (1.0 - pairs.iou) <= max_dist
+    gi, hj, dist = pairs.gi[ok], pairs.hj[ok], 1.0 - pairs.iou[ok]
+    pf = np.repeat(np.arange(n_frames), np.diff(pairs.pair_lo))[ok]
+
+    conflict = _conflict_frames(gi, hj, pf, len(gt), len(hyp), n_frames)
+    free = ~conflict[pf]
+
+    # 겹침 없는 프레임의 매칭 (GT ID, 프레임) 순 정렬 → 겹치는 프레임에서 직전 대응 조회용
+    m_g, m_h, m_f = g_dense[gi[free]], h_dense[hj[free]], pf[free]
+    free_order = np.lexsort((m_f, m_g))
+    free_key = m_g[free_order] * n_frames + m_f[free_order]
+    free_h = m_h[free_order]
+
+    last_f = np.full(n_g, -1, dtype=np.int64)    # 겹치는 프레임에서 마지막으로 매칭된 프레임 / 가설
+    last_h = np.full(n_g, -1, dtype=np.int64)
+    h_pos = np.full(n_h, -1, dtype=np.int64)
+    extra_g, extra_h, extra_f = [m_g], [m_h], [m_f]
+
+    pair_lo = np.searchsorted(pf, np.arange(n_frames + 1))
+    for f in np.flatnonzero(conflict).tolist():
+        g0, g1, h0, h1 = pairs.g_lo[f], pairs.g_hi[f], pairs.h_lo[f], pairs.h_hi[f]
+        og, oh = g_dense[g0:g1], h_dense[h0:h1]
+        ks = np.arange(pair_lo[f], pair_lo[f + 1])
+
+        # 직전 대응: 겹침 없는 프레임 매칭과 앞선 겹치는 프레임 매칭 중 더 최근 것
+        pos = np.searchsorted(free_key, og * n_frames + f) - 1
+        has = pos >= 0
+        has[has] = free_key[pos[has]] // n_frames == og[has]
+        p = np.where(has, free_h[np.maximum(pos, 0)], -1)
+        p_f = np.where(has, free_key[np.maximum(pos, 0)] % n_frames, -1)
+        p = np.where(last_f[og] > p_f, last_h[og], p)
+
+        D = np.full((g1 - g0, h1 - h0), np.nan)
+        D[gi[ks] - g0, hj[ks] - h0] = dist[ks]
+        rows, cols = _conflict_frame_matches(D, og, oh, p, h_pos)
+        o, h = og[rows], oh[cols]
+        last_f[o] = f
+        last_h[o] = h
+        extra_g.append(o)
+        extra_h.append(h)
+        extra_f.append(np.full(len(o), f, dtype=np.int64))
+
+    all_g, all_h, all_f = np.concatenate(extra_g), np.concatenate(extra_h), np.concatenate(extra_f)
+    order = np.lexsort((all_f, all_g))
+    sg, sh = all_g[order], all_h[order]
+    switches = int(((sg[1:] == sg[:-1]) & (sh[1:] != sh[:-1])).sum())
+    n_match = len(all_g)
+    return {"num_matches": n_match - switches, "num_switches": switches,
+            "num_false_positives": len(hyp) - n_match, "num_misses": len(gt) - n_match}
+
+
+def id_true_positives(gt: MotData, hyp: MotData, pairs: FramePairs, max_dist: float) -> int:
+    """IDTP: (GT ID, 가설 ID) 전역 1:1 대응 중 매칭 가능 프레임 수 합의 최대값"""
+    g_dense, _ = _dense_ids(gt.ids)
+    h_dense, n_h = _dense_ids(hyp.ids)
+    ok = (1.0 - pairs.iou) <= max_dist
+    key = g_dense[pairs.gi[ok]] * n_h + h_dense[pairs.hj[ok]]
+    uniq, counts = np.unique(key, return_counts=True)
+    return int(round(_max_weight_matching(uniq // n_h, uniq % n_h, counts.astype(np.float64))))
+
+
+# ---------------------------------------------------------------------------
+# HOTA
+# ---------------------------------------------------------------------------
+
+def _suffix_sum(x: np.ndarray) -> np.ndarray:
+    """마지막 축 뒤에서부터 누적합 (out[..., l] = x[..., l:].sum(-1))"""
+    return x[..., ::-1].cumsum(-1)[..., ::-1]
+
+
+def hota(gt: MotData, hyp: MotData, pairs: FramePairs,
+         alphas: np.ndarray = HOTA_ALPHAS) -> Dict[str, np.ndarray]:
+    """alpha 별 HOTA · DetA · AssA · LocA 등 (각각 (A,) 배열). pairs 는 겹치는 쌍 전부 (max_dist=1.0).
+
+    TrackEval 은 alpha 마다 프레임을 다시 돌지만, 프레임 매칭 (전역 정렬 점수 × IoU 헝가리안) 은
+    alpha 와 무관하므로 한 번만 하고, 매칭된 쌍마다 "IoU ≥ alpha - eps 인 alpha 개수" (단계) 를 구해
+    단계별 개수를 뒤에서부터 누적하면 모든 alpha 의 TP · LocA · (GT ID, 가설 ID) 매칭 수가 한 번에 나온다.
+    """
+    n_a = len(alphas)
+    g_dense, n_g = _dense_ids(gt.ids)
+    h_dense, n_h = _dense_ids(hyp.ids)
+    g_count = np.bincount(g_dense, minlength=n_g)
+    h_count = np.bincount(h_dense, minlength=n_h)
+    n_frames = len(pairs.frames)
+    gi, hj, sim = pairs.gi, pairs.hj, pairs.iou
+    pf = np.repeat(np.arange(n_frames), np.diff(pairs.pair_lo))
+
+    # 1. 전역 정렬 점수: 프레임 안에서 정규화한 IoU (IoU / (행 합 + 열 합 - IoU)) 를 ID 쌍별로 누적
+    row_sum = np.bincount(gi, sim, minlength=len(gt))
+    col_sum = np.bincount(hj, sim, minlength=len(hyp))
+    denom = row_sum[gi] + col_sum[hj] - sim
+    ok = denom > _EPS
+    sim_iou = np.zeros_like(sim)
+    sim_iou[ok] = sim[ok] / denom[ok]
+    keys, key_inv = np.unique(g_dense[gi] * n_h + h_dense[hj], return_inverse=True)
+    k_g, k_h = keys // max(n_h, 1), keys % max(n_h, 1)
+    potential = np.bincount(key_inv, sim_iou, minlength=len(keys))
+    score = (potential / (g_count[k_g] + h_count[k_h] - potential))[key_inv] * sim
+
+    # 2. 프레임 매칭: 겹침 없는 프레임은 쌍 전부, 겹치는 프레임만 프레임 전체 행렬 헝가리안
+    conflict = _conflict_frames(gi, hj, pf, len(gt), len(hyp), n_frames)
+    matched = ~conflict[pf]
+    for f in np.flatnonzero(conflict).tolist():
+        g0, g1, h0, h1 = pairs.g_lo[f], pairs.g_hi[f], pairs.h_lo[f], pairs.h_hi[f]
+        ks = np.arange(pairs.pair_lo[f], pairs.pair_lo[f + 1])
+        S = np.zeros((g1 - g0, h1 - h0))
+        S[gi[ks] - g0, hj[ks] - h0] = score[ks]
+        K = np.full(S.shape, -1, dtype=np.int64)
+        K[gi[ks] - g0, hj[ks] - h0] = ks
+        k = K[linear_sum_assignment(-S)]
+        matched[k[k >= 0]] = True   # 겹치지 않는 칸 (IoU 0) 은 어느 alpha 에서도 TP 아님
+
+    # 3. alpha 곡선: 단계 = IoU ≥ alpha - eps 인 alpha 수
+    s, k = sim[matched], key_inv[matched]
+    level = np.searchsorted(alphas - _EPS, s, side="right")
+    tp = _suffix_sum(np.bincount(level, minlength=n_a + 1))[1:]
+    loc = _suffix_sum(np.bincount(level, s, minlength=n_a + 1))[1:]
+    mc = _suffix_sum(np.bincount(k * (n_a + 1) + level, minlength=len(keys) * (n_a + 1))
+                     .reshape(len(keys), n_a + 1))[:, 1:].astype(np.float64)
+    fn, fp = len(gt) - tp, len(hyp) - tp
+    gc, hc = g_count[k_g][:, None], h_count[k_h][:, None]
+    tp1 = np.maximum(1, tp)
+    assa = (mc * mc / np.maximum(1, gc + hc - mc)).sum(0) / tp1
+    deta = tp / np.maximum(1, tp + fn + fp)
+    return {
+        "alpha": alphas,
+        "hota": np.sqrt(deta * assa),
+        "deta": deta,
+        "assa": assa,
+        "detre": tp / np.maximum(1, tp + fn),
+        "detpr": tp / np.maximum(1, tp + fp),
+        "assre": (mc * mc / np.maximum(1, gc)).sum(0) / tp1,
+        "asspr": (mc * mc / np.maximum(1, hc)).sum(0) / tp1,
+        "loca": np.maximum(1e-10, loc) / np.maximum(1e-10, tp),
+        "hota_tp": tp,
+        "hota_fn": fn,
+        "hota_fp": fp,
+    }
+
+
+# ---------------------------------------------------------------------------
+# 종합
+# ---------------------------------------------------------------------------
+
+def _divide(a, b) -> float:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(np.true_divide(a, b))
+
+
+def evaluate(gt: MotData, hyp: MotData, max_frame: Optional[int] = None,
+             iou_threshold: float = IOU_THRESHOLD, pairs: Optional[FramePairs] = None,
+             with_hota: bool = False) -> Dict[str, float]:
+    """CLEAR-MOT + IDF1 (motmetrics 지표 이름). max_frame 이 있으면 그 프레임 (1부터) 까지만.
+    with_hota 면 HOTA · DetA · AssA · LocA 등 (alpha 평균) 도 — IoU 쌍은 한 번만 계산해 같이 씀."""
+    gt, hyp = gt.until(max_frame), hyp.until(max_frame)
+    max_dist = 1.0 - iou_threshold
+    if pairs is None:
+        pairs = FramePairs.build(gt, hyp, 1.0 if with_hota else max_dist)
+    clear = clear_mot(gt, hyp, pairs, max_dist)
+    idtp = id_true_positives(gt, hyp, pairs, max_dist)
+
+    num_objects, num_predictions = len(gt), len(hyp)
+    num_detections = clear["num_matches"] + clear["num_switches"]
+    extra = {}
+    if with_hota:
+        curve = hota(gt, hyp, pairs)
+        extra = {k: float(curve[k].mean())
+                 for k in ("hota", "deta", "assa", "loca", "detre", "detpr", "assre", "asspr")}
+    return {
+        **clear,
+        "num_objects": num_objects,
+        "num_predictions": num_predictions,
+        "num_detections": num_detections,
+        "mota": 1.0 - _divide(clear["num_misses"] + clear["num_switches"] + clear["num_false_positives"],
+                              num_objects),
+        "recall": _divide(num_detections, num_objects),
+        "precision": _divide(num_detections, clear["num_false_positives"] + num_detections),
+        "idtp": idtp,
+        "idfn": num_objects - idtp,
+        "idfp": num_predictions - idtp,
+        "idf1": _divide(2 * idtp, num_objects + num_predictions),
+        **extra,
+    }
+
+
+def evaluate_classes(gt: MotData, hyp: MotData, classes: Iterable[int], max_frame: Optional[int] = None,
+                     iou_threshold: float = IOU_THRESHOLD, with_hota: bool = True,
+                     workers: Optional[int] = None) -> Dict[Optional[int], Dict[str, float]]:
+    """전체 (키 None) + 클래스별 evaluate. 클래스별은 GT · 가설을 class_id 로 나눠 따로 매칭
+    (다른 클래스 박스와는 매칭 · SWITCH 가 생기지 않음). 나눈 것끼리는 독립이라 스레드로 동시에 계산."""
+    gt, hyp = gt.until(max_frame), hyp.until(max_frame)
+    parts: Dict[Optional[int], Tuple[MotData, MotData]] = {None: (gt, hyp)}
+    for c in classes:
+        parts[int(c)] = (gt.select(gt.class_id == c), hyp.select(hyp.class_id == c))
+    workers = workers or min(len(parts), os.cpu_count() or 1)
+    with ThreadPoolExecutor(workers, thread_name_prefix="mot_eval") as pool:
+        futures = {key: pool.submit(evaluate, g, h, None, iou_threshold, None, with_hota)
+                   for key, (g, h) in parts.items()}
+        return {key: fut.result() for key, fut in futures.items()}
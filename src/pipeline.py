@@ -0,0 +1,212 @@
+"""
+스테이지 파이프라인 실행기
+
+프레임 처리 루프를 순서가 정해진 스테이지 (모션 → 검출 → ID 할당 → 시각화 → 인코딩 …)
+로 나누고, 스테이지마다 스레드 하나 + bounded queue 로 연결한다.
+프레임 t 의 검출과 프레임 t+1 의 모션 추정, 프레임 t-1 의 인코딩이 겹쳐 실행된다.
+
+  - 스테이지당 워커 1개 + FIFO 큐 → 각 스테이지는 직렬 루프와 같은 순서로 프레임을 처리
+    (ByteTrack · StableIdAssigner 같은 상태 있는 스테이지도 결과 동일), 출력도 입력 순서
+  - threaded=False 면 같은 스테이지 함수를 호출 스레드에서 차례로 실행 (직렬 기준선)
+  - 스테이지 예외는 소비자 쪽 반복에서 다시 발생
+
+사용법:
+  pipe = StagePipeline(source_iter, [Stage("detect", detect), Stage("assign", assign)], capacity=2)
+  for item in pipe:
+      ...
+  print(pipe.format_stats())
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+_END = object()          # 스트림 끝 표식
+_POLL_SEC = 0.1          # 큐 대기 중 정지 요청 확인 주기
+
+
+class Stage:
+    """파이프라인 스테이지: item → item 함수 + 계측 카운터.
+
+    카운터:
+      items             처리한 항목 수
+      busy_time         함수 실행 누적 시간 (s)
+      max_latency       항목 하나 최대 실행 시간 (s)
+      max_queue_depth   입력 큐 최대 길이 (threaded 일 때만)
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any]):
+        self.name = name
+        self.fn = fn
+        self.items = 0
+        self.busy_time = 0.0
+        self.max_latency = 0.0
+        self.max_queue_depth = 0
+        self.inbox: Optional[queue.Queue] = None
+
+    def process(self, item: Any) -> Any:
+        t0 = time.perf_counter()
+        out = self.fn(item)
+        dt = time.perf_counter() - t0
+        self.items += 1
+        self.busy_time += dt
+        if dt > self.max_latency:
+            self.max_latency = dt
+        return out
+
+    @property
+    def queue_depth(self) -> int:
+        return self.inbox.qsize() if self.inbox is not None else 0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "items": self.items,
+            "mean_ms": 1000.0 * self.busy_time / self.items if self.items else 0.0,
+            "max_ms": 1000.0 * self.max_latency,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+class StagePipeline:
+    """순서 보존 다단계 파이프라인.
+
+    Args:
+        source:   입력 항목 iterable (예: FramePrefetcher). threaded 면 별도 스레드에서 소비.
+        stages:   순서대로 적용할 Stage 목록
+        capacity: 스테이지 사이 큐 크기 (가득 차면 앞 스테이지가 대기)
+        threaded: False 면 호출 스레드에서 직렬 실행
+    """
+
+    def __init__(
+        self,
+        source: Iterable,
+        stages: Sequence[Stage],
+        capacity: int = 2,
+        threaded: bool = True,
+    ):
+        if capacity < 1:
+            raise ValueError(f"capacity 는 1 이상이어야 합니다 ({capacity})")
+        self.source = source
+        self.stages: List[Stage] = list(stages)
+        self.capacity = capacity
+        self.threaded = threaded
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._threads: List[threading.Thread] = []
+        self._output: Optional[queue.Queue] = None
+        self.wall_time = 0.0
+
+    # ------------------------------------------------------------------
+    # 스레드 워커
+    # ------------------------------------------------------------------
+
+    def _put(self, q: queue.Queue, item: Any, stage: Optional[Stage] = None) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SEC)
+                if stage is not None:
+                    depth = q.qsize()
+                    if depth > stage.max_queue_depth:
+                        stage.max_queue_depth = depth
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SEC)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, e: BaseException):
+        if self._error is None:
+            self._error = e
+        self._stop.set()
+
+    def _feed(self, out: queue.Queue, stage: Optional[Stage]):
+        try:
+            for item in self.source:
+                if not self._put(out, item, stage):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        self._put(out, _END, stage)
+
+    def _work(self, stage: Stage, out: queue.Queue, nxt: Optional[Stage]):
+        while True:
+            item = self._get(stage.inbox)
+            if item is _END:
+                self._put(out, _END, nxt)
+                return
+            try:
+                item = stage.process(item)
+            except BaseException as e:
+                self._fail(e)
+                return
+            if not self._put(out, item, nxt):
+                return
+
+    def _start(self):
+        for stage in self.stages:
+            stage.inbox = queue.Queue(maxsize=self.capacity)
+        self._output = queue.Queue(maxsize=self.capacity)
+        first = self.stages[0] if self.stages else None
+        self._threads.append(threading.Thread(
+            target=self._feed, args=(first.inbox if first else self._output, first),
+            name="pipeline-source", daemon=True))
+        for i, stage in enumerate(self.stages):
+            nxt = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            out = nxt.inbox if nxt is not None else self._output
+            self._threads.append(threading.Thread(
+                target=self._work, args=(stage, out, nxt),
+                name=f"pipeline-{stage.name}", daemon=True))
+        for t in self._threads:
+            t.start()
+
+    # ------------------------------------------------------------------
+    # 소비자 API
+    # ------------------------------------------------------------------
+
+    def __iter__(self) -> Iterator[Any]:
+        t0 = time.perf_counter()
+        try:
+            if not self.threaded:
+                for item in self.source:
+                    for stage in self.stages:
+                        item = stage.process(item)
+                    yield item
+                return
+            self._start()
+            while True:
+                item = self._get(self._output)
+                if item is _END:
+                    break
+                yield item
+            if self._error is not None:
+                raise self._error
+        finally:
+            self.wall_time = time.perf_counter() - t0
+            self.close()
+
+    def close(self):
+        """워커 정지 (소비자가 중간에 반복을 멈춰도 안전). 이미 처리 중인 항목은 버린다."""
+        self._stop.set()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {s.name: s.stats() for s in self.stages}
+
+    def format_stats(self) -> str:
+        """스테이지별 평균/최대 지연과 최대 큐 길이 한 줄씩"""
+        lines = [f"{'stage':>10} {'items':>7} {'mean ms':>8} {'max ms':>8} {'max queue':>10}"]
+        for name, st in self.stats().items():
+            lines.append(f"{name:>10} {st['items']:>7} {st['mean_ms']:>8.2f} {st['max_ms']:>8.2f} "
+                         f"{st['max_queue_depth']:>10}")
+        return "\n".join(lines)
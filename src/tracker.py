@@ -18,10 +18,12 @@ YOLO + sv.ByteTrack (클래스별 독립) + Stable ID + ReID + Motion Compensati
 
 import csv
 import json
+import math
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple
 
 import cv2
 import numpy as np
@@ -29,30 +31,385 @@ import supervision as sv
 from scipy.optimize import linear_sum_assignment
 from ultralytics import YOLO
 from trackers import MotionAwareTraceAnnotator, MotionEstimator
+from detection_cache import DetectionCache
+from yolo_broker import InferenceBroker
+from pipeline import Stage, StagePipeline
+from video_io import AsyncVideoWriter, FramePrefetcher, writer_from_config
 
-# CONFIG는 scripts/realtime_tracking_new.py 에서 주입
+# CONFIG는 scripts/realtime_tracking_new.py 에서 주입 (TrackerConfig 를 넘기지 않았을 때의 기본값)
 CONFIG: Dict = {}
 
 CLASS_NAMES = {0: "ripe", 1: "unripe"}
 
 
 # ---------------------------------------------------------------------------
-# TrackState
+# TrackerConfig
 # ---------------------------------------------------------------------------
 
-@dataclass
-class TrackState:
-    stable_id: int
-    xyxy: np.ndarray
-    class_id: int
-    tracker_id: Optional[int] = None
-    reid_feature: Optional[np.ndarray] = None
-    lost_frames: int = 0
-    last_seen_frame: int = 0
-    crossed_line: bool = False
-    warped_xyxy: Optional[np.ndarray] = None
-    counted: bool = False
-    consecutive_frames: int = 0
+@dataclass(frozen=True, slots=True)
+class TrackerConfig:
+    """트래커 설정 (불변). 생성 시 한 번 검증하고 StableIdAssigner / run 에 그대로 전달한다.
+
+    모듈 전역 CONFIG 를 매 호출마다 읽지 않으므로 서로 다른 설정의 트래커를
+    한 프로세스에서 동시에 돌릴 수 있다. 기본값은 기존 CONFIG.get 기본값과 같다.
+    """
+
+    # Detection
+    conf: float = 0.5
+    nms: float = 0.3
+
+    # ByteTrack
+    byte_track_activation_threshold: float = 0.25
+    byte_minimum_matching_threshold: float = 0.8
+    byte_buffer: int = 30
+
+    # 구조 제약
+    max_y_diff: float = 100.0
+    max_area_ratio: float = 3.0
+    max_backward_x: float = 50.0
+    max_movement_unknown: float = 300
+
+    # 2단계 매칭 / ReID
+    center_max_dist: float = 200
+    use_reid: bool = False
+    reid_weight: float = 0.3
+    reid_threshold: float = 0.5
+    reid_hist_bins: int = 32
+    stage2_gating: bool = False             # True = 격자 게이팅 후보 쌍만 매칭 (빠름, 매칭 결과가 dense 와 다를 수 있음)
+
+    # lost 버퍼
+    lost_buffer_frames: int = 20
+    lost_buffer_uncounted: int = 150
+
+    use_order_constraint: bool = False
+
+    # Motion compensation
+    motion_compensation: bool = False
+    motion_max_points: int = 500
+    motion_min_distance: int = 10
+    motion_block_size: int = 3
+    motion_quality_level: float = 0.001
+    motion_ransac_reproj_threshold: float = 1.0
+
+    # 방향 감지
+    direction_min_tracks: int = 3
+    direction_dx_threshold: float = 5.0
+    direction_ema_alpha: float = 0.3
+    direction_hysteresis: float = 2.0
+
+    # 출구 쪽 신규 객체 복구
+    suspicious_new_match_dist: float = 350
+    suspicious_recover_reid_threshold: float = 0.35
+    suspicious_lost_frames_penalty: float = 2.0
+
+    # 카운팅
+    count_unknown_ema_threshold: float = 3.0
+    counting_entry_offset: int = 50
+    counting_min_consecutive: int = 3
+
+    # 검출 주기 (적응형 프레임 스킵, detect_every=1 이면 매 프레임 검출)
+    detect_every: int = 1                       # 최대 K 프레임마다 YOLO 검출
+    detect_motion_threshold: float = 40.0       # 마지막 검출 이후 누적 카메라 이동 (px) 이 넘으면 검출 (0=끔)
+    detect_uncertainty_threshold: float = 0.5   # 직전 검출의 신규·미매칭 비율이 넘으면 검출 (0=끔)
+
+    # 동적 ROI (방향이 안정되면 검출 크롭을 입구 쪽으로 좁힘, 카운팅 · ID 할당은 전체 ROI 기준)
+    dynamic_roi: bool = False
+    dynamic_roi_margin: int = 150           # 입구 라인 너머로 더 검출할 폭 (px)
+    dynamic_roi_stable_frames: int = 30     # 같은 방향이 이만큼 이어져야 크롭을 좁힘
+    dynamic_roi_probe_every: int = 60       # 좁힌 동안에도 이 주기마다 몇 프레임은 전체 ROI (방향 재확인, 0=끔)
+
+    # 시각화 / 로그
+    show_trace: bool = False
+    trace_length: int = 80
+    debug: bool = False
+
+    def __post_init__(self):
+        for f in fields(self):
+            v = getattr(self, f.name)
+            if isinstance(v, bool):
+                continue
+            if not isinstance(v, (int, float)) or not math.isfinite(v):
+                raise ValueError(f"TrackerConfig.{f.name}: 유한한 숫자가 아닙니다 ({v!r})")
+
+        def _check(ok: bool, name: str, rule: str):
+            if not ok:
+                raise ValueError(f"TrackerConfig.{name} 는 {rule} 이어야 합니다 ({getattr(self, name)!r})")
+
+        for name in ("conf", "nms", "byte_track_activation_threshold",
+                     "byte_minimum_matching_threshold", "reid_weight"):
+            _check(0.0 <= getattr(self, name) <= 1.0, name, "0~1 범위")
+        for name in ("reid_threshold", "suspicious_recover_reid_threshold"):
+            _check(-1.0 <= getattr(self, name) <= 1.0, name, "-1~1 범위 (코사인 유사도)")
+        for name in ("max_y_diff", "max_backward_x", "max_movement_unknown",
+                     "center_max_dist", "suspicious_new_match_dist"):
+            _check(getattr(self, name) > 0, name, "양수")
+        _check(self.max_area_ratio >= 1.0, "max_area_ratio", "1 이상")
+        _check(0.0 < self.direction_ema_alpha <= 1.0, "direction_ema_alpha", "(0, 1] 범위")
+        _check(0.0 <= self.detect_uncertainty_threshold <= 1.0, "detect_uncertainty_threshold", "0~1 범위")
+        for name in ("direction_dx_threshold", "direction_hysteresis",
+                     "suspicious_lost_frames_penalty", "count_unknown_ema_threshold",
+                     "motion_quality_level", "motion_ransac_reproj_threshold",
+                     "counting_entry_offset", "counting_min_consecutive",
+                     "motion_min_distance", "direction_min_tracks", "lost_buffer_frames",
+                     "lost_buffer_uncounted", "byte_buffer", "detect_motion_threshold",
+                     "dynamic_roi_margin", "dynamic_roi_stable_frames", "dynamic_roi_probe_every"):
+            _check(getattr(self, name) >= 0, name, "0 이상")
+        for name in ("reid_hist_bins", "motion_max_points", "motion_block_size", "trace_length",
+                     "detect_every"):
+            _check(int(getattr(self, name)) == getattr(self, name) and getattr(self, name) > 0,
+                   name, "양의 정수")
+
+    @classmethod
+    def from_dict(cls, d: Mapping) -> "TrackerConfig":
+        """CONFIG dict → TrackerConfig. 모르는 키 (source, output_path 등) 는 무시."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in d.items() if k in names})
+
+    @classmethod
+    def from_benchmark(cls, config: Mapping) -> "TrackerConfig":
+        """benchmark.py 의 CONFIG 키 (tnew_* 등) → TrackerConfig"""
+        # 벤치마크 기본값: ReID / 순서 제약 / 모션 보정 on
+        d = {"use_reid": True, "use_order_constraint": True, "motion_compensation": True}
+        for name, key in _BENCHMARK_KEYS.items():
+            if key in config:
+                d[name] = config[key]
+        return cls(**d)
+
+
+# TrackerConfig 필드 → benchmark.py CONFIG 키
+_BENCHMARK_KEYS: Dict[str, str] = {
+    "conf": "conf",
+    "nms": "iou",
+    "byte_track_activation_threshold": "byte_track_activation_threshold",
+    "byte_minimum_matching_threshold": "byte_minimum_matching_threshold",
+    "byte_buffer": "byte_lost_track_buffer",
+    **{name: f"tnew_{name}" for name in (
+        "max_y_diff", "max_area_ratio", "max_backward_x", "max_movement_unknown",
+        "center_max_dist", "use_reid", "reid_weight", "reid_threshold", "reid_hist_bins",
+        "stage2_gating",
+        "lost_buffer_frames", "lost_buffer_uncounted", "use_order_constraint",
+        "motion_compensation", "motion_max_points", "motion_min_distance",
+        "motion_block_size", "motion_quality_level", "motion_ransac_reproj_threshold",
+        "direction_min_tracks", "direction_dx_threshold", "direction_ema_alpha",
+        "direction_hysteresis", "suspicious_new_match_dist",
+        "suspicious_recover_reid_threshold", "suspicious_lost_frames_penalty",
+        "count_unknown_ema_threshold", "counting_entry_offset",
+        "counting_min_consecutive", "detect_every", "detect_motion_threshold",
+        "detect_uncertainty_threshold", "dynamic_roi", "dynamic_roi_margin",
+        "dynamic_roi_stable_frames", "dynamic_roi_probe_every", "trace_length",
+    )},
+}
+
+
+# ---------------------------------------------------------------------------
+# TrackTable
+# ---------------------------------------------------------------------------
+
+class TrackTable:
+    """StableIdAssigner 트랙 저장소 (struct-of-arrays).
+
+    트랙 하나 = 슬롯 하나. 모든 상태를 미리 할당한 NumPy 컬럼에 보관하고
+    해제된 슬롯은 free list 로 재사용한다 (가득 차면 용량 2배).
+    active / lost 구분과 순서는 StableIdAssigner 가 슬롯 배열로 관리한다.
+
+    컬럼:
+      xyxy, warped_xyxy (C, 4) float32   마지막 검출 박스 / 모션 보정된 매칭용 박스
+      class_id, stable_id (C,) int32
+      tracker_id (C,) int64              ByteTrack ID (-1 = 없음)
+      lost_frames, last_seen_frame, consecutive_frames (C,) int32
+      counted (C,) bool
+      reid (C, F) float32, has_reid (C,) bool   ReID 특징 (없으면 0 행)
+      reid_crop (C,) object              특징 미계산 트랙의 박스 크롭 (필요할 때 특징으로 변환)
+    """
+
+    def __init__(self, capacity: int = 256):
+        self._key_to_slot: Dict[Tuple[int, int], int] = {}
+        self._allocate(capacity, 0)
+
+    def _allocate(self, capacity: int, feat_dim: int):
+        self.capacity = capacity
+        self.xyxy = np.zeros((capacity, 4), dtype=np.float32)
+        self.warped_xyxy = np.zeros((capacity, 4), dtype=np.float32)
+        self.class_id = np.zeros(capacity, dtype=np.int32)
+        self.stable_id = np.zeros(capacity, dtype=np.int32)
+        self.tracker_id = np.full(capacity, -1, dtype=np.int64)
+        self.lost_frames = np.zeros(capacity, dtype=np.int32)
+        self.last_seen_frame = np.zeros(capacity, dtype=np.int32)
+        self.consecutive_frames = np.zeros(capacity, dtype=np.int32)
+        self.counted = np.zeros(capacity, dtype=bool)
+        self.reid = np.zeros((capacity, feat_dim), dtype=np.float32)
+        self.has_reid = np.zeros(capacity, dtype=bool)
+        self.reid_crop = np.full(capacity, None, dtype=object)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # pop() 이 가장 작은 슬롯을 돌려주도록 역순
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._key_to_slot)
+
+    def clear(self):
+        self._key_to_slot.clear()
+        self._allocate(self.capacity, self.reid.shape[1])
+
+    def _grow(self):
+        old = self.capacity
+        new = old * 2
+        for name in ("xyxy", "warped_xyxy", "class_id", "stable_id", "tracker_id",
+                     "lost_frames", "last_seen_frame", "consecutive_frames",
+                     "counted", "reid", "has_reid", "reid_crop", "alive"):
+            col = getattr(self, name)
+            ext = np.zeros((new,) + col.shape[1:], dtype=col.dtype)
+            ext[:old] = col
+            setattr(self, name, ext)
+        self.tracker_id[old:] = -1
+        self.reid_crop[old:] = None
+        self.capacity = new
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    def add(self, class_id: int, stable_id: int) -> int:
+        """새 슬롯 할당 (counted=False, consecutive_frames=0 으로 초기화)"""
+        if not self._free:
+            self._grow()
+        s = self._free.pop()
+        self.class_id[s] = class_id
+        self.stable_id[s] = stable_id
+        self.tracker_id[s] = -1
+        self.lost_frames[s] = 0
+        self.consecutive_frames[s] = 0
+        self.counted[s] = False
+        self.reid[s] = 0
+        self.has_reid[s] = False
+        self.reid_crop[s] = None
+        self.alive[s] = True
+        self._key_to_slot[(class_id, stable_id)] = s
+        return s
+
+    def free(self, slots: np.ndarray):
+        """슬롯 해제. 컬럼 값은 다음 add() 까지 그대로 남는다."""
+        for s in slots.tolist():
+            self.alive[s] = False
+            self.reid_crop[s] = None
+            self._key_to_slot.pop((int(self.class_id[s]), int(self.stable_id[s])), None)
+            self._free.append(s)
+
+    def lookup(self, class_id: int, stable_id: int) -> Optional[int]:
+        return self._key_to_slot.get((class_id, stable_id))
+
+    def keys(self) -> Set[Tuple[int, int]]:
+        """살아있는 트랙의 (class_id, stable_id) 집합"""
+        return set(self._key_to_slot)
+
+    def set_reid(self, s: int, feature: Optional[np.ndarray]):
+        self.reid_crop[s] = None
+        if feature is None:
+            self.reid[s] = 0
+            self.has_reid[s] = False
+            return
+        if self.reid.shape[1] != feature.shape[0]:
+            self.reid = np.zeros((self.capacity, feature.shape[0]), dtype=np.float32)
+            self.has_reid[:] = self.pending_reid(np.arange(self.capacity))
+        self.reid[s] = feature
+        self.has_reid[s] = True
+
+    def set_reid_crop(self, s: int, crop: np.ndarray):
+        """특징 대신 박스 크롭 보관 (has_reid=True, reid 행은 해석 전까지 무효)"""
+        self.reid_crop[s] = crop
+        self.has_reid[s] = True
+
+    def pending_reid(self, slots: np.ndarray) -> np.ndarray:
+        """slots 중 크롭만 있고 특징은 아직 계산되지 않은 슬롯 마스크"""
+        return np.array([c is not None for c in self.reid_crop[slots]], dtype=bool)
+
+    def reid_rows(self, slots: np.ndarray, feat_dim: int) -> np.ndarray:
+        """(len(slots), feat_dim) ReID 행렬. 특징이 없는 트랙은 0 행."""
+        if self.reid.shape[1] != feat_dim:
+            return np.zeros((len(slots), feat_dim), dtype=np.float32)
+        return self.reid[slots]
+
+
+# ---------------------------------------------------------------------------
+# SpatialGrid
+# ---------------------------------------------------------------------------
+
+class SpatialGrid:
+    """균일 격자 공간 인덱스 (게이팅 후보 쌍 생성용).
+
+    셀 크기 = 게이팅 반경 (cell_w, cell_h) 이므로 질의점 셀과 주변 3x3 셀만 보면
+    |dx| <= cell_w, |dy| <= cell_h 인 점을 모두 찾는다. 정확한 거리 검사는 호출 측에서 한다.
+    점 키를 정렬해 두고 셀별 구간을 searchsorted 로 찾아 Python 루프 없이 동작한다.
+    """
+
+    _OFFSETS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+
+    def __init__(self, cell_w: float, cell_h: float):
+        # 경계에서의 부동소수 나눗셈 오차로 이웃 셀을 벗어나지 않도록 약간 여유
+        self.cell_w = max(float(cell_w), 1.0) * (1 + 1e-6)
+        self.cell_h = max(float(cell_h), 1.0) * (1 + 1e-6)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._order = np.empty(0, dtype=np.intp)
+
+    def _cells(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.floor(xs / self.cell_w).astype(np.int64),
+                np.floor(ys / self.cell_h).astype(np.int64))
+
+    @staticmethod
+    def _key(gx: np.ndarray, gy: np.ndarray) -> np.ndarray:
+        return (gx << 32) + (gy + (1 << 31))
+
+    def build(self, xs: np.ndarray, ys: np.ndarray):
+        """점 (xs[i], ys[i]) 로 인덱스 재구성"""
+        keys = self._key(*self._cells(xs, ys))
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+    def query_pairs(self, qx: np.ndarray, qy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """각 질의점 주변 3x3 셀의 점 쌍 (질의 번호, 점 번호). 중복 없음."""
+        gx, gy = self._cells(qx, qy)
+        nk = self._key(gx[:, None] + self._OFFSETS[:, 0], gy[:, None] + self._OFFSETS[:, 1]).ravel()
+        lo = np.searchsorted(self._keys, nk, side="left")
+        counts = np.searchsorted(self._keys, nk, side="right") - lo
+        total = int(counts.sum())
+        q = np.repeat(np.arange(len(qx)).repeat(len(self._OFFSETS)), counts)
+        pos = np.arange(total) + np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        return q, self._order[pos]
+
+
+# ---------------------------------------------------------------------------
+# 프레임 단위 ReID 메모
+# ---------------------------------------------------------------------------
+
+class _FrameReid:
+    """한 프레임 검출들의 ReID 특징을 요청된 검출만 추출해 메모한다."""
+
+    def __init__(self, frame: np.ndarray, xyxy: np.ndarray, bins: int):
+        self.frame = frame
+        self.xyxy = xyxy
+        self.bins = bins
+        self.feats: Optional[np.ndarray] = None
+        self.done = np.zeros(len(xyxy), dtype=bool)
+
+    @property
+    def extracted(self) -> int:
+        return int(self.done.sum())
+
+    def rows(self, idx) -> np.ndarray:
+        """검출 idx 의 (len(idx), F) 특징. 아직 없는 것만 일괄 추출."""
+        idx = np.asarray(idx, dtype=np.intp)
+        todo = np.unique(idx[~self.done[idx]])
+        if len(todo):
+            f = StableIdAssigner._extract_reid_features(self.frame, self.xyxy[todo], self.bins)
+            if self.feats is None:
+                self.feats = np.zeros((len(self.xyxy), f.shape[1]), dtype=np.float32)
+            self.feats[todo] = f
+            self.done[todo] = True
+        return self.feats[idx]
+
+    def crop(self, j: int) -> np.ndarray:
+        """_extract_reid_feature 와 같은 클리핑으로 잘라낸 박스 픽셀 (복사본)"""
+        x1, y1, x2, y2 = self.xyxy[j].astype(int)
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.frame.shape[1], x2), min(self.frame.shape[0], y2)
+        return self.frame[y1:y2, x1:x2].copy()
 
 
 # ---------------------------------------------------------------------------
@@ -72,25 +429,47 @@ class StableIdAssigner:
       3단계: 출구 쪽 신규 객체는 lost track 복구 시도 → 실패 시 새 ID
     """
 
-    def __init__(self, debug: bool = False):
-        self.debug = debug or CONFIG.get("debug", False)
+    # 2단계 헝가리안 한 번에 푸는 최대 행 수 (이보다 크면 연결 성분으로 분해)
+    _SOLVE_CHUNK_ROWS = 64
+
+    def __init__(self, config: Optional[TrackerConfig] = None, debug: bool = False):
+        # config 미지정 시 모듈 CONFIG 로 구성 (스크립트 주입 방식 호환)
+        self.cfg = config if config is not None else TrackerConfig.from_dict(CONFIG)
+        self.debug = debug or self.cfg.debug
         self._next_id: Dict[int, int] = {}
-        self.active_tracks: List[TrackState] = []
-        self.lost_tracks: List[TrackState] = []
+        self.tracks = TrackTable()
+        # 풀별 슬롯 번호 (매칭 우선순위 순서: active 는 검출 순, lost 는 최근 lost 순)
+        self._active_slots = np.empty(0, dtype=np.intp)
+        self._lost_slots = np.empty(0, dtype=np.intp)
+        # (class_id, tracker_id) → 슬롯 목록 (1단계 매칭용 해시 인덱스, 풀 순서 유지)
+        self._active_index: Dict[Tuple[int, int], List[int]] = {}
+        self._lost_index: Dict[Tuple[int, int], List[int]] = {}
 
         self.detected_direction: str = "UNKNOWN"
         self.prev_centers: Dict[int, float] = {}
         self.direction_ema: float = 0.0
         self._last_transform: Optional[np.ndarray] = None
+        # 모션 보정용 꼭짓점 / 변환 결과 버퍼 (트랙 수에 맞춰 재사용)
+        self._warp_pts = np.ones((0, 4, 3), dtype=np.float64)
+        self._warp_out = np.empty((0, 4, 3), dtype=np.float64)
+        # 순서 제약용: (warped 중심 x, pool 순서) 로 정렬한 슬롯 / 슬롯별 순위 (프레임 간 증분 갱신)
+        self._x_order = np.empty(0, dtype=np.intp)
+        self._x_rank = np.zeros(0, dtype=np.intp)
+        self._reid_resolved = 0   # 이번 프레임에 크롭 → 특징으로 해석한 트랙 수 (debug)
 
     def reset(self):
         self._next_id.clear()
-        self.active_tracks = []
-        self.lost_tracks = []
+        self.tracks.clear()
+        self._active_slots = np.empty(0, dtype=np.intp)
+        self._lost_slots = np.empty(0, dtype=np.intp)
+        self._active_index.clear()
+        self._lost_index.clear()
         self.detected_direction = "UNKNOWN"
         self.prev_centers.clear()
         self.direction_ema = 0.0
         self._last_transform = None
+        self._x_order = np.empty(0, dtype=np.intp)
+        self._x_rank = np.zeros(0, dtype=np.intp)
 
     # ------------------------------------------------------------------
     # 내부 유틸
@@ -120,12 +499,11 @@ class StableIdAssigner:
     # ------------------------------------------------------------------
 
     @staticmethod
-    def _extract_reid_feature(frame: np.ndarray, box: np.ndarray) -> np.ndarray:
+    def _extract_reid_feature(frame: np.ndarray, box: np.ndarray, bins: int = 32) -> np.ndarray:
         """HSV 히스토그램 + RGB 평균으로 ReID 특징 추출"""
         x1, y1, x2, y2 = box.astype(int)
         x1, y1 = max(0, x1), max(0, y1)
         x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
-        bins = CONFIG.get("reid_hist_bins", 32)
         if x2 <= x1 or y2 <= y1:
             return np.zeros(bins * 3 + 3, dtype=np.float32)
         crop = frame[y1:y2, x1:x2]
@@ -136,6 +514,56 @@ class StableIdAssigner:
         rgb_mean = crop.mean(axis=(0, 1)) / 255.0
         return np.concatenate([h, s, v, rgb_mean]).astype(np.float32)
 
+    @staticmethod
+    def _extract_reid_features(frame: np.ndarray, boxes: np.ndarray, bins: int = 32) -> np.ndarray:
+        """프레임 내 모든 박스의 ReID 특징을 한 번에 추출 (_extract_reid_feature 와 비트 단위 동일).
+
+        박스 합집합 영역(보통 ROI 띠)만 HSV 로 한 번 변환하고, 히스토그램은 그 뷰에서,
+        RGB 평균은 cv2.sumElems 정수 합으로 구한다 (박스마다 cvtColor · ndarray.mean 제거).
+        """
+        feats = np.zeros((len(boxes), bins * 3 + 3), dtype=np.float32)
+        if len(boxes) == 0:
+            return feats
+
+        b = boxes.astype(int)
+        x1 = np.maximum(b[:, 0], 0)
+        y1 = np.maximum(b[:, 1], 0)
+        x2 = np.minimum(b[:, 2], frame.shape[1])
+        y2 = np.minimum(b[:, 3], frame.shape[0])
+        valid = (x2 > x1) & (y2 > y1)
+        if not valid.any():
+            return feats
+
+        # cvtColor 는 픽셀 단위라 합집합 변환 후 잘라도 크롭별 변환과 결과 동일
+        ox, oy = int(x1[valid].min()), int(y1[valid].min())
+        hsv = cv2.cvtColor(frame[oy:int(y2[valid].max()), ox:int(x2[valid].max())],
+                           cv2.COLOR_BGR2HSV)
+        sums = np.zeros((len(boxes), 3), dtype=np.float64)
+        for i in np.flatnonzero(valid).tolist():
+            bx1, by1, bx2, by2 = int(x1[i]), int(y1[i]), int(x2[i]), int(y2[i])
+            crop = hsv[by1 - oy:by2 - oy, bx1 - ox:bx2 - ox]
+            h = cv2.normalize(cv2.calcHist([crop], [0], None, [bins], [0, 180]), None)
+            s = cv2.normalize(cv2.calcHist([crop], [1], None, [bins], [0, 256]), None)
+            v = cv2.normalize(cv2.calcHist([crop], [2], None, [bins], [0, 256]), None)
+            feats[i, :bins * 3] = np.concatenate([h, s, v]).ravel()
+            sums[i] = cv2.sumElems(frame[by1:by2, bx1:bx2])[:3]
+
+        # uint8 정수 합은 정확 → sum / count 는 crop.mean 과 동일
+        area = ((x2 - x1) * (y2 - y1))[valid].astype(np.float64)
+        feats[valid, bins * 3:] = sums[valid] / area[:, None] / 255.0
+        return feats
+
+    def _resolve_reid(self, slots) -> None:
+        """크롭만 보관 중인 트랙의 특징을 계산 (크롭 = 클리핑된 박스라 원본 프레임 추출과 동일)"""
+        tt = self.tracks
+        bins = self.cfg.reid_hist_bins
+        slots = np.asarray(slots, dtype=np.intp)
+        for s in slots[tt.pending_reid(slots)].tolist():
+            crop = tt.reid_crop[s]
+            box = np.array([0, 0, crop.shape[1], crop.shape[0]], dtype=np.float32)
+            tt.set_reid(s, self._extract_reid_feature(crop, box, bins))
+            self._reid_resolved += 1
+
     @staticmethod
     def _cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
         na, nb = np.linalg.norm(a), np.linalg.norm(b)
@@ -143,6 +571,13 @@ class StableIdAssigner:
             return 0.0
         return float(np.dot(a, b) / (na * nb))
 
+    @staticmethod
+    def _cosine_sim_pairs(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """(K, F) ↔ (K, F) 행별 코사인 유사도. 노름 0 인 행은 0."""
+        denom = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+        return np.divide(np.einsum("ij,ij->i", a, b), denom,
+                         out=np.zeros(denom.shape, dtype=denom.dtype), where=denom > 0)
+
     # ------------------------------------------------------------------
     # Motion compensation
     # ------------------------------------------------------------------
@@ -162,12 +597,31 @@ class StableIdAssigner:
                          warped[:, 0].max(), warped[:, 1].max()], dtype=np.float32)
 
     def _warp_all_tracks(self, transform: Optional[np.ndarray]):
-        valid = transform is not None and isinstance(transform, np.ndarray)
-        for t in self.active_tracks + self.lost_tracks:
-            t.warped_xyxy = self._warp_box(t.xyxy, transform) if valid else t.xyxy.copy()
-
-    def _match_box(self, t: TrackState) -> np.ndarray:
-        return t.warped_xyxy if t.warped_xyxy is not None else t.xyxy
+        tt = self.tracks
+        slots = np.concatenate([self._active_slots, self._lost_slots])
+        if transform is None or not isinstance(transform, np.ndarray):
+            tt.warped_xyxy[slots] = tt.xyxy[slots]
+            return
+        n = len(slots)
+        if n == 0:
+            return
+        # (N, 4, 3) 동차 좌표 꼭짓점을 한 번에 변환 (_warp_box 와 같은 float64 연산 → 결과 동일)
+        if len(self._warp_pts) < n:
+            cap = max(n, tt.capacity)
+            self._warp_pts = np.ones((cap, 4, 3), dtype=np.float64)
+            self._warp_out = np.empty((cap, 4, 3), dtype=np.float64)
+        pts = self._warp_pts[:n]
+        boxes = tt.xyxy[slots]
+        pts[:, :, 0] = boxes[:, [0, 2, 2, 0]]
+        pts[:, :, 1] = boxes[:, [1, 1, 3, 3]]
+        wh = np.matmul(pts, transform.T, out=self._warp_out[:n, :, :transform.shape[0]])
+        if transform.shape != (2, 3):
+            np.divide(wh[:, :, :2], wh[:, :, 2:3], out=wh[:, :, :2])
+        tt.warped_xyxy[slots, :2] = wh[:, :, :2].min(axis=1)
+        tt.warped_xyxy[slots, 2:] = wh[:, :, :2].max(axis=1)
+
+    def _match_box(self, slot: int) -> np.ndarray:
+        return self.tracks.warped_xyxy[slot]
 
     # ------------------------------------------------------------------
     # 구조 제약
@@ -175,62 +629,248 @@ class StableIdAssigner:
 
     def _structural_ok(self, prev_box: np.ndarray, curr_box: np.ndarray) -> bool:
         """y축, 면적, 방향 제약 검사"""
+        cfg = self.cfg
         pcx, pcy = self._center(prev_box)
         ccx, ccy = self._center(curr_box)
 
-        if abs(ccy - pcy) > CONFIG.get("max_y_diff", 100.0):
+        if abs(ccy - pcy) > cfg.max_y_diff:
             return False
 
         pa, ca = self._area(prev_box), self._area(curr_box)
         if pa > 0 and ca > 0:
-            if max(pa, ca) / min(pa, ca) > CONFIG.get("max_area_ratio", 3.0):
+            if max(pa, ca) / min(pa, ca) > cfg.max_area_ratio:
                 return False
 
         direction = self.detected_direction
-        max_back = CONFIG.get("max_backward_x", 50.0)
+        max_back = cfg.max_backward_x
         if direction == "L2R" and ccx < pcx - max_back:
             return False
         if direction == "R2L" and ccx > pcx + max_back:
             return False
         if direction == "UNKNOWN":
-            if abs(ccx - pcx) > CONFIG.get("max_movement_unknown", 300):
+            if abs(ccx - pcx) > cfg.max_movement_unknown:
                 return False
 
         return True
 
     # ------------------------------------------------------------------
-    # Order Constraint (LIS 기반)
+    # 후보 쌍 (prev, det) 연산 — 2단계 게이팅 / 비용
     # ------------------------------------------------------------------
 
+    def _structural_ok_pairs(self, prev_boxes: np.ndarray, curr_boxes: np.ndarray) -> np.ndarray:
+        """_structural_ok 의 벡터화 버전 (prev_boxes[k] ↔ curr_boxes[k], (K, 4) 정렬된 쌍)"""
+        cfg = self.cfg
+        pcx = 0.5 * (prev_boxes[:, 0] + prev_boxes[:, 2])
+        pcy = 0.5 * (prev_boxes[:, 1] + prev_boxes[:, 3])
+        ccx = 0.5 * (curr_boxes[:, 0] + curr_boxes[:, 2])
+        ccy = 0.5 * (curr_boxes[:, 1] + curr_boxes[:, 3])
+
+        ok = np.abs(ccy - pcy) <= cfg.max_y_diff
+
+        pa = ((prev_boxes[:, 2] - prev_boxes[:, 0]) * (prev_boxes[:, 3] - prev_boxes[:, 1])).astype(np.float64)
+        ca = ((curr_boxes[:, 2] - curr_boxes[:, 0]) * (curr_boxes[:, 3] - curr_boxes[:, 1])).astype(np.float64)
+        both_pos = (pa > 0) & (ca > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.maximum(pa, ca) / np.minimum(pa, ca)
+        ok &= ~(both_pos & (ratio > cfg.max_area_ratio))
+
+        direction = self.detected_direction
+        max_back = cfg.max_backward_x
+        if direction == "L2R":
+            ok &= ~(ccx < pcx - max_back)
+        elif direction == "R2L":
+            ok &= ~(ccx > pcx + max_back)
+        elif direction == "UNKNOWN":
+            ok &= np.abs(ccx - pcx) <= cfg.max_movement_unknown
+
+        return ok
+
+    def _gate_pairs(
+        self, prev_slots: np.ndarray, curr_boxes: np.ndarray, radius: float,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """격자 인덱스로 중심 거리 radius 이내 + 구조 제약을 만족하는 후보 쌍만 생성.
+
+        Returns:
+            (pi, ci, dist): prev_slots / curr_boxes 의 행 번호와 중심 거리 (K,)
+        """
+        prev_boxes = self.tracks.warped_xyxy[prev_slots]
+        pcx = 0.5 * (prev_boxes[:, 0] + prev_boxes[:, 2])
+        pcy = 0.5 * (prev_boxes[:, 1] + prev_boxes[:, 3])
+        ccx = 0.5 * (curr_boxes[:, 0] + curr_boxes[:, 2])
+        ccy = 0.5 * (curr_boxes[:, 1] + curr_boxes[:, 3])
+
+        grid = SpatialGrid(radius, min(radius, self.cfg.max_y_diff))
+        grid.build(pcx, pcy)
+        ci, pi = grid.query_pairs(ccx, ccy)
+
+        dist = np.hypot(pcx[pi] - ccx[ci], pcy[pi] - ccy[ci])
+        keep = (dist <= radius) & self._structural_ok_pairs(prev_boxes[pi], curr_boxes[ci])
+        return pi[keep], ci[keep], dist[keep]
+
+    def _all_pairs(
+        self, prev_slots: np.ndarray, curr_boxes: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """모든 (prev, det) 쌍 (prev 행 우선 순서) 의 중심 거리 + 구조 제약 통과 여부 (dense 2단계용).
+
+        Returns:
+            (pi, ci, dist, ok): 쌍 번호 k = pi[k] * len(curr_boxes) + ci[k], (P*D,)
+        """
+        prev_boxes = self.tracks.warped_xyxy[prev_slots]
+        pi, ci = np.divmod(np.arange(len(prev_slots) * len(curr_boxes)), len(curr_boxes))
+        pcx = 0.5 * (prev_boxes[:, 0] + prev_boxes[:, 2])
+        pcy = 0.5 * (prev_boxes[:, 1] + prev_boxes[:, 3])
+        ccx = 0.5 * (curr_boxes[:, 0] + curr_boxes[:, 2])
+        ccy = 0.5 * (curr_boxes[:, 1] + curr_boxes[:, 3])
+
+        dist = np.hypot(pcx[pi] - ccx[ci], pcy[pi] - ccy[ci])
+        return pi, ci, dist, self._structural_ok_pairs(prev_boxes[pi], curr_boxes[ci])
+
+    def _pair_costs(
+        self,
+        prev_slots: np.ndarray,
+        pi: np.ndarray,
+        ci: np.ndarray,
+        dist: np.ndarray,
+        curr_features: Optional[np.ndarray],
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """후보 쌍별 2단계 비용.
+
+        Returns:
+            cost (K,) float64, sim (K,) ReID 유사도 (ReID off 면 None)
+        """
+        if curr_features is None:
+            return dist.astype(np.float64), None
+        prev_feats = self.tracks.reid_rows(prev_slots[pi], curr_features.shape[1])
+        sim = self._cosine_sim_pairs(prev_feats, curr_features[ci])
+        reid_w = self.cfg.reid_weight
+        dn = np.minimum(dist.astype(np.float64) / self.cfg.center_max_dist, 1.0)
+        return (1 - reid_w) * dn + reid_w * (1 - sim.astype(np.float64)), sim
+
     @staticmethod
-    def _apply_order_constraint(
-        matches: List[Tuple[int, int]],
-        all_prev: List[TrackState],
-        curr_xyxy: np.ndarray,
-        prev_indices: List[int],
-        det_indices: List[int],
-    ) -> List[Tuple[int, int]]:
-        if len(matches) < 2:
-            return matches
+    def _solve_dense(n_prev: int, n_det: int, cost: np.ndarray, ok: np.ndarray) -> np.ndarray:
+        """_all_pairs 쌍 전체를 (n_prev, n_det) 행렬 (구조 제약 위반 = 9999) 로 헝가리안.
 
-        data = []
-        for ii, jj in matches:
-            p = all_prev[prev_indices[ii]]
-            pb = p.warped_xyxy if p.warped_xyxy is not None else p.xyxy
-            pcx = 0.5 * (pb[0] + pb[2])
-            ccx = 0.5 * (curr_xyxy[det_indices[jj]][0] + curr_xyxy[det_indices[jj]][2])
-            data.append((pcx, ccx, (ii, jj)))
+        위반 칸에 걸린 강제 매칭도 그대로 반환한다 (수락 여부는 호출 측 거리 · ReID 조건).
 
-        data.sort(key=lambda x: x[0])
-        curr_xs = [d[1] for d in data]
+        Returns:
+            매칭된 쌍 번호 (prev 행 오름차순)
+        """
+        ri, cj = linear_sum_assignment(np.where(ok, cost, 9999.0).reshape(n_prev, n_det))
+        return ri * n_det + cj
 
-        if all(curr_xs[i] <= curr_xs[i + 1] for i in range(len(curr_xs) - 1)):
-            return matches
+    @staticmethod
+    def _solve_block(ks: np.ndarray, r_inv: np.ndarray, c_inv: np.ndarray, cost: np.ndarray) -> np.ndarray:
+        """후보 쌍 ks 의 행/열만으로 만든 작은 행렬 (후보가 아닌 칸 = 9999, 결과에서 제외) 헝가리안"""
+        br, br_inv = np.unique(r_inv[ks], return_inverse=True)
+        bc, bc_inv = np.unique(c_inv[ks], return_inverse=True)
+        mat = np.full((len(br), len(bc)), 9999.0)
+        mat[br_inv, bc_inv] = cost[ks]
+        pair = np.full(mat.shape, -1, dtype=np.intp)
+        pair[br_inv, bc_inv] = ks
+        ri, cj = linear_sum_assignment(mat)
+        k = pair[ri, cj]
+        return k[k >= 0]
+
+    @classmethod
+    def _solve_pairs(cls, pi: np.ndarray, ci: np.ndarray, cost: np.ndarray) -> np.ndarray:
+        """후보 쌍 위의 최소 비용 매칭 (연결 성분 분해).
+
+        후보 그래프 (prev 행 ↔ det 열) 의 연결 성분끼리는 서로 영향을 주지 않는다.
+          - 행 또는 열이 하나뿐인 성분 (1x1 포함): 성분 내 최소 비용 쌍 (벡터화)
+          - 나머지: 성분을 행 수 _SOLVE_CHUNK_ROWS 단위로 묶어 블록 대각 행렬마다 헝가리안
+        행이 _SOLVE_CHUNK_ROWS 이하이면 분해 없이 한 번에 푼다 (결과 동일, 오버헤드만 작음).
+
+        Returns:
+            매칭된 후보 쌍 번호 (prev 행 오름차순)
+        """
+        if len(pi) == 0:
+            return np.empty(0, dtype=np.intp)
+        _, r_inv = np.unique(pi, return_inverse=True)
+        _, c_inv = np.unique(ci, return_inverse=True)
+        nr, nc = int(r_inv.max()) + 1, int(c_inv.max()) + 1
+        if nr <= cls._SOLVE_CHUNK_ROWS:
+            matched_k = cls._solve_block(np.arange(len(pi)), r_inv, c_inv, cost)
+            return matched_k[np.argsort(pi[matched_k], kind="stable")]
+
+        # 연결 성분 라벨 = 성분 내 최소 행 번호 (행 → 열 → 행 최소값 전파 + pointer jumping)
+        label = np.arange(nr)
+        while True:
+            col_label = np.full(nc, nr)
+            np.minimum.at(col_label, c_inv, label[r_inv])
+            new = label.copy()
+            np.minimum.at(new, r_inv, col_label[c_inv])
+            new = new[new]
+            if np.array_equal(new, label):
+                break
+            label = new
+        comp = label[r_inv]
+        n_rows = np.bincount(label, minlength=nr)
+        n_cols = np.bincount(comp[np.unique(c_inv, return_index=True)[1]], minlength=nr)
+
+        matched = []
+        simple = (n_rows[comp] == 1) | (n_cols[comp] == 1)
+        ks = np.flatnonzero(simple)
+        if len(ks):
+            ks = ks[np.lexsort((cost[ks], comp[ks]))]
+            matched.append(ks[np.r_[True, comp[ks][1:] != comp[ks][:-1]]])
+
+        ks = np.flatnonzero(~simple)
+        if len(ks):
+            roots = np.flatnonzero((n_rows >= 2) & (n_cols >= 2))
+            chunk_of = np.zeros(nr, dtype=np.intp)
+            chunk_of[roots] = (np.cumsum(n_rows[roots]) - n_rows[roots]) // cls._SOLVE_CHUNK_ROWS
+            chunk = chunk_of[comp[ks]]
+            order = np.argsort(chunk, kind="stable")
+            ks, chunk = ks[order], chunk[order]
+            for block in np.split(ks, np.flatnonzero(np.diff(chunk)) + 1):
+                matched.append(cls._solve_block(block, r_inv, c_inv, cost))
+
+        matched_k = np.concatenate(matched)
+        return matched_k[np.argsort(pi[matched_k], kind="stable")]
 
-        # LIS (patience sort)
-        n = len(curr_xs)
+    # ------------------------------------------------------------------
+    # Order Constraint (LIS 기반)
+    # ------------------------------------------------------------------
+
+    def _update_x_order(self, pool: np.ndarray):
+        """pool (active → lost 순) 슬롯의 (warped 중심 x, pool 순서) 정렬 순서를 증분 갱신.
+
+        레일 주행 중에는 프레임 간 x 순서가 거의 바뀌지 않으므로 지난 프레임 순서를 이웃 비교로
+        검증만 하고, 새 트랙은 searchsorted 로 끼워 넣는다. 검증 실패 시에만 다시 정렬한다.
+        """
+        tt = self.tracks
+        pos = np.full(tt.capacity, -1, dtype=np.intp)
+        pos[pool] = np.arange(len(pool))
+        cx = np.zeros(tt.capacity, dtype=np.float32)
+        cx[pool] = 0.5 * (tt.warped_xyxy[pool, 0] + tt.warped_xyxy[pool, 2])
+
+        order = self._x_order[pos[self._x_order] >= 0]
+        seen = np.zeros(tt.capacity, dtype=bool)
+        seen[order] = True
+        new = pool[~seen[pool]]
+
+        if not self._x_sorted(order, cx, pos):
+            order = order[np.lexsort((pos[order], cx[order]))]
+        if len(new):
+            new = new[np.lexsort((pos[new], cx[new]))]
+            order = np.insert(order, np.searchsorted(cx[order], cx[new], side="right"), new)
+            if not self._x_sorted(order, cx, pos):   # 같은 x 끼리의 pool 순서만 어긋난 경우
+                order = order[np.lexsort((pos[order], cx[order]))]
+
+        self._x_order = order
+        self._x_rank = np.zeros(tt.capacity, dtype=np.intp)
+        self._x_rank[order] = np.arange(len(order))
+
+    @staticmethod
+    def _x_sorted(order: np.ndarray, cx: np.ndarray, pos: np.ndarray) -> bool:
+        dx = np.diff(cx[order])
+        return bool(np.all((dx > 0) | ((dx == 0) & (np.diff(pos[order]) > 0))))
+
+    @staticmethod
+    def _lis_members(values: List[float]) -> List[int]:
+        """비감소 LIS (patience sort) 에 속하는 인덱스 (오름차순)"""
         tails, lis_pos = [], []
-        for val in curr_xs:
+        for val in values:
             lo, hi = 0, len(tails)
             while lo < hi:
                 mid = (lo + hi) // 2
@@ -244,44 +884,80 @@ class StableIdAssigner:
                 tails[lo] = val
             lis_pos.append(lo)
 
-        lis_len = len(tails)
-        members: Set[int] = set()
-        k = lis_len - 1
-        for i in range(n - 1, -1, -1):
+        members: List[int] = []
+        k = len(tails) - 1
+        for i in range(len(values) - 1, -1, -1):
             if lis_pos[i] == k:
-                members.add(i)
+                members.append(i)
                 k -= 1
                 if k < 0:
                     break
+        return members[::-1]
 
-        return [data[i][2] for i in range(n) if i in members]
+    def _apply_order_constraint(
+        self,
+        matches: List[Tuple[int, int]],
+        prev_slots: np.ndarray,
+        curr_boxes: np.ndarray,
+    ) -> List[Tuple[int, int]]:
+        """matches 의 (ii, jj) 는 prev_slots / curr_boxes 의 행 번호 (2단계 후보 매칭만, 강제 매칭 없음).
+
+        이전 x 순서 (_x_rank) 로 놓았을 때 현재 x 가 역전된 매칭을 LIS 로 제거한다.
+        이웃 비교로 역전 구간만 찾아 그 구간에만 LIS 를 돌린다. 구간 앞쪽은 이후 모든 값 이하,
+        뒤쪽은 이전 모든 값 이상이 되도록 넓히므로 전체 LIS 와 결과가 같다
+        (역전이 많으면 구간 = 전체 → 기존 전체 LIS).
+        """
+        if len(matches) < 2:
+            return matches
+
+        ii = np.array([m[0] for m in matches], dtype=np.intp)
+        jj = np.array([m[1] for m in matches], dtype=np.intp)
+        order = np.argsort(self._x_rank[prev_slots[ii]], kind="stable")
+        cx = 0.5 * (curr_boxes[jj[order], 0] + curr_boxes[jj[order], 2])
+
+        desc = np.flatnonzero(cx[1:] < cx[:-1])
+        if len(desc) == 0:
+            return matches
+
+        l0, r0 = int(desc[0]), int(desc[-1]) + 2
+        lo = int(np.searchsorted(cx[:l0], cx[l0:].min(), side="right"))
+        hi = r0 + int(np.searchsorted(cx[r0:], cx[:r0].max(), side="left"))
+        keep = np.ones(len(cx), dtype=bool)
+        keep[lo:hi] = False
+        keep[[lo + i for i in self._lis_members(cx[lo:hi].tolist())]] = True
+        return [matches[k] for k in order[keep].tolist()]
 
     # ------------------------------------------------------------------
     # 방향 감지
     # ------------------------------------------------------------------
 
     def _update_direction(self):
+        cfg = self.cfg
         camera_dx = 0.0
-        if CONFIG.get("motion_compensation", False) and self._last_transform is not None:
+        if cfg.motion_compensation and self._last_transform is not None:
             t = self._last_transform
             if t.shape[0] >= 2:
                 camera_dx = float(t[0, 2])
 
+        tt = self.tracks
+        act = self._active_slots
+        sids = tt.stable_id[act].tolist()
+        cxs = 0.5 * (tt.xyxy[act, 0] + tt.xyxy[act, 2])
+
         dxs = []
-        for t in self.active_tracks:
-            if t.stable_id in self.prev_centers:
-                cx, _ = self._center(t.xyxy)
-                dxs.append((cx - self.prev_centers[t.stable_id]) - camera_dx)
+        for sid, cx in zip(sids, cxs):
+            if sid in self.prev_centers:
+                dxs.append((cx - self.prev_centers[sid]) - camera_dx)
 
-        if len(dxs) >= CONFIG.get("direction_min_tracks", 3):
+        if len(dxs) >= cfg.direction_min_tracks:
             mean_dx = float(np.mean(dxs))
-            alpha = CONFIG.get("direction_ema_alpha", 0.3)
+            alpha = cfg.direction_ema_alpha
             self.direction_ema = mean_dx if self.direction_ema == 0.0 else (
                 alpha * mean_dx + (1 - alpha) * self.direction_ema
             )
 
-            thr = CONFIG.get("direction_dx_threshold", 5.0)
-            hys = CONFIG.get("direction_hysteresis", 2.0)
+            thr = cfg.direction_dx_threshold
+            hys = cfg.direction_hysteresis
             prev = self.detected_direction
 
             if prev == "L2R":
@@ -300,9 +976,7 @@ class StableIdAssigner:
                 print(f"[DIR] {prev} → {new} (ema={self.direction_ema:.1f}px, n={len(dxs)})")
             self.detected_direction = new
 
-        self.prev_centers = {
-            t.stable_id: self._center(t.xyxy)[0] for t in self.active_tracks
-        }
+        self.prev_centers = dict(zip(sids, cxs))
 
     def _on_entry_side(self, cx: float, roi: Tuple[int, int, int, int]) -> bool:
         mid = (roi[0] + roi[2]) / 2.0
@@ -325,7 +999,11 @@ class StableIdAssigner:
         tracker_ids: Optional[np.ndarray] = None,
         coord_transform: Optional[np.ndarray] = None,
     ) -> np.ndarray:
-        """stable_id 배열 반환. ROI 외부 및 미할당 객체는 -1."""
+        """stable_id 배열 반환. ROI 외부 및 미할당 객체는 -1.
+
+        coord_transform 은 직전 → 이번 프레임 변환 행렬 (2x3 / 3x3, TrackingSession 의
+        FrameResult.frame_motion). MotionEstimator 의 누적 변환 객체가 아니다.
+        """
         n = len(dets)
         if n == 0:
             self._age_lost(frame_idx)
@@ -338,17 +1016,16 @@ class StableIdAssigner:
         classes = dets.class_id.astype(np.int32)
         confs = dets.confidence
         stable = np.full(n, -1, dtype=np.int32)
+        cfg = self.cfg
+        use_order = cfg.use_order_constraint
 
-        # ReID 특징 추출
-        reid_features = None
-        if CONFIG.get("use_reid", False):
-            reid_features = np.array([
-                self._extract_reid_feature(frame, box) for box in xyxy
-            ])
+        # ReID 특징: 2단계 / MID·FAR / 복구가 요청한 검출만 추출 (프레임 내 메모)
+        det_reid = _FrameReid(frame, xyxy, cfg.reid_hist_bins) if cfg.use_reid else None
+        self._reid_resolved = 0
 
         # Motion compensation: 이전 트랙 좌표 워핑
         valid_tf = coord_transform is not None and isinstance(coord_transform, np.ndarray)
-        if CONFIG.get("motion_compensation", False) and valid_tf:
+        if cfg.motion_compensation and valid_tf:
             self._warp_all_tracks(coord_transform)
             self._last_transform = coord_transform
             if self.debug and frame_idx % 100 == 0:
@@ -366,8 +1043,11 @@ class StableIdAssigner:
             in_roi = np.ones(n, dtype=bool)
 
         roi_idx = [j for j in range(n) if in_roi[j]]
-        all_prev = self.active_tracks + self.lost_tracks
-        used_prev: Set[int] = set()
+        tt = self.tracks
+        all_prev = np.concatenate([self._active_slots, self._lost_slots])
+        if use_order:
+            self._update_x_order(all_prev)
+        used_prev = np.zeros(tt.capacity, dtype=bool)
 
         # ---------------------------------------------------------------
         # 1단계: ByteTrack tracker_id 기반 매칭
@@ -378,109 +1058,120 @@ class StableIdAssigner:
                 tid = int(tracker_ids[j])
                 if tid < 0:
                     continue
+                key = (int(classes[j]), tid)
 
                 # active tracks 우선
-                for pi, p in enumerate(self.active_tracks):
-                    if pi in used_prev:
-                        continue
-                    if int(p.class_id) != int(classes[j]):
-                        continue
-                    if p.tracker_id is None or int(p.tracker_id) != tid:
+                for ps in self._active_index.get(key, ()):
+                    if used_prev[ps]:
                         continue
-                    if not self._structural_ok(self._match_box(p), xyxy[j]):
+                    if not self._structural_ok(self._match_box(ps), xyxy[j]):
                         continue
-                    stable[j] = p.stable_id
-                    used_prev.add(pi)
+                    stable[j] = tt.stable_id[ps]
+                    used_prev[ps] = True
                     break
 
                 # active에서 못 찾으면 lost에서 시도 (거리 조건 추가)
                 if stable[j] == -1:
-                    for pi, p in enumerate(self.lost_tracks):
-                        api = pi + len(self.active_tracks)
-                        if api in used_prev:
+                    for ps in self._lost_index.get(key, ()):
+                        if used_prev[ps]:
                             continue
-                        if int(p.class_id) != int(classes[j]):
+                        if self._center_dist(self._match_box(ps), xyxy[j]) > 150:
                             continue
-                        if p.tracker_id is None or int(p.tracker_id) != tid:
+                        if not self._structural_ok(self._match_box(ps), xyxy[j]):
                             continue
-                        if self._center_dist(self._match_box(p), xyxy[j]) > 150:
-                            continue
-                        if not self._structural_ok(self._match_box(p), xyxy[j]):
-                            continue
-                        stable[j] = p.stable_id
-                        used_prev.add(api)
+                        stable[j] = tt.stable_id[ps]
+                        used_prev[ps] = True
                         break
 
         # ---------------------------------------------------------------
         # 2단계: 헝가리안 매칭 (중심 거리 + ReID + 구조 제약)
+        #
+        # 기본: 전체 P x D 행렬 (구조 제약 위반 = 9999) 헝가리안. 강제 · 반경 밖 매칭도 순서 제약
+        # 입력에 들어가고, 수락 여부는 아래 거리 · ReID 조건이 정한다 (벡터화 전 이중 루프와 같은 매칭).
+        #
+        # stage2_gating=True: 격자로 게이팅 반경 이내 + 구조 제약 통과 쌍만 만들어 푼다 (큰 P, D 에서
+        # 빠름). dense 와 다른 점 — 같은 입력에서도 stable ID 결과가 달라질 수 있다:
+        #   1. 구조 제약 위반 쌍은 매칭되지 않음 (dense: 9999 강제 매칭도 50 px 이내면 수락,
+        #      ReID off 면 center_max_dist 이내면 수락)
+        #   2. 반경 밖 · 위반 쌍이 헝가리안에서 행/열을 차지하지 않음 → 남은 후보 쌍 중 고르는
+        #      매칭 자체가 바뀔 수 있음 (dense 는 전체 행렬 최소 비용 해에서 반경 밖 쌍을 버림)
+        #   3. 순서 제약 (LIS) 입력이 후보 매칭뿐 (dense: 강제 · 반경 밖 매칭도 LIS 에 들어가
+        #      수락될 수 없는 매칭이 유효 매칭을 역전으로 밀어낼 수 있음)
+        # ReID 특징은 후보가 있는 검출 · 트랙만 추출한다 (결과에는 영향 없음).
         # ---------------------------------------------------------------
+        use_reid = det_reid is not None
+        max_dist = cfg.center_max_dist
+        reid_thr_mid = cfg.reid_threshold
+        # 아래 수락 조건을 통과할 수 있는 최대 중심 거리 → 게이팅 시 이보다 먼 쌍은 후보로 만들지 않음
+        gate = 300.0 if use_reid else float(max_dist)
+
         for cid in {int(classes[j]) for j in roi_idx}:
-            prev_idx = [i for i, p in enumerate(all_prev)
-                        if p.class_id == cid and i not in used_prev]
+            prev_slots = all_prev[(tt.class_id[all_prev] == cid) & ~used_prev[all_prev]]
             det_idx  = [j for j in roi_idx
                         if classes[j] == cid and stable[j] == -1]
-            if not prev_idx or not det_idx:
+            if len(prev_slots) == 0 or not det_idx:
                 continue
 
-            cost = np.full((len(prev_idx), len(det_idx)), 9999.0)
-            use_reid = CONFIG.get("use_reid", False)
-            reid_w   = CONFIG.get("reid_weight", 0.3)
-            max_dist = CONFIG.get("center_max_dist", 200)
-
-            for ii, pi in enumerate(prev_idx):
-                p = all_prev[pi]
-                pb = self._match_box(p)
-                for jj, dj in enumerate(det_idx):
-                    if not self._structural_ok(pb, xyxy[dj]):
-                        continue
-                    dist = self._center_dist(pb, xyxy[dj])
-                    if use_reid and reid_features is not None:
-                        dn = min(dist / max_dist, 1.0)
-                        sim = self._cosine_sim(p.reid_feature, reid_features[dj]) if p.reid_feature is not None else 0.0
-                        cost[ii, jj] = (1 - reid_w) * dn + reid_w * (1 - sim)
-                    else:
-                        cost[ii, jj] = dist
-
-            ri, ci = linear_sum_assignment(cost)
-            raw = list(zip(ri.tolist(), ci.tolist()))
-
-            if CONFIG.get("use_order_constraint", False) and len(raw) >= 2:
-                valid = self._apply_order_constraint(raw, all_prev, xyxy, prev_idx, det_idx)
+            curr_feats = None
+            if cfg.stage2_gating:
+                pi, ci, pair_dist = self._gate_pairs(prev_slots, xyxy[det_idx], gate)
+                if len(pi) == 0:
+                    continue
+                if use_reid:
+                    self._resolve_reid(prev_slots[np.unique(pi)])
+                    det_arr = np.asarray(det_idx, dtype=np.intp)
+                    det_reid.rows(det_arr[np.unique(ci)])
+                    curr_feats = det_reid.feats[det_arr]   # 후보가 없는 검출 행은 읽히지 않음
+                pair_cost, pair_sim = self._pair_costs(prev_slots, pi, ci, pair_dist, curr_feats)
+                matched_k = self._solve_pairs(pi, ci, pair_cost)
+            else:
+                pi, ci, pair_dist, pair_ok = self._all_pairs(prev_slots, xyxy[det_idx])
+                if use_reid:
+                    self._resolve_reid(prev_slots)
+                    curr_feats = det_reid.rows(det_idx)
+                pair_cost, pair_sim = self._pair_costs(prev_slots, pi, ci, pair_dist, curr_feats)
+                matched_k = self._solve_dense(len(prev_slots), len(det_idx), pair_cost, pair_ok)
+
+            pair_of = {(int(pi[k]), int(ci[k])): int(k) for k in matched_k.tolist()}
+            raw = list(pair_of)
+
+            if use_order and len(raw) >= 2:
+                valid = self._apply_order_constraint(raw, prev_slots, xyxy[det_idx])
                 if self.debug and len(valid) < len(raw):
                     print(f"[ORDER] {len(raw)-len(valid)} match(es) rejected (class={cid})")
             else:
                 valid = raw
 
             for ii, jj in valid:
-                pi, dj = prev_idx[ii], det_idx[jj]
-                p = all_prev[pi]
-                dist = self._center_dist(self._match_box(p), xyxy[dj])
+                ps, dj = int(prev_slots[ii]), det_idx[jj]
+                sid = int(tt.stable_id[ps])
+                k = pair_of[(ii, jj)]
+                dist = float(pair_dist[k])
 
-                if use_reid and reid_features is not None:
+                if use_reid:
                     # 거리 기반 적응적 ReID 임계값
+                    sim = float(pair_sim[k])
                     if dist <= 50:
-                        stable[dj] = p.stable_id
-                        used_prev.add(pi)
+                        stable[dj] = sid
+                        used_prev[ps] = True
                     elif dist <= 200:
-                        sim = self._cosine_sim(p.reid_feature, reid_features[dj]) if p.reid_feature is not None else 0.0
-                        if sim >= CONFIG.get("reid_threshold", 0.5):
-                            stable[dj] = p.stable_id
-                            used_prev.add(pi)
+                        if sim >= reid_thr_mid:
+                            stable[dj] = sid
+                            used_prev[ps] = True
                             if self.debug:
                                 cx, cy = self._center(xyxy[dj])
-                                print(f"[MID] {CLASS_NAMES.get(cid)} #{p.stable_id} ({cx:.0f},{cy:.0f}) dist={dist:.1f} sim={sim:.2f}")
+                                print(f"[MID] {CLASS_NAMES.get(cid)} #{sid} ({cx:.0f},{cy:.0f}) dist={dist:.1f} sim={sim:.2f}")
                     elif dist <= 300:
-                        sim = self._cosine_sim(p.reid_feature, reid_features[dj]) if p.reid_feature is not None else 0.0
                         if sim >= 0.7:
-                            stable[dj] = p.stable_id
-                            used_prev.add(pi)
+                            stable[dj] = sid
+                            used_prev[ps] = True
                             if self.debug:
                                 cx, cy = self._center(xyxy[dj])
-                                print(f"[FAR] {CLASS_NAMES.get(cid)} #{p.stable_id} ({cx:.0f},{cy:.0f}) dist={dist:.1f} sim={sim:.2f}")
+                                print(f"[FAR] {CLASS_NAMES.get(cid)} #{sid} ({cx:.0f},{cy:.0f}) dist={dist:.1f} sim={sim:.2f}")
                 else:
                     if dist <= max_dist:
-                        stable[dj] = p.stable_id
-                        used_prev.add(pi)
+                        stable[dj] = sid
+                        used_prev[ps] = True
 
         # ---------------------------------------------------------------
         # 3단계: 신규 진입 처리 (출구 쪽은 lost 복구 시도 후 신규 ID)
@@ -494,6 +1185,10 @@ class StableIdAssigner:
             self._center(xyxy[item[0]])[1] - self._center(xyxy[item[0]])[0],  # cy - cx
         ))
         used_stable: Set[int] = {int(stable[j]) for j in roi_idx if stable[j] != -1}
+        lost_grid: Optional[SpatialGrid] = None
+        max_rec = cfg.suspicious_new_match_dist
+        reid_thr = cfg.suspicious_recover_reid_threshold
+        lf_pen = cfg.suspicious_lost_frames_penalty
 
         for j, cid in new_entries:
             cx, cy = self._center(xyxy[j])
@@ -508,35 +1203,43 @@ class StableIdAssigner:
             recovered = False
             if suspicious:
                 best, best_cost = None, 1e9
-                max_rec = CONFIG.get("suspicious_new_match_dist", 350)
-                reid_thr = CONFIG.get("suspicious_recover_reid_threshold", 0.35)
-                lf_pen = CONFIG.get("suspicious_lost_frames_penalty", 2.0)
 
-                for p in self.lost_tracks:
-                    if p.stable_id in used_stable or p.class_id != cid:
+                # lost 풀 격자 (첫 의심 객체에서 한 번 구성). 후보는 lost 풀 순서 유지
+                if lost_grid is None:
+                    lost_boxes = tt.warped_xyxy[self._lost_slots]
+                    lost_grid = SpatialGrid(max_rec, min(max_rec, cfg.max_y_diff))
+                    lost_grid.build(0.5 * (lost_boxes[:, 0] + lost_boxes[:, 2]),
+                                    0.5 * (lost_boxes[:, 1] + lost_boxes[:, 3]))
+                _, near = lost_grid.query_pairs(np.array([cx]), np.array([cy]))
+
+                for ps in self._lost_slots[np.sort(near)].tolist():
+                    psid = int(tt.stable_id[ps])
+                    if psid in used_stable or tt.class_id[ps] != cid:
                         continue
-                    if not self._structural_ok(self._match_box(p), xyxy[j]):
+                    if not self._structural_ok(self._match_box(ps), xyxy[j]):
                         continue
-                    dist = self._center_dist(self._match_box(p), xyxy[j])
+                    dist = self._center_dist(self._match_box(ps), xyxy[j])
                     if dist > max_rec:
                         continue
                     c = dist
-                    if CONFIG.get("use_reid", False) and reid_features is not None and p.reid_feature is not None:
-                        sim = self._cosine_sim(p.reid_feature, reid_features[j])
+                    if use_reid and tt.has_reid[ps]:
+                        self._resolve_reid([ps])
+                        sim = self._cosine_sim(tt.reid[ps], det_reid.rows([j])[0])
                         if sim < reid_thr:
                             continue
                         c += (1 - sim) * 100 * 0.5
-                    c += p.lost_frames * lf_pen
+                    c += int(tt.lost_frames[ps]) * lf_pen
                     if c < best_cost:
-                        best_cost, best = c, p
+                        best_cost, best = c, ps
 
                 if best is not None:
-                    stable[j] = best.stable_id
-                    used_stable.add(best.stable_id)
+                    best_sid = int(tt.stable_id[best])
+                    stable[j] = best_sid
+                    used_stable.add(best_sid)
                     recovered = True
                     if self.debug:
                         dist = self._center_dist(self._match_box(best), xyxy[j])
-                        print(f"[RECOVER] {CLASS_NAMES.get(cid)} #{best.stable_id} ({cx:.0f},{cy:.0f}) dist={dist:.1f} cost={best_cost:.1f}")
+                        print(f"[RECOVER] {CLASS_NAMES.get(cid)} #{best_sid} ({cx:.0f},{cy:.0f}) dist={dist:.1f} cost={best_cost:.1f}")
 
             if not recovered:
                 new_id = self._new_id(cid)
@@ -547,13 +1250,64 @@ class StableIdAssigner:
                     print(f"[NEW] {CLASS_NAMES.get(cid)} #{new_id} ({cx:.0f},{cy:.0f}){sfx}")
 
         # 트랙 상태 업데이트
-        self._update_tracks(frame_idx, roi_idx, stable, xyxy, classes, tracker_ids, reid_features, n)
+        self._update_tracks(frame_idx, roi_idx, stable, xyxy, classes, tracker_ids, det_reid, n)
+        if self.debug and det_reid is not None:
+            print(f"[REID] frame={frame_idx} extracted={det_reid.extracted}/{n} "
+                  f"skipped={n - det_reid.extracted} track_resolved={self._reid_resolved}")
         return stable
 
     # ------------------------------------------------------------------
     # 트랙 상태 관리
     # ------------------------------------------------------------------
 
+    def _age_pool(
+        self, slots: np.ndarray, was_active: bool, matched_ids: np.ndarray, reactivated: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """매칭되지 않은 트랙의 lost_frames 증가 + 버퍼 초과분 정리.
+
+        Returns:
+            (keep, drop): 계속 lost 로 유지할 슬롯 / 해제할 슬롯
+        """
+        tt = self.tracks
+        # 매칭된 stable_id 는 클래스와 무관하게 풀에서 제외 (재활성 슬롯만 살아남음)
+        in_matched = np.isin(tt.stable_id[slots], matched_ids)
+        dropped = slots[in_matched & ~np.isin(slots, reactivated)]
+        aged = slots[~in_matched]
+
+        tt.lost_frames[aged] += 1
+        if was_active:
+            tt.consecutive_frames[aged] = 0
+        lim = np.where(tt.counted[aged],
+                       self.cfg.lost_buffer_frames,
+                       self.cfg.lost_buffer_uncounted)
+        alive = tt.lost_frames[aged] <= lim
+        return aged[alive], np.concatenate([dropped, aged[~alive]])
+
+    def _replace_lost_pool(self, newly_lost: np.ndarray, kept_lost: np.ndarray):
+        """lost 풀 = 새로 lost 된 트랙 + 기존 lost 중 유지분. 인덱스는 변경분만 갱신."""
+        tt = self.tracks
+        index = self._lost_index
+        removed = self._lost_slots[~np.isin(self._lost_slots, kept_lost)]
+        for s in removed.tolist():
+            tid = int(tt.tracker_id[s])
+            if tid < 0:
+                continue
+            key = (int(tt.class_id[s]), tid)
+            bucket = index[key]
+            bucket.remove(s)
+            if not bucket:
+                del index[key]
+
+        prepend: Dict[Tuple[int, int], List[int]] = {}
+        for s in newly_lost.tolist():
+            tid = int(tt.tracker_id[s])
+            if tid >= 0:
+                prepend.setdefault((int(tt.class_id[s]), tid), []).append(s)
+        for key, bucket in prepend.items():
+            index[key] = bucket + index.get(key, [])
+
+        self._lost_slots = np.concatenate([newly_lost, kept_lost])
+
     def _update_tracks(
         self,
         frame_idx: int,
@@ -562,265 +1316,465 @@ class StableIdAssigner:
         xyxy: np.ndarray,
         classes: np.ndarray,
         tracker_ids: Optional[np.ndarray],
-        reid_features: Optional[np.ndarray],
+        det_reid: Optional[_FrameReid],
         n: int,
     ):
-        matched_ids = {int(stable[j]) for j in roi_idx if stable[j] != -1}
-        prev_state: Dict[Tuple[int, int], Tuple[bool, int]] = {
-            (t.class_id, t.stable_id): (t.counted, t.consecutive_frames)
-            for t in self.active_tracks + self.lost_tracks
-        }
-
-        new_active = []
-        for j in roi_idx:
-            if stable[j] == -1:
-                continue
-            tid = None
-            if tracker_ids is not None and len(tracker_ids) == n:
-                v = int(tracker_ids[j])
-                if v >= 0:
-                    tid = v
-            sid = int(stable[j])
+        tt = self.tracks
+        has_tid = tracker_ids is not None and len(tracker_ids) == n
+        matched_j = [j for j in roi_idx if stable[j] != -1]
+        matched_ids = np.unique(stable[matched_j]) if matched_j else np.empty(0, dtype=np.int32)
+
+        # 기존 슬롯 재활성 (counted / consecutive_frames 는 슬롯에 그대로 이어짐)
+        existing = [tt.lookup(int(classes[j]), int(stable[j])) for j in matched_j]
+        reactivated = np.array([s for s in existing if s is not None], dtype=np.intp)
+
+        newly_lost, drop_a = self._age_pool(self._active_slots, True, matched_ids, reactivated)
+        kept_lost, drop_l = self._age_pool(self._lost_slots, False, matched_ids, reactivated)
+        self._replace_lost_pool(newly_lost, kept_lost)
+        tt.free(np.concatenate([drop_a, drop_l]))
+
+        new_active: List[int] = []
+        active_index: Dict[Tuple[int, int], List[int]] = {}
+        for j, s in zip(matched_j, existing):
             cid = int(classes[j])
-            prev_counted, prev_consec = prev_state.get((cid, sid), (False, 0))
-            new_active.append(TrackState(
-                stable_id=sid,
-                xyxy=xyxy[j].copy(),
-                class_id=cid,
-                tracker_id=tid,
-                reid_feature=reid_features[j] if reid_features is not None else None,
-                lost_frames=0,
-                last_seen_frame=frame_idx,
-                counted=prev_counted,
-                consecutive_frames=prev_consec + 1,
-            ))
-
-        buf_short = CONFIG.get("lost_buffer_frames", 20)
-        buf_long  = CONFIG.get("lost_buffer_uncounted", 150)
-
-        new_lost = []
-        for t in self.active_tracks:
-            if t.stable_id not in matched_ids:
-                t.lost_frames += 1
-                t.consecutive_frames = 0
-                lim = buf_long if not t.counted else buf_short
-                if t.lost_frames <= lim:
-                    new_lost.append(t)
-        for t in self.lost_tracks:
-            if t.stable_id not in matched_ids:
-                t.lost_frames += 1
-                lim = buf_long if not t.counted else buf_short
-                if t.lost_frames <= lim:
-                    new_lost.append(t)
-
-        self.active_tracks = new_active
-        self.lost_tracks   = new_lost
+            if s is None:
+                s = tt.add(cid, int(stable[j]))
+            tid = int(tracker_ids[j]) if has_tid else -1
+            tid = tid if tid >= 0 else -1
+            tt.xyxy[s] = xyxy[j]
+            tt.warped_xyxy[s] = xyxy[j]
+            tt.tracker_id[s] = tid
+            # 이번 프레임에 추출하지 않은 특징은 크롭만 보관 → 다음에 읽힐 때 계산
+            if det_reid is None:
+                tt.set_reid(s, None)
+            elif det_reid.done[j]:
+                tt.set_reid(s, det_reid.feats[j])
+            else:
+                tt.set_reid_crop(s, det_reid.crop(j))
+            tt.lost_frames[s] = 0
+            tt.last_seen_frame[s] = frame_idx
+            tt.consecutive_frames[s] += 1
+            if tid >= 0:
+                active_index.setdefault((cid, tid), []).append(s)
+            new_active.append(s)
+
+        self._active_slots = np.array(new_active, dtype=np.intp)
+        self._active_index = active_index
         self._update_direction()
 
     def _age_lost(self, frame_idx: int):
         """검출이 없는 프레임에서 lost 트랙 나이 증가"""
-        buf_short = CONFIG.get("lost_buffer_frames", 20)
-        buf_long  = CONFIG.get("lost_buffer_uncounted", 150)
-        new_lost = []
-        for t in self.active_tracks:
-            t.lost_frames += 1
-            t.consecutive_frames = 0
-            if t.lost_frames <= (buf_long if not t.counted else buf_short):
-                new_lost.append(t)
-        for t in self.lost_tracks:
-            t.lost_frames += 1
-            if t.lost_frames <= (buf_long if not t.counted else buf_short):
-                new_lost.append(t)
-        self.active_tracks = []
-        self.lost_tracks   = new_lost
+        none = np.empty(0, dtype=np.intp)
+        newly_lost, drop_a = self._age_pool(self._active_slots, True, none, none)
+        kept_lost, drop_l = self._age_pool(self._lost_slots, False, none, none)
+        self._replace_lost_pool(newly_lost, kept_lost)
+        self.tracks.free(np.concatenate([drop_a, drop_l]))
+        self._active_slots = none
+        self._active_index = {}
 
+    # ------------------------------------------------------------------
+    # 외부 조회 (카운팅용)
+    # ------------------------------------------------------------------
 
-# ---------------------------------------------------------------------------
-# run
-# ---------------------------------------------------------------------------
+    def _active_slot(self, class_id: int, stable_id: int) -> Optional[int]:
+        s = self.tracks.lookup(class_id, stable_id)
+        if s is None or self.tracks.lost_frames[s] != 0:
+            return None
+        return s
 
-def run(
-    source: str = "notebook/rgb.mp4",
-    model_path: Optional[str] = None,
-    roi_half_width: int = 320,
-    output_path: Optional[str] = None,
-    show_window: bool = True,
-    save_results: Optional[str] = None,
-):
-    """
-    토마토 트래킹 실행
+    def consecutive_frames(self, class_id: int, stable_id: int) -> int:
+        """active 트랙의 연속 검출 프레임 수 (active 가 아니면 0)"""
+        s = self._active_slot(class_id, stable_id)
+        return 0 if s is None else int(self.tracks.consecutive_frames[s])
 
-    Args:
-        source:         영상 소스 (0=웹캠, 파일 경로)
-        model_path:     YOLO 모델 경로 (None=기본)
-        roi_half_width: ROI 반폭 픽셀 (None=전체 프레임)
-        output_path:    출력 영상 저장 경로
-        show_window:    창 표시 여부
-        save_results:   CSV/JSON 저장 기본 경로
-    """
-    if model_path is None:
-        model_path = str(
-            Path(__file__).parent.parent / "runs" / "yolo26_custom_tomato" / "trained_yolo26_custom.pt"
-        )
+    def mark_counted(self, class_id: int, stable_id: int):
+        """카운트 완료 표시 → lost 시 짧은 버퍼(lost_buffer_frames) 적용"""
+        s = self._active_slot(class_id, stable_id)
+        if s is not None:
+            self.tracks.counted[s] = True
 
-    model = YOLO(model_path)
-    cap   = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
-    if not cap.isOpened():
-        raise RuntimeError(f"Cannot open: {source}")
+    def alive_keys(self) -> Set[Tuple[int, int]]:
+        """active + lost 트랙의 (class_id, stable_id)"""
+        return self.tracks.keys()
 
-    w   = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    h   = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-
-    # ROI
-    roi = None
-    if roi_half_width:
-        cx = w // 2
-        roi = (max(0, cx - roi_half_width), 0, min(w - 1, cx + roi_half_width), h - 1)
-        print(f"[INFO] ROI: x=[{roi[0]}, {roi[2]}]")
 
-    # ── 클래스별 독립 sv.ByteTrack (basic_bytetracker.py 와 동일 구조) ──────
-    def _make_bytetrack() -> sv.ByteTrack:
-        return sv.ByteTrack(
-            track_activation_threshold=CONFIG.get("byte_track_activation_threshold", 0.25),
-            lost_track_buffer=CONFIG.get("byte_buffer", 30),
-            minimum_matching_threshold=CONFIG.get("byte_minimum_matching_threshold", 0.8),
-            frame_rate=fps,
-        )
-
-    trackers: Dict[int, sv.ByteTrack] = {cid: _make_bytetrack() for cid in CLASS_NAMES}
-    id_assigner = StableIdAssigner()
+# ---------------------------------------------------------------------------
+# 검출 · 클래스별 ByteTrack (run / run_benchmark / track_stream 공용)
+# ---------------------------------------------------------------------------
 
-    # ── Annotators ────────────────────────────────────────────────────────
-    colors    = sv.ColorPalette.from_hex(["#FF0000", "#00CC00"])
-    box_ann   = sv.BoxAnnotator(color=colors, color_lookup=sv.ColorLookup.CLASS)
-    label_ann = sv.LabelAnnotator(
-        color=colors, color_lookup=sv.ColorLookup.CLASS,
-        text_color=sv.Color.WHITE, text_scale=0.42, text_thickness=1, text_padding=4,
-    )
-    trace_ann = sv.TraceAnnotator(
-        color=colors, color_lookup=sv.ColorLookup.CLASS,
-        thickness=2, trace_length=int(CONFIG.get("trace_length", 80)),
+def detect_with_roi(
+    model,
+    frame: np.ndarray,
+    roi: Optional[Tuple[int, int, int, int]],
+    conf: float,
+    nms: float,
+) -> sv.Detections:
+    """ROI 크롭 YOLO 검출 후 전역 좌표로 복원 (roi 가 없으면 전체 프레임)"""
+    if roi is not None:
+        x0, y0, x1, y1 = roi
+        crop = frame[y0:y1 + 1, x0:x1 + 1]
+        if crop.size == 0:
+            return sv.Detections.empty()
+        res = model(crop, conf=conf, verbose=False)[0]
+        dets = sv.Detections.from_ultralytics(res).with_nms(threshold=nms)
+        if len(dets) > 0:
+            off = np.array([x0, y0, x0, y0], dtype=np.float32)
+            dets.xyxy = dets.xyxy + off
+        return dets
+    res = model(frame, conf=conf, verbose=False)[0]
+    return sv.Detections.from_ultralytics(res).with_nms(threshold=nms)
+
+
+def update_class_trackers(trackers: Mapping[int, sv.ByteTrack], all_dets: sv.Detections) -> sv.Detections:
+    """클래스별 ByteTrack 업데이트 후 트랙이 붙은 검출만 합침 (basic_bytetracker.py 방식)"""
+    boxes_l, confs_l, cls_l, tid_l = [], [], [], []
+    for cid, btracker in trackers.items():
+        mask     = all_dets.class_id == cid
+        cls_dets = all_dets[mask]
+        if len(cls_dets) == 0:
+            continue
+        cls_dets = btracker.update_with_detections(cls_dets)
+        if cls_dets.tracker_id is not None and len(cls_dets) > 0:
+            boxes_l.append(cls_dets.xyxy)
+            confs_l.append(cls_dets.confidence)
+            cls_l.append(cls_dets.class_id)
+            tid_l.append(cls_dets.tracker_id)
+
+    if not boxes_l:
+        return sv.Detections.empty()
+    return sv.Detections(
+        xyxy=np.concatenate(boxes_l),
+        confidence=np.concatenate(confs_l),
+        class_id=np.concatenate(cls_l),
+        tracker_id=np.concatenate(tid_l),
     )
 
-    motion_estimator: Optional[MotionEstimator] = None
-    motion_trace_ann: Optional[MotionAwareTraceAnnotator] = None
-    if CONFIG.get("motion_compensation", False):
-        motion_estimator = MotionEstimator(
-            max_points=int(CONFIG.get("motion_max_points", 500)),
-            min_distance=int(CONFIG.get("motion_min_distance", 10)),
-            block_size=int(CONFIG.get("motion_block_size", 3)),
-            quality_level=float(CONFIG.get("motion_quality_level", 0.001)),
-            ransac_reproj_threshold=float(CONFIG.get("motion_ransac_reproj_threshold", 1.0)),
-        )
-        motion_trace_ann = MotionAwareTraceAnnotator(
-            color=colors, color_lookup=sv.ColorLookup.CLASS,
-            thickness=2, trace_length=int(CONFIG.get("trace_length", 80)),
-        )
-
-    writer = None
-    if output_path:
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
 
-    count_ripe, count_unripe = 0, 0
-    frame_log: List[Tuple] = []
-    prev_positions: Dict[Tuple[int, int], float] = {}
-    counted_ids: Set[Tuple[int, int]] = set()
+_UNIT_SQUARE = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]], dtype=np.float32)
 
-    print(f"[INFO] Source: {source} ({w}x{h} @ {fps:.1f}fps)")
-    print(f"[INFO] Model: {model_path}")
-    print(f"[INFO] ByteTrack: activation={CONFIG.get('byte_track_activation_threshold',0.25)}"
-          f" matching={CONFIG.get('byte_minimum_matching_threshold',0.8)}"
-          f" buffer={CONFIG.get('byte_buffer',30)}")
-    print(f"[INFO] ReID: {'on' if CONFIG.get('use_reid') else 'off'}"
-          f" | Motion: {'on' if CONFIG.get('motion_compensation') else 'off'}"
-          f" | Order: {'on' if CONFIG.get('use_order_constraint') else 'off'}")
 
-    fps_avg  = 0.0
-    frame_idx = 0
+def transform_matrix(coord_transform) -> Optional[np.ndarray]:
+    """MotionEstimator.update 결과 → 3x3 행렬 (절대 = 첫 프레임 좌표 → 현재 프레임 좌표).
 
-    while True:
-        t0 = time.perf_counter()
-        ret, frame = cap.read()
-        if not ret:
-            break
+    trackers 2.x 는 CoordinatesTransformation (IdentityTransformation / HomographyTransformation)
+    을 돌려준다. homography_matrix 가 있으면 그대로, 없으면 abs_to_rel 로 단위 사각형 네 점을
+    옮겨 행렬을 구한다. 못 구하면 None.
+    """
+    if coord_transform is None:
+        return None
+    if isinstance(coord_transform, np.ndarray):
+        return coord_transform
+    m = getattr(coord_transform, "homography_matrix", None)
+    if m is not None:
+        return np.asarray(m, dtype=np.float64)
+    if hasattr(coord_transform, "abs_to_rel"):
+        dst = np.asarray(coord_transform.abs_to_rel(_UNIT_SQUARE.astype(np.float64)), dtype=np.float32)
+        return cv2.getPerspectiveTransform(_UNIT_SQUARE, dst).astype(np.float64)
+    return None
+
+
+class DetectionScheduler:
+    """적응형 검출 주기 (detect_every > 1).
+
+    아래 중 하나면 YOLO 를 돌리고, 아니면 직전 프레임 검출 박스를 카메라 변환
+    (직전 프레임 → 이번 프레임, FrameResult.frame_motion) 으로 옮겨 ByteTrack · StableIdAssigner 에 그대로 넣는다.
+      - 마지막 검출 후 detect_every 프레임째
+      - 마지막 검출 후 누적 카메라 이동량 ≥ detect_motion_threshold (px)
+      - motion_compensation 인데 변환을 못 구함 (박스를 옮길 수 없음)
+      - 직전 검출 프레임의 불확실도 ≥ detect_uncertainty_threshold
+        (불확실도 = (새로 생긴 ByteTrack ID + 트랙이 안 붙은 검출) / 검출 수)
+
+    상태는 detect 스테이지 안에서만 읽고 쓰므로 파이프라인 실행에서도 결과가 같다.
+    """
 
-        coord_transform = None
-        if motion_estimator is not None:
-            coord_transform = motion_estimator.update(frame)
+    def __init__(self, cfg: TrackerConfig, roi: Optional[Tuple[int, int, int, int]]):
+        self.cfg = cfg
+        self.roi = roi
+        self.detections = 0     # YOLO 실행 프레임 수
+        self.propagated = 0     # 박스를 옮겨 쓴 프레임 수
+        self.reset()
 
-        # ── YOLO 검출 (ROI 크롭 or 전체 프레임) ──────────────────────────
-        if roi is not None:
-            x0, y0, x1, y1 = roi
-            crop = frame[y0:y1 + 1, x0:x1 + 1]
-            if crop.size == 0:
-                all_dets = sv.Detections.empty()
-            else:
-                res = model(crop, conf=CONFIG.get("conf", 0.5), verbose=False)[0]
-                all_dets = sv.Detections.from_ultralytics(res).with_nms(
-                    threshold=CONFIG.get("nms", 0.3)
-                )
-                if len(all_dets) > 0:
-                    off = np.array([x0, y0, x0, y0], dtype=np.float32)
-                    all_dets.xyxy = all_dets.xyxy + off
+    def reset(self):
+        self.last_dets: Optional[sv.Detections] = None
+        self.since = 0          # 마지막 검출 이후 프레임 수
+        self.motion = 0.0       # 마지막 검출 이후 누적 이동량 (px)
+        self.uncertainty = 1.0
+        self._prev_ids: Set[Tuple[int, int]] = set()
+
+    def should_detect(self, transform: Optional[np.ndarray]) -> bool:
+        cfg = self.cfg
+        if self.last_dets is None or self.since + 1 >= cfg.detect_every:
+            return True
+        if isinstance(transform, np.ndarray):
+            shift = math.hypot(float(transform[0, 2]), float(transform[1, 2]))
+        elif cfg.motion_compensation:
+            return True
         else:
-            res = model(frame, conf=CONFIG.get("conf", 0.5), verbose=False)[0]
-            all_dets = sv.Detections.from_ultralytics(res).with_nms(
-                threshold=CONFIG.get("nms", 0.3)
-            )
+            shift = 0.0
+        if cfg.detect_motion_threshold > 0 and self.motion + shift >= cfg.detect_motion_threshold:
+            return True
+        return 0 < cfg.detect_uncertainty_threshold <= self.uncertainty
 
-        # ── 클래스별 ByteTrack 업데이트 (basic_bytetracker.py 방식) ──────
-        boxes_l, confs_l, cls_l, tid_l = [], [], [], []
-        for cid, btracker in trackers.items():
-            mask     = all_dets.class_id == cid
-            cls_dets = all_dets[mask]
-            if len(cls_dets) == 0:
-                continue
-            cls_dets = btracker.update_with_detections(cls_dets)
-            if cls_dets.tracker_id is not None and len(cls_dets) > 0:
-                boxes_l.append(cls_dets.xyxy)
-                confs_l.append(cls_dets.confidence)
-                cls_l.append(cls_dets.class_id)
-                tid_l.append(cls_dets.tracker_id)
-
-        if boxes_l:
+    @staticmethod
+    def _warp_xyxy(xyxy: np.ndarray, transform: np.ndarray) -> np.ndarray:
+        """(N, 4) 박스 꼭짓점 변환 후 외접 박스 (_warp_box 와 같은 float64 연산)"""
+        pts = np.ones((len(xyxy), 4, 3), dtype=np.float64)
+        pts[:, :, 0] = xyxy[:, [0, 2, 2, 0]]
+        pts[:, :, 1] = xyxy[:, [1, 1, 3, 3]]
+        wh = pts @ transform.T
+        if transform.shape != (2, 3):
+            wh = wh[:, :, :2] / wh[:, :, 2:3]
+        out = np.empty((len(xyxy), 4), dtype=np.float32)
+        out[:, :2] = wh[:, :, :2].min(axis=1)
+        out[:, 2:] = wh[:, :, :2].max(axis=1)
+        return out
+
+    def propagate(self, transform: Optional[np.ndarray]) -> sv.Detections:
+        """직전 검출을 이번 프레임 좌표로 이동 (중심이 ROI 밖으로 나간 박스는 제거)"""
+        dets = self.last_dets
+        if len(dets) > 0 and isinstance(transform, np.ndarray):
             dets = sv.Detections(
-                xyxy=np.concatenate(boxes_l),
-                confidence=np.concatenate(confs_l),
-                class_id=np.concatenate(cls_l),
-                tracker_id=np.concatenate(tid_l),
+                xyxy=self._warp_xyxy(dets.xyxy, transform),
+                confidence=dets.confidence,
+                class_id=dets.class_id,
             )
+            self.motion += math.hypot(float(transform[0, 2]), float(transform[1, 2]))
+            if self.roi is not None:
+                cx = 0.5 * (dets.xyxy[:, 0] + dets.xyxy[:, 2])
+                dets = dets[(cx >= self.roi[0]) & (cx <= self.roi[2])]
+        self.last_dets = dets
+        self.since += 1
+        self.propagated += 1
+        return dets
+
+    def detected(self, all_dets: sv.Detections):
+        self.last_dets = all_dets
+        self.since = 0
+        self.motion = 0.0
+        self.detections += 1
+
+    def observe(self, all_dets: sv.Detections, dets: sv.Detections, detected: bool):
+        """ByteTrack 통과 결과로 불확실도 갱신 (검출 프레임만)"""
+        ids = set()
+        if dets.tracker_id is not None:
+            ids = set(zip(dets.class_id.tolist(), dets.tracker_id.tolist()))
+        if detected:
+            n = len(all_dets)
+            fresh = len(ids - self._prev_ids) + max(0, n - len(dets))
+            self.uncertainty = fresh / n if n else 0.0
+        self._prev_ids = ids
+
+
+class DirectionalRoi:
+    """진행 방향을 따라가는 검출 크롭 (dynamic_roi).
+
+    방향 (L2R / R2L) 이 dynamic_roi_stable_frames 프레임 이상 유지되고 그 방향으로 카운트가
+    한 번 이상 나오면 (LineCounter 가 있을 때, 틀린 방향은 입구 라인이 출구 쪽이라 카운트가 없음) 검출 크롭을
+    입구 쪽 ROI 경계 ~ 입구 라인 + dynamic_roi_margin 으로 좁히고, UNKNOWN 이 되거나
+    방향이 바뀌면 바로 전체 ROI 로 되돌린다. ROI 자체 (카운팅 라인 · ID 할당 범위) 는 그대로.
+
+    좁힌 동안 입구 반대쪽 트랙이 없어 방향 추정이 틀린 채 굳지 않도록, dynamic_roi_probe_every
+    프레임마다 PROBE_FRAMES 프레임은 전체 ROI 로 검출한다.
+
+    방향은 assign 스테이지에서 나오므로 detect 스테이지는 LAG 프레임 전 방향을 쓴다.
+    파이프라인 실행에서도 직렬과 같은 크롭이 되도록 그 프레임의 assign 이 끝날 때까지
+    기다린다 (_WAIT_S 를 넘기면 전체 ROI). 기다리다 포기한 순번은 늦게 publish 돼도 저장하지 않는다.
+    """
+
+    LAG = 2
+    PROBE_FRAMES = 5
+    _WAIT_S = 1.0
+
+    def __init__(self, cfg: TrackerConfig, roi: Tuple[int, int, int, int]):
+        self.cfg = cfg
+        self.roi = roi
+        self.roi_area = 0       # 검출 프레임 누적 ROI 픽셀
+        self.crop_area = 0      # 검출 프레임 누적 실제 크롭 픽셀
+        self._cond = threading.Condition()
+        self._modes: Dict[int, str] = {}   # assign 순번 → 크롭 모드
+        self._published = -1
+        self._consumed = -1                # crop 이 가져간 (또는 포기한) 마지막 assign 순번
+        self._detect_seq = 0
+        self._assign_seq = 0
+        self._reset_seq = 0
+        self._direction = "UNKNOWN"
+        self._run = 0
+        self._counted_before = 0   # 현재 방향이 시작될 때의 누적 카운트
+
+    @staticmethod
+    def _area(box: Tuple[int, int, int, int]) -> int:
+        return (box[2] - box[0] + 1) * (box[3] - box[1] + 1)
+
+    def publish(self, direction: str, reset: bool, counts: Optional[Tuple[int, int]]):
+        """assign 단계 관찰자 뒤: 이번 프레임 방향 · 누적 카운트로 크롭 모드 결정"""
+        counted = sum(counts) if counts is not None else None
+        if reset:
+            self._direction, self._run = "UNKNOWN", 0
+        if direction == self._direction:
+            self._run += 1
         else:
-            dets = sv.Detections.empty()
+            self._direction, self._run = direction, 1
+            self._counted_before = counted or 0
+        stable = (direction != "UNKNOWN" and self._run >= self.cfg.dynamic_roi_stable_frames
+                  and (counted is None or counted > self._counted_before))
+        with self._cond:
+            if self._assign_seq > self._consumed:   # 이미 지나간 순번 (대기 시간 초과) 은 버림
+                self._modes[self._assign_seq] = direction if stable else "UNKNOWN"
+            self._published = self._assign_seq
+            self._cond.notify_all()
+        self._assign_seq += 1
+
+    def crop(self, reset: bool) -> Tuple[int, int, int, int]:
+        """detect 스테이지: 이번 프레임 검출 크롭 (매 프레임 순서대로 호출)"""
+        seq = self._detect_seq
+        self._detect_seq += 1
+        if reset:
+            self._reset_seq = seq
+        ref = seq - self.LAG
+        mode = "UNKNOWN"
+        if ref >= 0:
+            with self._cond:
+                self._cond.wait_for(lambda: self._published >= ref, timeout=self._WAIT_S)
+                m = self._modes.pop(ref, "UNKNOWN")
+                self._consumed = ref
+            if ref >= self._reset_seq:
+                mode = m
+        probe = self.cfg.dynamic_roi_probe_every
+        if probe and seq % probe < self.PROBE_FRAMES:
+            mode = "UNKNOWN"
+
+        x0, y0, x1, y1 = self.roi
+        reach = self.cfg.counting_entry_offset + self.cfg.dynamic_roi_margin
+        if mode == "L2R":
+            return (x0, y0, min(x1, x0 + reach), y1)
+        if mode == "R2L":
+            return (max(x0, x1 - reach), y0, x1, y1)
+        return self.roi
+
+    def record(self, crop: Tuple[int, int, int, int]):
+        """실제로 검출한 프레임의 크롭 면적 누적"""
+        self.roi_area += self._area(self.roi)
+        self.crop_area += self._area(crop)
+
+    @property
+    def crop_ratio(self) -> float:
+        return self.crop_area / self.roi_area if self.roi_area else 1.0
+
+
+def draw_tracks(frame: np.ndarray, dets: sv.Detections, stable_ids: np.ndarray):
+    """stable ID 가 있는 검출 박스 + 라벨을 frame 에 직접 그림 (run_benchmark 출력 영상 형식)"""
+    for i in range(min(len(dets), len(stable_ids))):
+        sid = int(stable_ids[i])
+        if sid == -1:
+            continue
+        cid  = int(dets.class_id[i])
+        x1, y1, x2, y2 = dets.xyxy[i].astype(int)
+        conf_v = float(dets.confidence[i]) if dets.confidence is not None else 0.0
+        color = (60, 80, 255) if cid == 0 else (60, 200, 80)
+        label = f"{CLASS_NAMES.get(cid, cid)} #{sid} {conf_v:.2f}"
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        cv2.rectangle(frame, (x1, y1 - th - 6), (x1 + tw + 2, y1), color, -1)
+        cv2.putText(frame, label, (x1 + 1, y1 - 3),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
 
-        # 유효 클래스 필터
-        if dets.class_id is not None and len(dets) > 0:
-            valid = [i for i, c in enumerate(dets.class_id) if c in CLASS_NAMES]
-            dets = dets[valid]
 
-        # ByteTrack ID 보존 (궤적용)
-        bytetrack_ids = dets.tracker_id.copy() if dets.tracker_id is not None else None
+# ---------------------------------------------------------------------------
+# TrackingSession  (run / run_benchmark / track_stream 공용 프레임 처리 엔진)
+# ---------------------------------------------------------------------------
 
-        # ── Stable ID 발급 ────────────────────────────────────────────────
-        stable_ids = id_assigner.assign(
-            frame_idx, frame, dets, roi=roi,
-            tracker_ids=bytetrack_ids,
-            coord_transform=coord_transform,
-        )
+@dataclass
+class FrameResult:
+    """TrackingSession 프레임 하나의 처리 결과.
+
+    begin → detect → assign 순서로 채워지고, 관찰자가 counts / vis 등을 덧붙인다.
+    파이프라인에서는 다음 프레임이 이미 처리 중일 수 있으므로, 후속 스테이지 관찰자는
+    세션 상태 대신 여기 담긴 스냅샷을 써야 한다.
+    """
+    frame_idx: int                                  # 0부터 (reset 시 0으로)
+    frame: np.ndarray
+    reset: bool = False                             # 이 프레임부터 세션 초기화
+    coord_transform: Optional[object] = None        # MotionEstimator 좌표 변환
+    frame_motion: Optional[np.ndarray] = None       # 직전 → 이번 프레임 변환 행렬 (None = 없음 · 추정 실패)
+    detected: bool = True                           # False = YOLO 대신 직전 박스를 옮겨 씀 (DetectionScheduler)
+    detect_roi: Optional[Tuple[int, int, int, int]] = None   # 실제 검출 크롭 (DirectionalRoi, 없으면 roi)
+    dets: Optional[sv.Detections] = None            # 클래스별 ByteTrack 통과 검출
+    bytetrack_ids: Optional[np.ndarray] = None
+    stable_ids: Optional[np.ndarray] = None         # dets 행별 stable ID (-1 = 없음)
+    direction: str = "UNKNOWN"
+    counts: Optional[Tuple[int, int]] = None        # (ripe, unripe) 누적 카운트 (LineCounter)
+    vis: Optional[np.ndarray] = None                # 시각화 프레임 (그린 경우만)
+    sink_index: int = -1                            # 시각화 스테이지 통과 순번 (= writer write 순번)
+    timings: Dict[str, float] = field(default_factory=dict)   # 스테이지별 처리 시간 (s)
+
+
+class SessionObserver:
+    """TrackingSession 관찰자 (등록 순서대로 호출).
+
+    stage 가 None 이면 assign 직후 같은 스레드에서 호출 (카운터 · MOT 기록처럼 상태 있는 관찰자).
+    이름이 있으면 그 이름의 후속 스테이지에서 호출 (시각화 · 인코딩처럼 결과만 쓰는 관찰자).
+    """
+    stage: Optional[str] = None
+
+    def on_frame(self, session: "TrackingSession", result: FrameResult):
+        pass
+
+    def on_reset(self, session: "TrackingSession"):
+        pass
 
-        # ── 카운팅 ────────────────────────────────────────────────────────
+    def close(self, session: "TrackingSession"):
+        pass
+
+
+class LineCounter(SessionObserver):
+    """입구 라인 통과 카운팅.
+
+    진행 방향 입구 쪽 ROI 경계에서 counting_entry_offset 만큼 들어온 세로선을
+    통과하고 counting_min_consecutive 프레임 이상 연속 추적된 stable ID 를 한 번만 센다.
+    방향 UNKNOWN 이면 ROI 중앙선 + direction_ema 부호로 판단.
+
+    mark_counted=False 면 카운트만 하고 assigner.mark_counted 는 호출하지 않는다
+    (벤치마크용 — 카운트된 트랙의 lost 버퍼가 줄지 않아 stable ID 가 카운팅 없이 돌린 것과 같음).
+    """
+
+    def __init__(self, cfg: TrackerConfig, roi: Optional[Tuple[int, int, int, int]],
+                 mark_counted: bool = True):
+        self.cfg = cfg
+        self.roi = roi
+        self.mark_counted = mark_counted
+        self.count_ripe = 0
+        self.count_unripe = 0
+        self.prev_positions: Dict[Tuple[int, int], float] = {}
+        self.counted_ids: Set[Tuple[int, int]] = set()
+
+    def reset(self):
+        self.count_ripe = self.count_unripe = 0
+        self.prev_positions.clear()
+        self.counted_ids.clear()
+
+    def on_reset(self, session: "TrackingSession"):
+        self.reset()
+
+    def on_frame(self, session: "TrackingSession", result: FrameResult):
+        self.update(session.assigner, result.dets, result.stable_ids)
+        result.counts = (self.count_ripe, self.count_unripe)
+
+    def line_x(self, direction: str) -> int:
+        roi = self.roi
+        if direction == "L2R":
+            return roi[0] + self.cfg.counting_entry_offset
+        if direction == "R2L":
+            return roi[2] - self.cfg.counting_entry_offset
+        return (roi[0] + roi[2]) // 2
+
+    def update(self, assigner: "StableIdAssigner", dets: sv.Detections, stable_ids: np.ndarray):
+        """assign 직후 호출. 통과한 ID 는 assigner.mark_counted 로 표시 (mark_counted=True 일 때)."""
+        cfg, roi = self.cfg, self.roi
+        prev_positions = self.prev_positions
         if roi and len(dets) > 0 and len(stable_ids) > 0:
-            direction    = id_assigner.detected_direction
-            entry_offset = CONFIG.get("counting_entry_offset", 50)
-            min_consec   = CONFIG.get("counting_min_consecutive", 3)
-
-            if direction == "L2R":
-                line_x = roi[0] + entry_offset
-            elif direction == "R2L":
-                line_x = roi[2] - entry_offset
-            else:
-                line_x = (roi[0] + roi[2]) // 2
+            direction  = assigner.detected_direction
+            min_consec = cfg.counting_min_consecutive
+            line_x     = self.line_x(direction)
 
             for i in range(len(dets)):
                 sid = int(stable_ids[i])
@@ -838,68 +1792,430 @@ def run(
                     elif direction == "R2L":
                         crossed = prev_cx > line_x >= cx
                     else:
-                        ema_thr = CONFIG.get("count_unknown_ema_threshold", 3.0)
-                        if abs(id_assigner.direction_ema) >= ema_thr:
-                            if id_assigner.direction_ema > 0:
+                        ema_thr = cfg.count_unknown_ema_threshold
+                        if abs(assigner.direction_ema) >= ema_thr:
+                            if assigner.direction_ema > 0:
                                 crossed = prev_cx < line_x <= cx
                             else:
                                 crossed = prev_cx > line_x >= cx
 
-                    consec = next(
-                        (t.consecutive_frames for t in id_assigner.active_tracks
-                         if t.class_id == cid and t.stable_id == sid), 0
-                    )
-                    if crossed and key not in counted_ids and consec >= min_consec:
+                    consec = assigner.consecutive_frames(cid, sid)
+                    if crossed and key not in self.counted_ids and consec >= min_consec:
                         if cid == 0:
-                            count_ripe += 1
+                            self.count_ripe += 1
                         else:
-                            count_unripe += 1
-                        counted_ids.add(key)
-                        for t in id_assigner.active_tracks:
-                            if t.class_id == cid and t.stable_id == sid:
-                                t.counted = True
-                                break
-                        if CONFIG.get("debug"):
+                            self.count_unripe += 1
+                        self.counted_ids.add(key)
+                        if self.mark_counted:
+                            assigner.mark_counted(cid, sid)
+                        if cfg.debug:
                             print(f"[COUNT] {CLASS_NAMES.get(cid)} #{sid} x={line_x} ({direction}) consec={consec}")
 
                 prev_positions[key] = cx
 
         # 사라진 트랙 위치 정리
-        alive = {(t.class_id, t.stable_id)
-                 for t in id_assigner.active_tracks + id_assigner.lost_tracks}
-        prev_positions = {k: v for k, v in prev_positions.items() if k in alive}
+        alive = assigner.alive_keys()
+        self.prev_positions = {k: v for k, v in prev_positions.items() if k in alive}
+
+
+class TrackingSession:
+    """검출 → 클래스별 ByteTrack → Stable ID 할당 프레임 처리 엔진.
 
-        # ── 디버그 로그 ──────────────────────────────────────────────────
-        if CONFIG.get("debug") and len(stable_ids) > 0:
+    step(frame) 한 번이 프레임 하나를 처리하고 관찰자를 호출한다 (run_benchmark · track_stream).
+    run 처럼 스테이지를 스레드로 나눠 돌릴 때는 stages() 로 같은 처리를 Stage 목록으로 받는다.
+    FrameResult.timings / stage_time 은 스테이지 처리 시간만 잰다 (디코드 · 시각화 · 인코딩 제외).
+
+    Args:
+        cfg:       트래커 설정
+        roi:       검출 ROI (x0, y0, x1, y1), None 이면 전체 프레임
+        model:     YOLO 모델 (broker 가 없을 때)
+        broker:    공유 InferenceBroker (있으면 model 대신 사용, conf / nms 는 broker 설정)
+        cache:     DetectionCache (있으면 YOLO 대신 영상 처음부터 프레임 순서대로 재생,
+                   동적 ROI 크롭은 박스 중심 필터로 근사)
+        fps:       ByteTrack frame_rate
+        observers: SessionObserver 목록 (add_observer 로 추가 가능)
+    """
+
+    STAGES = ("motion", "detect", "assign", "observers")
+
+    def __init__(
+        self,
+        cfg: TrackerConfig,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+        model=None,
+        broker: Optional[InferenceBroker] = None,
+        fps: float = 30.0,
+        observers: Sequence[SessionObserver] = (),
+        cache: Optional[DetectionCache] = None,
+    ):
+        if model is None and broker is None and cache is None:
+            raise ValueError("model, broker 또는 cache 가 필요합니다")
+        self.cfg = cfg
+        self.roi = roi
+        self.model = model
+        self.broker = broker
+        self.cache = cache
+        self.fps = fps
+        self.observers: List[SessionObserver] = list(observers)
+
+        # ── 클래스별 독립 sv.ByteTrack (basic_bytetracker.py 와 동일 구조) ──
+        self.trackers: Dict[int, sv.ByteTrack] = {cid: self._make_bytetrack() for cid in CLASS_NAMES}
+        self.assigner = StableIdAssigner(cfg)
+        self.scheduler: Optional[DetectionScheduler] = None
+        if cfg.detect_every > 1:
+            self.scheduler = DetectionScheduler(cfg, roi)
+        self.directional_roi: Optional[DirectionalRoi] = None
+        if cfg.dynamic_roi and roi is not None:
+            self.directional_roi = DirectionalRoi(cfg, roi)
+        self.motion_estimator: Optional[MotionEstimator] = None
+        if cfg.motion_compensation:
+            self.motion_estimator = MotionEstimator(
+                max_points=int(cfg.motion_max_points),
+                min_distance=int(cfg.motion_min_distance),
+                block_size=int(cfg.motion_block_size),
+                quality_level=float(cfg.motion_quality_level),
+                ransac_reproj_threshold=float(cfg.motion_ransac_reproj_threshold),
+            )
+
+        self.frames = 0
+        self.stage_time: Dict[str, float] = {name: 0.0 for name in self.STAGES}
+        self._next_idx = 0
+        self._prev_abs: Optional[np.ndarray] = None   # 직전 프레임의 누적 카메라 변환 (transform_matrix)
+        self._stream_pos = 0     # detect 에 들어온 프레임 순번 (reset 과 무관, 캐시 재생 위치)
+        self._reset_req = threading.Event()
+
+    def _make_bytetrack(self) -> sv.ByteTrack:
+        cfg = self.cfg
+        return sv.ByteTrack(
+            track_activation_threshold=cfg.byte_track_activation_threshold,
+            lost_track_buffer=cfg.byte_buffer,
+            minimum_matching_threshold=cfg.byte_minimum_matching_threshold,
+            frame_rate=self.fps,
+        )
+
+    def add_observer(self, observer: SessionObserver) -> SessionObserver:
+        self.observers.append(observer)
+        return observer
+
+    def request_reset(self):
+        """다음에 begin 으로 들어오는 프레임부터 전체 초기화 (다른 스레드에서 호출 가능)"""
+        self._reset_req.set()
+
+    def _timed(self, result: FrameResult, name: str, t0: float):
+        dt = time.perf_counter() - t0
+        result.timings[name] = dt
+        self.stage_time[name] += dt
+
+    # ------------------------------------------------------------------
+    # 스테이지 (begin → detect → assign, 순서대로 한 프레임씩)
+    # ------------------------------------------------------------------
+
+    def begin(self, frame: np.ndarray) -> FrameResult:
+        """프레임 번호 발급 + 카메라 모션 추정"""
+        t0 = time.perf_counter()
+        reset = self._reset_req.is_set()
+        if reset:
+            self._reset_req.clear()
+            if self.motion_estimator is not None:
+                self.motion_estimator.reset()
+            self._prev_abs = None
+            self._next_idx = 0
+        result = FrameResult(frame_idx=self._next_idx, frame=frame, reset=reset)
+        self._next_idx += 1
+        if self.motion_estimator is not None:
+            result.coord_transform = self.motion_estimator.update(frame)
+            result.frame_motion = self._frame_motion(result.coord_transform)
+        self._timed(result, "motion", t0)
+        return result
+
+    def _frame_motion(self, coord_transform) -> Optional[np.ndarray]:
+        """직전 프레임 → 이번 프레임 변환 (begin 에서 매 프레임 한 번).
+
+        CoordinatesTransformation 은 첫 프레임 기준 누적 변환이므로 A_t · A_{t-1}⁻¹.
+        ndarray 는 이미 프레임 간 변환 (이전 API) 이라 그대로. 첫 프레임 · 추정 실패는 None.
+        """
+        if isinstance(coord_transform, np.ndarray):
+            return coord_transform
+        cur = transform_matrix(coord_transform)
+        prev, self._prev_abs = self._prev_abs, cur
+        if cur is None or prev is None:
+            return None
+        return cur @ np.linalg.inv(prev)
+
+    def detect(self, result: FrameResult) -> FrameResult:
+        """YOLO 검출 (ROI 크롭 or 전체 프레임, 스킵 프레임은 박스 이동) + 클래스별 ByteTrack"""
+        t0 = time.perf_counter()
+        sched, droi = self.scheduler, self.directional_roi
+        if result.reset:
+            for bt in self.trackers.values():
+                bt.reset()
+            if sched is not None:
+                sched.reset()
+        crop = droi.crop(result.reset) if droi is not None else self.roi
+        result.detect_roi = crop
+        pos = self._stream_pos
+        self._stream_pos += 1
+        motion = result.frame_motion
+        if sched is not None and not sched.should_detect(motion):
+            all_dets = sched.propagate(motion)
+            result.detected = False
+        else:
+            if self.cache is not None:
+                all_dets = self.cache.frame(pos, crop)
+            elif self.broker is not None:
+                all_dets = self.broker.detect(result.frame, crop)
+            else:
+                all_dets = detect_with_roi(self.model, result.frame, crop, self.cfg.conf, self.cfg.nms)
+            if sched is not None:
+                sched.detected(all_dets)
+            if droi is not None:
+                droi.record(crop)
+        dets = update_class_trackers(self.trackers, all_dets)
+        if sched is not None:
+            sched.observe(all_dets, dets, result.detected)
+        result.dets = dets
+        # ByteTrack ID 보존 (궤적용)
+        result.bytetrack_ids = dets.tracker_id.copy() if dets.tracker_id is not None else None
+        self._timed(result, "detect", t0)
+        return result
+
+    def assign(self, result: FrameResult) -> FrameResult:
+        """Stable ID 발급 후 assign 단계 관찰자 (stage=None) 호출"""
+        t0 = time.perf_counter()
+        if result.reset:
+            self.assigner.reset()
+            for obs in self.observers:
+                obs.on_reset(self)
+        dets = result.dets
+        result.stable_ids = self.assigner.assign(
+            result.frame_idx, result.frame, dets, roi=self.roi,
+            tracker_ids=result.bytetrack_ids,
+            coord_transform=result.frame_motion,
+        )
+        result.direction = self.assigner.detected_direction
+        self._timed(result, "assign", t0)
+
+        t0 = time.perf_counter()
+        self.notify(result, None)
+        if self.directional_roi is not None:
+            self.directional_roi.publish(result.direction, result.reset, result.counts)
+        self._timed(result, "observers", t0)
+        self.frames += 1
+
+        if self.cfg.debug and len(result.stable_ids) > 0:
+            stable_ids = result.stable_ids
             r_ids = sorted(int(stable_ids[i]) for i in range(len(dets))
                            if stable_ids[i] != -1 and dets.class_id[i] == 0)
             u_ids = sorted(int(stable_ids[i]) for i in range(len(dets))
                            if stable_ids[i] != -1 and dets.class_id[i] == 1)
-            print(f"[FRAME {frame_idx:04d}] ripe={r_ids} unripe={u_ids}")
+            print(f"[FRAME {result.frame_idx:04d}] ripe={r_ids} unripe={u_ids}")
+        return result
+
+    def notify(self, result: FrameResult, stage: Optional[str]) -> FrameResult:
+        """stage 에 속한 관찰자를 등록 순서대로 호출"""
+        for obs in self.observers:
+            if obs.stage == stage:
+                obs.on_frame(self, result)
+        return result
+
+    def downstream_stages(self) -> List[str]:
+        """assign 뒤에 실행할 관찰자 스테이지 이름 (등록 순서)"""
+        names: List[str] = []
+        for obs in self.observers:
+            if obs.stage is not None and obs.stage not in names:
+                names.append(obs.stage)
+        return names
+
+    def step(self, frame: np.ndarray) -> FrameResult:
+        """프레임 하나 처리 (모든 관찰자 포함)"""
+        result = self.assign(self.detect(self.begin(frame)))
+        for name in self.downstream_stages():
+            self.notify(result, name)
+        return result
+
+    def stages(self) -> List[Stage]:
+        """StagePipeline 용 스테이지 (입력: PrefetchedFrame). step 과 같은 처리를 스테이지별로 나눔."""
+        stages = [
+            Stage("motion", lambda item: self.begin(item.image)),
+            Stage("detect", self.detect),
+            Stage("assign", self.assign),
+        ]
+        for name in self.downstream_stages():
+            stages.append(Stage(name, lambda result, name=name: self.notify(result, name)))
+        return stages
+
+    def close(self):
+        """관찰자 정리 (writer release 등)"""
+        for obs in self.observers:
+            obs.close(self)
+
+    def mean_latency_ms(self) -> Dict[str, float]:
+        """스테이지별 프레임당 평균 처리 시간 (I/O 제외)"""
+        n = self.frames
+        return {k: (1000.0 * v / n if n else 0.0) for k, v in self.stage_time.items()}
+
+    @property
+    def detect_ratio(self) -> float:
+        """YOLO 를 실제로 돌린 프레임 비율 (스케줄러가 없으면 1)"""
+        sched = self.scheduler
+        if sched is None:
+            return 1.0
+        n = sched.detections + sched.propagated
+        return sched.detections / n if n else 1.0
+
+    @property
+    def crop_ratio(self) -> float:
+        """검출 프레임 평균 크롭 면적 / ROI 면적 (동적 ROI 가 없으면 1)"""
+        return self.directional_roi.crop_ratio if self.directional_roi is not None else 1.0
+
+    def format_stats(self) -> str:
+        lat = self.mean_latency_ms()
+        text = ("session " + " ".join(f"{k}={v:.2f}ms" for k, v in lat.items())
+                + f" (total {sum(lat.values()):.2f}ms/frame, {self.frames} frames)")
+        if self.scheduler is not None:
+            text += (f" detect {self.scheduler.detections}/{self.frames} "
+                     f"({100.0 * self.detect_ratio:.0f}%, every≤{self.cfg.detect_every})")
+        if self.directional_roi is not None:
+            text += f" crop {100.0 * self.crop_ratio:.0f}% of ROI"
+        return text
+
+
+# ---------------------------------------------------------------------------
+# 관찰자 (기록 · 시각화 · 출력)
+# ---------------------------------------------------------------------------
+
+class MotRecorder(SessionObserver):
+    """stable ID 가 있는 검출을 MOT 행 (frame_id, track_id, x, y, w, h, conf, class_id) 으로 기록.
+    frame_id 는 1부터 (tracking_result/gt_mot.csv 와 같은 기준)."""
+
+    def __init__(self):
+        self.rows: List[Tuple] = []
+        self.seen_ids: Dict[int, Set[int]] = {cid: set() for cid in CLASS_NAMES}
+
+    def on_frame(self, session: TrackingSession, result: FrameResult):
+        dets, stable_ids = result.dets, result.stable_ids
+        if len(dets) == 0 or len(stable_ids) == 0:
+            return
+        frame_id = result.frame_idx + 1
+        for i in range(len(dets)):
+            sid = int(stable_ids[i])
+            if sid == -1:
+                continue
+            cid  = int(dets.class_id[i])
+            x1, y1, x2, y2 = dets.xyxy[i].astype(int)
+            conf_v = float(dets.confidence[i]) if dets.confidence is not None else 0.0
+            self.seen_ids[cid].add(sid)
+            self.rows.append((frame_id, sid, x1, y1, x2 - x1, y2 - y1, conf_v, cid))
+
+
+class CountLog(SessionObserver):
+    """프레임별 (frame, n_ripe, n_unripe, total_ripe, total_unripe) 기록 (run 의 CSV). LineCounter 뒤에 등록."""
+
+    def __init__(self):
+        self.rows: List[Tuple[int, int, int, int, int]] = []
+
+    def on_reset(self, session: TrackingSession):
+        self.rows.clear()
+
+    def on_frame(self, session: TrackingSession, result: FrameResult):
+        dets = result.dets
+        n_r = int((dets.class_id == 0).sum()) if len(dets) else 0
+        n_u = int((dets.class_id == 1).sum()) if len(dets) else 0
+        total_r, total_u = result.counts or (0, 0)
+        self.rows.append((result.frame_idx, n_r, n_u, total_r, total_u))
+
 
-        # ── 시각화 ────────────────────────────────────────────────────────
-        vis = frame.copy()
+class FrameRenderer(SessionObserver):
+    """시각화 관찰자 기반. sinks 중 하나라도 이 프레임을 원할 때만 render 해서 result.vis 에 담는다
+    (always=True 면 매 프레임, 예: 창 표시)."""
+
+    stage = "annotate"
+
+    def __init__(self, sinks: Sequence["FrameSink"] = (), always: bool = False):
+        self.sinks = list(sinks)
+        self.always = always
+        self._n = 0
+
+    def on_frame(self, session: TrackingSession, result: FrameResult):
+        n, self._n = self._n, self._n + 1
+        result.sink_index = n
+        if self.always or any(s.wants(n) for s in self.sinks):
+            result.vis = self.render(session, result)
+
+    def render(self, session: TrackingSession, result: FrameResult) -> np.ndarray:
+        raise NotImplementedError
+
+
+def _draw_detect_roi(frame: np.ndarray, roi, crop):
+    """동적 ROI 로 좁혀진 검출 크롭 (ROI 와 같으면 그리지 않음)"""
+    if crop is not None and tuple(crop) != tuple(roi):
+        cv2.rectangle(frame, (crop[0], crop[1]), (crop[2], crop[3]), (255, 0, 255), 1)
+
+
+class FrameAnnotator(FrameRenderer):
+    """run 시각화: ROI · 카운팅 라인 · 박스 · 궤적 · 라벨 · HUD (카운트 / 현재 검출 수 / FPS)"""
+
+    def __init__(
+        self,
+        cfg: TrackerConfig,
+        roi: Optional[Tuple[int, int, int, int]],
+        counter: LineCounter,
+        sinks: Sequence["FrameSink"] = (),
+        always: bool = False,
+    ):
+        super().__init__(sinks, always)
+        self.cfg = cfg
+        self.roi = roi
+        self.counter = counter
+        self.fps_avg = 0.0
+        self._last_done: Optional[float] = None
+
+        colors = sv.ColorPalette.from_hex(["#FF0000", "#00CC00"])
+        self.box_ann = sv.BoxAnnotator(color=colors, color_lookup=sv.ColorLookup.CLASS)
+        self.label_ann = sv.LabelAnnotator(
+            color=colors, color_lookup=sv.ColorLookup.CLASS,
+            text_color=sv.Color.WHITE, text_scale=0.42, text_thickness=1, text_padding=4,
+        )
+        self.trace_ann = sv.TraceAnnotator(
+            color=colors, color_lookup=sv.ColorLookup.CLASS,
+            thickness=2, trace_length=int(cfg.trace_length),
+        )
+        self.motion_trace_ann: Optional[MotionAwareTraceAnnotator] = None
+        if cfg.motion_compensation:
+            self.motion_trace_ann = MotionAwareTraceAnnotator(
+                color=colors, color_lookup=sv.ColorLookup.CLASS,
+                thickness=2, trace_length=int(cfg.trace_length),
+            )
+
+    def on_frame(self, session: TrackingSession, result: FrameResult):
+        # 처리량 기준 FPS (파이프라인에서는 프레임 간 완료 간격)
+        now = time.perf_counter()
+        if self._last_done is not None:
+            dt = now - self._last_done
+            fps_now = 1.0 / dt if dt > 0 else 0
+            self.fps_avg = 0.1 * fps_now + 0.9 * self.fps_avg if self.fps_avg else fps_now
+        self._last_done = now
+        super().on_frame(session, result)
+
+    def render(self, session: TrackingSession, result: FrameResult) -> np.ndarray:
+        cfg, roi = self.cfg, self.roi
+        dets, stable_ids, bytetrack_ids = result.dets, result.stable_ids, result.bytetrack_ids
+        vis = result.frame.copy()
 
         if roi:
             cv2.rectangle(vis, (roi[0], roi[1]), (roi[2], roi[3]), (255, 200, 0), 2)
-            direction = id_assigner.detected_direction
-            entry_offset = CONFIG.get("counting_entry_offset", 50)
-            if direction == "L2R":
-                lx = roi[0] + entry_offset
-            elif direction == "R2L":
-                lx = roi[2] - entry_offset
-            else:
-                lx = (roi[0] + roi[2]) // 2
+            lx = self.counter.line_x(result.direction)
             cv2.line(vis, (lx, roi[1]), (lx, roi[3]), (0, 255, 255), 2)
+            _draw_detect_roi(vis, roi, result.detect_roi)
 
-        vis = box_ann.annotate(vis, dets)
+        vis = self.box_ann.annotate(vis, dets)
 
-        if CONFIG.get("show_trace", False) and bytetrack_ids is not None:
+        if cfg.show_trace and bytetrack_ids is not None:
             dets.tracker_id = bytetrack_ids
-            if motion_trace_ann is not None:
-                vis = motion_trace_ann.annotate(vis, dets, coord_transform=coord_transform)
+            if self.motion_trace_ann is not None:
+                vis = self.motion_trace_ann.annotate(vis, dets, coord_transform=result.coord_transform)
             else:
-                vis = trace_ann.annotate(vis, dets)
+                vis = self.trace_ann.annotate(vis, dets)
 
         dets.tracker_id = stable_ids
         labels = []
@@ -907,48 +2223,243 @@ def run(
             cname = CLASS_NAMES.get(int(dets.class_id[i]), "?")
             sid   = int(dets.tracker_id[i])
             labels.append(cname if sid == -1 else f"{cname} #{sid}")
-        vis = label_ann.annotate(vis, dets, labels)
-
-        dt      = time.perf_counter() - t0
-        fps_now = 1.0 / dt if dt > 0 else 0
-        fps_avg = 0.1 * fps_now + 0.9 * fps_avg if fps_avg else fps_now
+        vis = self.label_ann.annotate(vis, dets, labels)
 
+        count_r, count_u = result.counts or (0, 0)
         n_r = int((dets.class_id == 0).sum()) if len(dets) else 0
         n_u = int((dets.class_id == 1).sum()) if len(dets) else 0
-        hud = f"Count: {count_ripe}R/{count_unripe}U | Now: {n_r}R/{n_u}U | FPS: {fps_avg:.1f}"
+        hud = (f"Count: {count_r}R/{count_u}U | "
+               f"Now: {n_r}R/{n_u}U | FPS: {self.fps_avg:.1f}")
         cv2.putText(vis, hud, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        frame_log.append((frame_idx, n_r, n_u, count_ripe, count_unripe))
+        return vis
+
+
+class TrackOverlay(FrameRenderer):
+    """박스 · stable ID 라벨 · ROI 를 프레임에 직접 그림 (run_benchmark / track_stream 출력 영상).
+    counter 가 있으면 카운팅 라인, recorder 가 있으면 고유 ID 수 HUD 도 그린다."""
+
+    def __init__(
+        self,
+        roi: Optional[Tuple[int, int, int, int]],
+        sinks: Sequence["FrameSink"] = (),
+        counter: Optional[LineCounter] = None,
+        recorder: Optional[MotRecorder] = None,
+    ):
+        super().__init__(sinks)
+        self.roi = roi
+        self.counter = counter
+        self.recorder = recorder
+
+    def render(self, session: TrackingSession, result: FrameResult) -> np.ndarray:
+        roi, frame = self.roi, result.frame
+        draw_tracks(frame, result.dets, result.stable_ids)
+        if roi:
+            cv2.rectangle(frame, (roi[0], roi[1]), (roi[2], roi[3]), (255, 200, 0), 2)
+            _draw_detect_roi(frame, roi, result.detect_roi)
+            if self.counter is not None:
+                lx = self.counter.line_x(result.direction)
+                cv2.line(frame, (lx, roi[1]), (lx, roi[3]), (0, 255, 255), 2)
+        if self.recorder is not None:
+            seen = self.recorder.seen_ids
+            for i, text in enumerate([
+                f"[tracker] Frame {result.frame_idx + 1}",
+                f"ripe   IDs: {len(seen[0])}",
+                f"unripe IDs: {len(seen[1])}",
+            ]):
+                y = 30 + i * 28
+                cv2.putText(frame, text, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 0), 3)
+                cv2.putText(frame, text, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (255, 255, 255), 1)
+        return frame
+
+
+class FrameSink(SessionObserver):
+    """시각화 프레임 출력 관찰자 (FrameRenderer 뒤에 등록). wants(n) 이 False 인 프레임은 그리지 않는다."""
+
+    stage = "encode"
+
+    def wants(self, n: int) -> bool:
+        return True
+
+
+class VideoSink(FrameSink):
+    """AsyncVideoWriter 출력. every_nth 로 버려질 프레임은 그리지 않고 skip."""
+
+    def __init__(self, writer: AsyncVideoWriter):
+        self.writer = writer
+
+    def wants(self, n: int) -> bool:
+        return self.writer.accepts(n)
+
+    def on_frame(self, session: TrackingSession, result: FrameResult):
+        if result.vis is not None and self.wants(result.sink_index):
+            self.writer.write(result.vis)
+        else:
+            self.writer.skip()
+
+    def close(self, session: TrackingSession):
+        self.writer.release()
+
+
+class SnapshotSink(FrameSink):
+    """every 프레임마다 시각화 프레임을 JPG 로 저장"""
+
+    def __init__(self, out_dir: str, every: int):
+        self.out_dir = Path(out_dir)
+        self.every = every
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+    def wants(self, n: int) -> bool:
+        return n % self.every == 0
 
-        if writer:
-            writer.write(vis)
+    def on_frame(self, session: TrackingSession, result: FrameResult):
+        if result.vis is not None and self.wants(result.sink_index):
+            cv2.imwrite(str(self.out_dir / f"frame_{result.frame_idx:06d}.jpg"), result.vis)
+
+
+def _default_model_path() -> str:
+    return str(Path(__file__).parent.parent / "runs" / "yolo26_custom_tomato" / "trained_yolo26_custom.pt")
+
+
+def _centered_roi(w: int, h: int, roi_half_width: Optional[int]) -> Optional[Tuple[int, int, int, int]]:
+    if not roi_half_width:
+        return None
+    cx = w // 2
+    return (max(0, cx - roi_half_width), 0, min(w - 1, cx + roi_half_width), h - 1)
+
+
+# ---------------------------------------------------------------------------
+# run
+# ---------------------------------------------------------------------------
+
+def run(
+    source: str = "notebook/rgb.mp4",
+    model_path: Optional[str] = None,
+    roi_half_width: int = 320,
+    output_path: Optional[str] = None,
+    show_window: bool = True,
+    save_results: Optional[str] = None,
+    config: Optional[TrackerConfig] = None,
+    prefetch: int = 4,
+    pipelined: bool = True,
+    encode_policy: str = "block",
+    encode_every_n: int = 1,
+    snapshot_dir: Optional[str] = None,
+    snapshot_every: int = 0,
+):
+    """
+    토마토 트래킹 실행
+
+    Args:
+        source:         영상 소스 (0=웹캠, 파일 경로)
+        model_path:     YOLO 모델 경로 (None=기본)
+        roi_half_width: ROI 반폭 픽셀 (None=전체 프레임)
+        output_path:    출력 영상 저장 경로
+        show_window:    창 표시 여부
+        save_results:   CSV/JSON 저장 기본 경로
+        config:         트래커 설정 (None=모듈 CONFIG 로 구성)
+        prefetch:       백그라운드 디코드 큐 크기 (0=직렬 cap.read)
+        pipelined:      모션 → 검출 → ID 할당 → 시각화 → 인코딩 스테이지를 스레드로 겹쳐 실행
+                        (False=같은 스테이지를 한 스레드에서 직렬 실행, 결과 동일)
+        encode_policy:  영상 저장 큐가 찼을 때 정책 (block / drop_oldest / every_nth)
+        encode_every_n: encode_policy="every_nth" 일 때 N
+        snapshot_dir:   시각화 프레임 JPG 저장 폴더 (snapshot_every 프레임마다, None=저장 안 함)
+        snapshot_every: 스냅샷 간격 (프레임)
+
+    시각화 (ROI · 카운팅 라인 · 박스 · 라벨 · HUD) 는 그 프레임을 쓰는 출력
+    (창 / 영상 저장 / 스냅샷) 이 있을 때만 그린다. 셋 다 없으면 시각화 스테이지 자체를
+    빼고 실행한다 (headless). show_trace 궤적은 실제로 그린 프레임의 위치로만 쌓인다.
+    """
+    cfg = config if config is not None else TrackerConfig.from_dict(CONFIG)
+    if model_path is None:
+        model_path = _default_model_path()
+
+    model = YOLO(model_path)
+    cap   = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open: {source}")
+
+    w   = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    h   = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    # ROI
+    roi = _centered_roi(w, h, roi_half_width)
+    if roi:
+        print(f"[INFO] ROI: x=[{roi[0]}, {roi[2]}]")
+
+    # ── 세션 + 관찰자 (카운팅 → 프레임 로그 → 시각화 → 출력) ─────────────
+    counter   = LineCounter(cfg, roi)
+    count_log = CountLog()
+    session   = TrackingSession(cfg, roi, model=model, fps=fps, observers=[counter, count_log])
+
+    writer: Optional[AsyncVideoWriter] = None
+    sinks: List[FrameSink] = []
+    if output_path:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        writer = AsyncVideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h),
+                                  policy=encode_policy, every_n=encode_every_n)
+        sinks.append(VideoSink(writer))
+    if snapshot_dir and snapshot_every:
+        sinks.append(SnapshotSink(snapshot_dir, snapshot_every))
+    headless = not (show_window or sinks)
+    if not headless:
+        session.add_observer(FrameAnnotator(cfg, roi, counter, sinks, always=show_window))
+    for sink in sinks:
+        session.add_observer(sink)
+
+    print(f"[INFO] Source: {source} ({w}x{h} @ {fps:.1f}fps)")
+    print(f"[INFO] Model: {model_path}")
+    print(f"[INFO] ByteTrack: activation={cfg.byte_track_activation_threshold}"
+          f" matching={cfg.byte_minimum_matching_threshold}"
+          f" buffer={cfg.byte_buffer}")
+    print(f"[INFO] ReID: {'on' if cfg.use_reid else 'off'}"
+          f" | Motion: {'on' if cfg.motion_compensation else 'off'}"
+          f" | Order: {'on' if cfg.use_order_constraint else 'off'}"
+          f" | Pipeline: {'on' if pipelined else 'off'}")
+    if headless:
+        print("[INFO] Headless: 시각화 생략")
+
+    # 스테이지 사이에 공유되는 상태는 FrameResult 에 스냅샷으로 담긴다
+    # (파이프라인에서 assign 이 다음 프레임을 처리하는 동안 annotate 가 이전 프레임을 그림)
+    reader = FramePrefetcher(cap, prefetch)
+    pipe = StagePipeline(reader, session.stages(), capacity=2, threaded=pipelined)
+    total_frames = 0
+    last: Optional[FrameResult] = None
+
+    for result in pipe:
+        last = result
+        total_frames = result.frame_idx + 1
 
         if show_window:
-            cv2.imshow("Tomato Tracker", vis)
+            cv2.imshow("Tomato Tracker", result.vis)
             key = cv2.waitKey(1) & 0xFF
             if key == ord("q"):
+                total_frames = result.frame_idx
                 break
             elif key == ord("r"):
-                for bt in trackers.values():
-                    bt.reset()
-                id_assigner.reset()
-                if motion_estimator is not None:
-                    motion_estimator.reset()
-                count_ripe = count_unripe = 0
-                prev_positions.clear()
-                counted_ids.clear()
-                frame_log.clear()
-                frame_idx = 0
+                session.request_reset()
                 print("[RESET]")
 
-        frame_idx += 1
-
-    cap.release()
-    if writer:
-        writer.release()
+    reader.release()
+    session.close()
     if show_window:
         cv2.destroyAllWindows()
 
+    # 중간 종료 시 파이프라인이 앞서 처리한 프레임은 결과에서 제외 (직렬 실행과 동일)
+    count_ripe, count_unripe = counter.count_ripe, counter.count_unripe
+    frame_log = count_log.rows
+    if last is not None:
+        count_ripe, count_unripe = last.counts
+        del frame_log[last.frame_idx + 1:]   # reset 시 로그도 비워지므로 로그 길이 = frame_idx + 1
+
     print(f"[DONE] ripe={count_ripe}, unripe={count_unripe}")
+    print(f"[INFO] decode wait={reader.mean_wait_ms:.1f}ms/frame (prefetch={reader.capacity})")
+    if writer:
+        print(f"[INFO] {writer.format_stats()}")
+    if pipe.wall_time > 0:
+        print(f"[INFO] wall FPS={pipe.stages[0].items / pipe.wall_time:.1f}")
+    print("[INFO] stage latency / queue depth\n" + pipe.format_stats())
+    print(f"[INFO] {session.format_stats()}")
 
     if save_results:
         base = Path(save_results)
@@ -959,7 +2470,7 @@ def run(
             w_.writerows(frame_log)
         with open(base.with_suffix(".json"), "w", encoding="utf-8") as f:
             json.dump({"total_ripe": count_ripe, "total_unripe": count_unripe,
-                       "total_frames": frame_idx}, f, indent=2)
+                       "total_frames": total_frames}, f, indent=2)
         print(f"[SAVED] {base}.csv / .json")
 
 
@@ -967,10 +2478,13 @@ def run(
 # run_benchmark  (benchmark.py에서 import해서 사용)
 # ---------------------------------------------------------------------------
 
-def run_benchmark(config: dict) -> dict:
+def run_benchmark(config: dict, broker: Optional[InferenceBroker] = None) -> dict:
     """벤치마크용 트래킹 실행 후 benchmark 호환 결과 반환.
 
-    benchmark.py 의 CONFIG 키를 그대로 받아서 내부 CONFIG를 구성합니다.
+    benchmark.py 의 CONFIG 키를 그대로 받아서 TrackerConfig 를 구성합니다.
+    broker 를 넘기면 모델을 따로 로드하지 않고 공유 InferenceBroker 로 검출합니다
+    (같은 프로세스에서 여러 스트림을 스레드로 돌릴 때. conf / nms 는 broker 설정).
+    config["detection_cache"] 가 있으면 YOLO 대신 그 검출 캐시를 재생합니다 (benchmark.py).
 
     Returns:
         dict:
@@ -978,63 +2492,22 @@ def run_benchmark(config: dict) -> dict:
             fps_avg     (float)
             total_frames (int)
             unique_ids  (Dict[int, set]): {class_id: set of stable_ids}
+            counts      (Dict[int, int]): {class_id: 입구 라인 통과 수} (run 과 같은 라인 · 조건, mark_counted 없음)
+            latency_ms  (Dict[str, float]): 스테이지별 프레임당 처리 시간 (디코드 · 인코딩 제외)
+            detect_ratio (float): YOLO 를 실제로 돌린 프레임 비율 (tnew_detect_every > 1 일 때 < 1)
+            crop_ratio  (float): 검출 크롭 면적 / ROI 면적 평균 (tnew_dynamic_roi 일 때 < 1)
+            encode_stats (dict | None)
     """
-    import time as _time
-
-    # benchmark CONFIG 키 → tracker 모듈 CONFIG 키 매핑
-    global CONFIG
-    CONFIG = {
-        "conf":    config.get("conf", 0.5),
-        "nms":     config.get("iou", 0.3),
-        "byte_track_activation_threshold": config.get("byte_track_activation_threshold", 0.25),
-        "byte_minimum_matching_threshold": config.get("byte_minimum_matching_threshold", 0.8),
-        "byte_buffer":             config.get("byte_lost_track_buffer", 30),
-        "max_y_diff":              config.get("tnew_max_y_diff", 100.0),
-        "max_area_ratio":          config.get("tnew_max_area_ratio", 3.0),
-        "max_backward_x":          config.get("tnew_max_backward_x", 50.0),
-        "max_movement_unknown":    config.get("tnew_max_movement_unknown", 300),
-        "center_max_dist":         config.get("tnew_center_max_dist", 200),
-        "use_reid":                config.get("tnew_use_reid", True),
-        "reid_weight":             config.get("tnew_reid_weight", 0.3),
-        "reid_threshold":          config.get("tnew_reid_threshold", 0.5),
-        "reid_hist_bins":          config.get("tnew_reid_hist_bins", 32),
-        "lost_buffer_frames":      config.get("tnew_lost_buffer_frames", 20),
-        "lost_buffer_uncounted":   config.get("tnew_lost_buffer_uncounted", 150),
-        "use_order_constraint":    config.get("tnew_use_order_constraint", True),
-        "motion_compensation":     config.get("tnew_motion_compensation", True),
-        "motion_max_points":       config.get("tnew_motion_max_points", 500),
-        "motion_min_distance":     config.get("tnew_motion_min_distance", 10),
-        "motion_block_size":       config.get("tnew_motion_block_size", 3),
-        "motion_quality_level":    config.get("tnew_motion_quality_level", 0.001),
-        "motion_ransac_reproj_threshold": config.get("tnew_motion_ransac_reproj_threshold", 1.0),
-        "direction_min_tracks":    config.get("tnew_direction_min_tracks", 3),
-        "direction_dx_threshold":  config.get("tnew_direction_dx_threshold", 5.0),
-        "direction_ema_alpha":     config.get("tnew_direction_ema_alpha", 0.3),
-        "direction_hysteresis":    config.get("tnew_direction_hysteresis", 2.0),
-        "suspicious_new_match_dist":          config.get("tnew_suspicious_new_match_dist", 350),
-        "suspicious_recover_reid_threshold":  config.get("tnew_suspicious_recover_reid_threshold", 0.35),
-        "suspicious_lost_frames_penalty":     config.get("tnew_suspicious_lost_frames_penalty", 2.0),
-        "count_unknown_ema_threshold":        config.get("tnew_count_unknown_ema_threshold", 3.0),
-        "counting_entry_offset":              config.get("tnew_counting_entry_offset", 50),
-        "counting_min_consecutive":           config.get("tnew_counting_min_consecutive", 3),
-        "trace_length":            config.get("tnew_trace_length", 80),
-        "debug":                   False,
-    }
-
-    import supervision as sv
-    from trackers import MotionEstimator
+    # benchmark CONFIG 키 → TrackerConfig (모듈 CONFIG 는 건드리지 않음)
+    cfg = TrackerConfig.from_benchmark(config)
 
-    source    = config.get("source", "notebook/rgb.mp4")
-    model_path = config.get("model_path", None)
-    roi_hw    = config.get("tnew_roi_half_width", 320)
+    source     = config.get("source", "notebook/rgb.mp4")
+    model_path = config.get("model_path", None) or _default_model_path()
+    roi_hw     = config.get("tnew_roi_half_width", 320)
     output_path = config.get("output_path")
 
-    if model_path is None:
-        model_path = str(
-            Path(__file__).parent.parent / "runs" / "yolo26_custom_tomato" / "trained_yolo26_custom.pt"
-        )
-
-    model = YOLO(model_path)
+    cache = DetectionCache.load(config["detection_cache"]) if config.get("detection_cache") else None
+    model = YOLO(model_path) if broker is None and cache is None else None
     vid   = int(source) if str(source).isdigit() else source
     cap   = cv2.VideoCapture(vid)
     if not cap.isOpened():
@@ -1043,147 +2516,58 @@ def run_benchmark(config: dict) -> dict:
     w_   = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     h_   = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps_ = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    roi  = _centered_roi(w_, h_, roi_hw)
+    if cache is not None:
+        cache.check(w_, h_, roi)
+        print(f"[tracker] {cache.format_stats()}")
 
-    roi = None
-    if roi_hw:
-        cx_ = w_ // 2
-        roi = (max(0, cx_ - roi_hw), 0, min(w_ - 1, cx_ + roi_hw), h_ - 1)
-
-    def _make_bt():
-        return sv.ByteTrack(
-            track_activation_threshold=CONFIG.get("byte_track_activation_threshold", 0.25),
-            lost_track_buffer=CONFIG.get("byte_buffer", 30),
-            minimum_matching_threshold=CONFIG.get("byte_minimum_matching_threshold", 0.8),
-            frame_rate=fps_,
-        )
-
-    trackers_bt  = {cid: _make_bt() for cid in CLASS_NAMES}
-    id_assigner  = StableIdAssigner()
-    motion_est: Optional[MotionEstimator] = None
-    if CONFIG.get("motion_compensation", False):
-        motion_est = MotionEstimator(
-            max_points=int(CONFIG.get("motion_max_points", 500)),
-            min_distance=int(CONFIG.get("motion_min_distance", 10)),
-            block_size=int(CONFIG.get("motion_block_size", 3)),
-            quality_level=float(CONFIG.get("motion_quality_level", 0.001)),
-            ransac_reproj_threshold=float(CONFIG.get("motion_ransac_reproj_threshold", 1.0)),
-        )
+    counter  = LineCounter(cfg, roi, mark_counted=False)
+    recorder = MotRecorder()
+    session  = TrackingSession(cfg, roi, model=model, broker=broker, fps=fps_,
+                               observers=[counter, recorder], cache=cache)
 
-    writer_ = None
+    writer_: Optional[AsyncVideoWriter] = None
     if output_path:
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        writer_ = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps_, (w_, h_))
-
-    seen_ids: Dict[int, set] = {cid: set() for cid in CLASS_NAMES}
-    mot_rows = []
-    frame_idx_, fps_acc = 0, 0.0
+        writer_ = writer_from_config(output_path, fps_, (w_, h_), config)
+        sink = VideoSink(writer_)
+        session.add_observer(TrackOverlay(roi, [sink], recorder=recorder))
+        session.add_observer(sink)
 
+    fps_acc = 0.0
     print(f"[tracker] 시작...")
+    reader = FramePrefetcher(cap, config.get("prefetch_frames", 4))
 
     while True:
-        t0 = _time.perf_counter()
-        ret, frame = cap.read()
+        t0 = time.perf_counter()
+        ret, frame = reader.read()
         if not ret:
             break
-        frame_idx_ += 1
-
-        coord_tf = motion_est.update(frame) if motion_est else None
-
-        if roi is not None:
-            x0_, y0_, x1_, y1_ = roi
-            crop = frame[y0_:y1_ + 1, x0_:x1_ + 1]
-            if crop.size == 0:
-                all_dets = sv.Detections.empty()
-            else:
-                res = model(crop, conf=CONFIG.get("conf", 0.5), verbose=False)[0]
-                all_dets = sv.Detections.from_ultralytics(res).with_nms(
-                    threshold=CONFIG.get("nms", 0.3)
-                )
-                if len(all_dets) > 0:
-                    off = np.array([x0_, y0_, x0_, y0_], dtype=np.float32)
-                    all_dets.xyxy = all_dets.xyxy + off
-        else:
-            res = model(frame, conf=CONFIG.get("conf", 0.5), verbose=False)[0]
-            all_dets = sv.Detections.from_ultralytics(res).with_nms(
-                threshold=CONFIG.get("nms", 0.3)
-            )
-
-        boxes_l, confs_l, cls_l, tid_l = [], [], [], []
-        for cid, trk in trackers_bt.items():
-            mask = all_dets.class_id == cid
-            cd   = all_dets[mask]
-            if len(cd) == 0:
-                continue
-            cd = trk.update_with_detections(cd)
-            if cd.tracker_id is not None and len(cd) > 0:
-                boxes_l.append(cd.xyxy)
-                confs_l.append(cd.confidence)
-                cls_l.append(cd.class_id)
-                tid_l.append(cd.tracker_id)
-
-        if boxes_l:
-            dets = sv.Detections(
-                xyxy=np.concatenate(boxes_l),
-                confidence=np.concatenate(confs_l),
-                class_id=np.concatenate(cls_l),
-                tracker_id=np.concatenate(tid_l),
-            )
-        else:
-            dets = sv.Detections.empty()
+        session.step(frame)
 
-        bt_ids     = dets.tracker_id.copy() if dets.tracker_id is not None else None
-        stable_ids = id_assigner.assign(
-            frame_idx_, frame, dets, roi=roi,
-            tracker_ids=bt_ids, coord_transform=coord_tf,
-        )
-
-        if len(dets) > 0 and len(stable_ids) > 0:
-            for i in range(len(dets)):
-                sid = int(stable_ids[i])
-                if sid == -1:
-                    continue
-                cid  = int(dets.class_id[i])
-                x1, y1, x2, y2 = dets.xyxy[i].astype(int)
-                conf_v = float(dets.confidence[i]) if dets.confidence is not None else 0.0
-                seen_ids[cid].add(sid)
-                mot_rows.append((frame_idx_, sid, x1, y1, x2 - x1, y2 - y1, conf_v, cid))
-
-                if writer_:
-                    color = (60, 80, 255) if cid == 0 else (60, 200, 80)
-                    label = f"{CLASS_NAMES.get(cid, cid)} #{sid} {conf_v:.2f}"
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-                    cv2.rectangle(frame, (x1, y1 - th - 6), (x1 + tw + 2, y1), color, -1)
-                    cv2.putText(frame, label, (x1 + 1, y1 - 3),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-        if writer_:
-            if roi:
-                cv2.rectangle(frame, (roi[0], roi[1]), (roi[2], roi[3]), (255, 200, 0), 2)
-            for i, text in enumerate([
-                f"[tracker] Frame {frame_idx_}",
-                f"ripe   IDs: {len(seen_ids[0])}",
-                f"unripe IDs: {len(seen_ids[1])}",
-            ]):
-                y = 30 + i * 28
-                cv2.putText(frame, text, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 0), 3)
-                cv2.putText(frame, text, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (255, 255, 255), 1)
-            writer_.write(frame)
-
-        elapsed = _time.perf_counter() - t0
+        elapsed = time.perf_counter() - t0
         fps_now  = 1.0 / elapsed if elapsed > 0 else 0
         fps_acc  = 0.1 * fps_now + 0.9 * fps_acc if fps_acc else fps_now
 
-    cap.release()
-    if writer_:
-        writer_.release()
+    reader.release()
+    session.close()
 
-    print(f"[tracker] 완료 | {frame_idx_}프레임 | FPS={fps_acc:.1f} | "
-          f"ripe={len(seen_ids[0])} unripe={len(seen_ids[1])}")
+    seen_ids = recorder.seen_ids
+    print(f"[tracker] 완료 | {session.frames}프레임 | FPS={fps_acc:.1f} | "
+          f"ripe={len(seen_ids[0])} unripe={len(seen_ids[1])} | "
+          f"decode wait={reader.mean_wait_ms:.1f}ms/frame (prefetch={reader.capacity})")
+    print(f"[tracker] {session.format_stats()}")
+    if writer_:
+        print(f"[tracker] {writer_.format_stats()}")
 
     return {
-        "mot_rows":     mot_rows,
+        "mot_rows":     recorder.rows,
         "fps_avg":      fps_acc,
-        "total_frames": frame_idx_,
+        "total_frames": session.frames,
         "unique_ids":   seen_ids,
+        "counts":       {0: counter.count_ripe, 1: counter.count_unripe},
+        "latency_ms":   session.mean_latency_ms(),
+        "detect_ratio": session.detect_ratio,
+        "crop_ratio":   session.crop_ratio,
+        "encode_stats": writer_.stats() if writer_ else None,
     }
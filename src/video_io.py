@@ -0,0 +1,337 @@
+"""
+영상 입출력 유틸
+
+FramePrefetcher:
+  cv2.VideoCapture 디코딩을 백그라운드 스레드에서 미리 수행하는 bounded-queue 리더.
+  메인 루프 (YOLO · 모션 추정 · ID 할당) 와 디코딩이 겹쳐 돌아가므로
+  디코드 시간이 프레임 처리 시간에 그대로 더해지지 않는다.
+  큐가 가득 차면 디코더가 멈춰 기다린다 (backpressure, 프레임 드롭 없음).
+
+사용법:
+  reader = FramePrefetcher(cap, capacity=4)
+  while True:
+      ret, frame = reader.read()      # cap.read() 와 같은 형태
+      if not ret:
+          break
+  reader.release()                    # 스레드 정지 후 cap.release()
+
+AsyncVideoWriter:
+  cv2.VideoWriter 인코딩을 별도 스레드로 옮긴 쓰기 싱크 (bounded queue).
+  큐가 가득 찼을 때 정책:
+    "block"        기다림 (프레임 손실 없음, 기존 결과와 동일)
+    "drop_oldest"  가장 오래된 대기 프레임을 버리고 넣음 (루프는 멈추지 않음)
+    "every_nth"    N 프레임마다 하나만 인코딩 (나머지는 큐에 넣지 않음), 넣을 때는 block
+  인코딩 시간은 stats 로 따로 집계되므로 루프 FPS 에 디스크·코덱 비용이 섞이지 않는다.
+  write() 로 넘긴 프레임은 인코딩될 때까지 수정하지 말 것 (복사하지 않음).
+"""
+
+import queue
+import threading
+import time
+from typing import Mapping, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+_END = object()
+
+# 타임스탬프 종류
+#   None        : 기록 안 함
+#   "pos_msec"  : 영상 내 위치 (CAP_PROP_POS_MSEC, ms)
+#   "wall"      : 디코드 완료 시각 (time.perf_counter, s)
+TIMESTAMP_MODES = (None, "pos_msec", "wall")
+
+
+class PrefetchedFrame(NamedTuple):
+    index: int                    # 0부터 시작하는 디코드 순번
+    image: np.ndarray
+    timestamp: Optional[float]    # TIMESTAMP_MODES 참고
+
+
+class FramePrefetcher:
+    """백그라운드 스레드 프레임 디코더 (bounded queue + backpressure).
+
+    Args:
+        cap:        열린 cv2.VideoCapture. release() 시 함께 해제한다.
+        capacity:   미리 디코드해 둘 최대 프레임 수. 0 이면 스레드 없이 동기 read (기존 루프와 동일).
+        timestamps: None / "pos_msec" / "wall"
+
+    stats:
+        frames       소비한 프레임 수
+        wait_time    소비자가 프레임을 기다린 총 시간 (s). 직렬 루프에서는 = 디코드 시간
+    """
+
+    _STOP_POLL_SEC = 0.1   # 큐가 가득 찼을 때 정지 요청 확인 주기
+
+    def __init__(
+        self,
+        cap: cv2.VideoCapture,
+        capacity: int = 4,
+        timestamps: Optional[str] = None,
+    ):
+        if capacity < 0:
+            raise ValueError(f"capacity 는 0 이상이어야 합니다 ({capacity})")
+        if timestamps not in TIMESTAMP_MODES:
+            raise ValueError(f"timestamps 는 {TIMESTAMP_MODES} 중 하나여야 합니다 ({timestamps!r})")
+        self.cap = cap
+        self.capacity = capacity
+        self.timestamps = timestamps
+        self.frames = 0
+        self.wait_time = 0.0
+
+        self._decoded = 0
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._eof = False
+        if capacity > 0:
+            self._queue = queue.Queue(maxsize=capacity)
+            self._thread = threading.Thread(target=self._worker, name="FramePrefetcher", daemon=True)
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # 디코딩
+    # ------------------------------------------------------------------
+
+    def _decode(self) -> Optional[PrefetchedFrame]:
+        ret, image = self.cap.read()
+        if not ret:
+            return None
+        if self.timestamps == "pos_msec":
+            ts = float(self.cap.get(cv2.CAP_PROP_POS_MSEC))
+        elif self.timestamps == "wall":
+            ts = time.perf_counter()
+        else:
+            ts = None
+        item = PrefetchedFrame(self._decoded, image, ts)
+        self._decoded += 1
+        return item
+
+    def _put(self, item) -> bool:
+        """큐가 빌 때까지 대기 (정지 요청 시 False)"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=self._STOP_POLL_SEC)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _worker(self):
+        try:
+            while not self._stop.is_set():
+                item = self._decode()
+                if not self._put(item) or item is None:
+                    return
+        except BaseException as e:   # 소비자 쪽에서 다시 발생시킴
+            self._error = e
+            self._put(None)
+
+    # ------------------------------------------------------------------
+    # 소비자 API
+    # ------------------------------------------------------------------
+
+    def read_frame(self) -> Optional[PrefetchedFrame]:
+        """다음 프레임 (영상 끝이면 None). 디코더 스레드의 예외는 여기서 다시 발생한다."""
+        if self._eof:
+            return None
+        t0 = time.perf_counter()
+        item = self._queue.get() if self._queue is not None else self._decode()
+        self.wait_time += time.perf_counter() - t0
+        if item is None:
+            self._eof = True
+            if self._error is not None:
+                raise self._error
+            return None
+        self.frames += 1
+        return item
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """cv2.VideoCapture.read() 호환 (ret, frame)"""
+        item = self.read_frame()
+        return (False, None) if item is None else (True, item.image)
+
+    def __iter__(self):
+        while True:
+            item = self.read_frame()
+            if item is None:
+                return
+            yield item
+
+    @property
+    def mean_wait_ms(self) -> float:
+        return 1000.0 * self.wait_time / self.frames if self.frames else 0.0
+
+    def release(self):
+        """디코더 스레드 정지 후 cap 해제 (중간에 루프를 빠져나와도 안전)"""
+        self._stop.set()
+        if self._thread is not None:
+            # put 대기 중인 디코더를 깨우기 위해 큐를 비움
+            while self._thread.is_alive():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._thread.join(timeout=self._STOP_POLL_SEC)
+            self._thread = None
+        self.cap.release()
+
+    def __enter__(self) -> "FramePrefetcher":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# ---------------------------------------------------------------------------
+# AsyncVideoWriter
+# ---------------------------------------------------------------------------
+
+WRITE_POLICIES = ("block", "drop_oldest", "every_nth")
+
+
+class AsyncVideoWriter:
+    """백그라운드 스레드 영상 인코더 (cv2.VideoWriter 호환 write / release / isOpened).
+
+    Args:
+        path, fourcc, fps, size: cv2.VideoWriter 인자
+        policy:   WRITE_POLICIES 중 하나
+        capacity: 인코딩 대기 큐 크기
+        every_n:  policy="every_nth" 일 때 N
+
+    stats:
+        submitted    write() 호출 수
+        written      실제 인코딩한 프레임 수
+        dropped      정책으로 버린 프레임 수
+        encode_time  인코더 스레드의 VideoWriter.write 누적 시간 (s)
+        wait_time    write() 가 큐 자리를 기다린 누적 시간 (s, backpressure)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fourcc: int,
+        fps: float,
+        size: Tuple[int, int],
+        policy: str = "block",
+        capacity: int = 8,
+        every_n: int = 1,
+    ):
+        if policy not in WRITE_POLICIES:
+            raise ValueError(f"policy 는 {WRITE_POLICIES} 중 하나여야 합니다 ({policy!r})")
+        if capacity < 1:
+            raise ValueError(f"capacity 는 1 이상이어야 합니다 ({capacity})")
+        if every_n < 1:
+            raise ValueError(f"every_n 은 1 이상이어야 합니다 ({every_n})")
+        self.writer = cv2.VideoWriter(path, fourcc, fps, size)
+        self.policy = policy
+        self.capacity = capacity
+        self.every_n = every_n if policy == "every_nth" else 1
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.encode_time = 0.0
+        self.wait_time = 0.0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=capacity)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="AsyncVideoWriter", daemon=True)
+        self._thread.start()
+
+    def isOpened(self) -> bool:
+        return self.writer.isOpened()
+
+    def _worker(self):
+        while True:
+            frame = self._queue.get()
+            if frame is _END:
+                return
+            if self._error is not None:
+                continue   # 오류 후에는 큐만 비움 (write 쪽 대기 해제)
+            t0 = time.perf_counter()
+            try:
+                self.writer.write(frame)
+            except BaseException as e:   # 다음 write / release 에서 다시 발생시킴
+                self._error = e
+                continue
+            self.encode_time += time.perf_counter() - t0
+            self.written += 1
+
+    def accepts(self, n: int) -> bool:
+        """n 번째 (0부터) write 프레임을 인코딩하는지. False 면 그리지 않고 skip() 해도 된다."""
+        return n % self.every_n == 0
+
+    def skip(self):
+        """every_nth 로 버려질 프레임 자리 (write 순번만 진행)"""
+        self.submitted += 1
+        self.dropped += 1
+
+    def write(self, frame: np.ndarray):
+        if self._error is not None:
+            raise self._error
+        if self._closed:
+            raise RuntimeError("이미 release 된 AsyncVideoWriter 입니다")
+        n = self.submitted
+        self.submitted += 1
+        if not self.accepts(n):
+            self.dropped += 1
+            return
+
+        t0 = time.perf_counter()
+        if self.policy == "drop_oldest":
+            while True:
+                try:
+                    self._queue.put_nowait(frame)
+                    break
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        else:
+            self._queue.put(frame)
+        self.wait_time += time.perf_counter() - t0
+
+    def release(self):
+        """대기 중인 프레임을 모두 인코딩한 뒤 파일을 닫는다"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_END)
+        self._thread.join()
+        self.writer.release()
+        if self._error is not None:
+            raise self._error
+
+    @property
+    def mean_encode_ms(self) -> float:
+        return 1000.0 * self.encode_time / self.written if self.written else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "encode_ms": round(1000.0 * self.encode_time, 1),
+            "encode_ms_per_frame": round(self.mean_encode_ms, 2),
+            "wait_ms": round(1000.0 * self.wait_time, 1),
+        }
+
+    def format_stats(self) -> str:
+        return (f"encode policy={self.policy} written={self.written}/{self.submitted} "
+                f"dropped={self.dropped} encode={self.mean_encode_ms:.1f}ms/frame "
+                f"(total {self.encode_time:.1f}s, loop wait {self.wait_time:.2f}s)")
+
+
+def writer_from_config(path: str, fps: float, size: Tuple[int, int], config: Mapping) -> AsyncVideoWriter:
+    """CONFIG 의 encode_policy / encode_queue / encode_every_n 키로 mp4v AsyncVideoWriter 생성"""
+    return AsyncVideoWriter(
+        path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size,
+        policy=config.get("encode_policy", "block"),
+        capacity=int(config.get("encode_queue", 8)),
+        every_n=int(config.get("encode_every_n", 1)),
+    )
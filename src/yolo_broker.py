@@ -0,0 +1,212 @@
+"""
+YOLO 배치 추론 브로커 (프로세스 내)
+
+여러 스트림 · 프레임이 동시에 model(crop) 을 한 장씩 호출하는 대신,
+ROI 크롭 요청을 모아 동적 배치로 한 번에 forward 한다.
+
+  - 첫 요청이 들어온 시점부터 max_latency_ms 안에 모인 요청 (최대 max_batch 개) 을 한 배치로 실행
+  - 워커가 앞 배치를 처리하는 동안 쌓인 요청은 마감이 지났어도 바로 같은 배치로 묶음
+  - 결과는 요청별 Future 로 돌려주며, ROI 오프셋은 이미 더해져 있다
+    (scripts/trackers/roi_utils.py yolo_detections_with_roi 와 같은 좌표)
+
+사용법:
+  broker = InferenceBroker(YOLO(model_path), conf=0.5, nms=0.3, max_batch=8, max_latency_ms=5)
+  dets = broker.detect(frame, roi)          # 동기 (스트림 스레드마다 호출)
+  fut  = broker.submit(frame, roi)          # 비동기 → fut.result()
+  broker.close()
+  print(broker.format_stats())
+"""
+
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+import supervision as sv
+
+_END = object()
+
+
+class _Request:
+    __slots__ = ("image", "offset", "future", "t_submit")
+
+    def __init__(self, image: np.ndarray, offset: Optional[np.ndarray]):
+        self.image = image
+        self.offset = offset
+        self.future: Future = Future()
+        self.t_submit = time.perf_counter()
+
+
+class InferenceBroker:
+    """동적 배치 검출기 (스레드 안전 submit / detect).
+
+    Args:
+        model:          ultralytics YOLO (이미지 리스트를 받아 결과 리스트를 돌려주는 callable)
+        conf, nms:      검출 confidence / NMS IoU 임계값 (브로커 공통)
+        max_batch:      배치 최대 크기 (1 이면 배치 없이 요청마다 forward)
+        max_latency_ms: 배치 첫 요청 이후 다음 요청을 기다리는 최대 시간
+        to_detections:  모델 결과 1개 → sv.Detections 변환 (기본 from_ultralytics)
+
+    stats:
+        batches / items       실행한 배치 수 / 처리한 요청 수
+        batch_sizes           배치 크기별 횟수
+        forward_time          model 호출 누적 시간 (s)
+        latencies             최근 요청들의 submit → 결과 시간 (s)
+    """
+
+    _LATENCY_WINDOW = 10000
+
+    def __init__(
+        self,
+        model: Callable,
+        conf: float = 0.5,
+        nms: float = 0.3,
+        max_batch: int = 8,
+        max_latency_ms: float = 5.0,
+        to_detections: Callable[[Any], sv.Detections] = sv.Detections.from_ultralytics,
+    ):
+        if max_batch < 1:
+            raise ValueError(f"max_batch 는 1 이상이어야 합니다 ({max_batch})")
+        if max_latency_ms < 0:
+            raise ValueError(f"max_latency_ms 는 0 이상이어야 합니다 ({max_latency_ms})")
+        self.model = model
+        self.conf = conf
+        self.nms = nms
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000.0
+        self.to_detections = to_detections
+
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes: Counter = Counter()
+        self.forward_time = 0.0
+        self.latencies: deque = deque(maxlen=self._LATENCY_WINDOW)
+
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, name="InferenceBroker", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # 요청 API
+    # ------------------------------------------------------------------
+
+    def submit(self, frame: np.ndarray, roi: Optional[Tuple[int, int, int, int]] = None) -> Future:
+        """ROI 크롭 (roi 가 없으면 전체 프레임) 검출 요청. Future → 전역 좌표 sv.Detections"""
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            image = frame[y0:y1 + 1, x0:x1 + 1]
+            offset = np.array([x0, y0, x0, y0], dtype=np.float32)
+        else:
+            image, offset = frame, None
+        if image.size == 0:
+            fut: Future = Future()
+            fut.set_result(sv.Detections.empty())
+            return fut
+
+        req = _Request(image, offset)
+        with self._lock:   # close() 와 경합해 종료 표식 뒤에 들어가지 않도록
+            if self._closed:
+                raise RuntimeError("이미 close 된 InferenceBroker 입니다")
+            self._queue.put(req)
+        return req.future
+
+    def detect(self, frame: np.ndarray, roi: Optional[Tuple[int, int, int, int]] = None) -> sv.Detections:
+        """submit 후 결과 대기 (yolo_detections_with_roi 대체)"""
+        return self.submit(frame, roi).result()
+
+    # ------------------------------------------------------------------
+    # 배치 워커
+    # ------------------------------------------------------------------
+
+    def _collect(self, first: _Request) -> Tuple[List[_Request], bool]:
+        """first 로 시작하는 배치 구성. (batch, 종료 표식 수신 여부)"""
+        batch = [first]
+        deadline = first.t_submit + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    req = self._queue.get(timeout=remaining)
+                else:
+                    req = self._queue.get_nowait()   # 마감 후에도 이미 쌓인 요청은 묶음
+            except queue.Empty:
+                break
+            if req is _END:
+                return batch, True
+            batch.append(req)
+        return batch, False
+
+    def _run_batch(self, batch: List[_Request]):
+        t0 = time.perf_counter()
+        try:
+            results = self.model([r.image for r in batch], conf=self.conf, verbose=False)
+            dets_list = []
+            for r, res in zip(batch, results):
+                dets = self.to_detections(res).with_nms(threshold=self.nms)
+                if len(dets) > 0 and r.offset is not None:
+                    dets.xyxy = dets.xyxy + r.offset
+                dets_list.append(dets)
+        except BaseException as e:   # 해당 배치 요청자 쪽에서 다시 발생
+            for r in batch:
+                r.future.set_exception(e)
+            return
+        t1 = time.perf_counter()
+        self.forward_time += t1 - t0
+        self.batches += 1
+        self.items += len(batch)
+        self.batch_sizes[len(batch)] += 1
+        for r, dets in zip(batch, dets_list):
+            self.latencies.append(t1 - r.t_submit)
+            r.future.set_result(dets)
+
+    def _worker(self):
+        while True:
+            first = self._queue.get()
+            if first is _END:
+                return
+            batch, stop = self._collect(first)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def close(self):
+        """남은 요청을 모두 처리한 뒤 워커 정지"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_END)
+        self._thread.join()
+
+    def __enter__(self) -> "InferenceBroker":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 통계
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        lat = np.asarray(self.latencies, dtype=np.float64) * 1000.0
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": self.items / self.batches if self.batches else 0.0,
+            "forward_ms_per_item": 1000.0 * self.forward_time / self.items if self.items else 0.0,
+            "latency_ms_mean": float(lat.mean()) if len(lat) else 0.0,
+            "latency_ms_p95": float(np.percentile(lat, 95)) if len(lat) else 0.0,
+        }
+
+    def format_stats(self) -> str:
+        st = self.stats()
+        return (f"broker max_batch={self.max_batch} deadline={1000.0 * self.max_latency:.0f}ms "
+                f"batches={st['batches']} mean batch={st['mean_batch']:.2f} "
+                f"forward={st['forward_ms_per_item']:.1f}ms/item "
+                f"latency mean={st['latency_ms_mean']:.1f}ms p95={st['latency_ms_p95']:.1f}ms")
@@ -0,0 +1,95 @@
+"""
+테스트 공용 — 합성 영상 + 가짜 검출기
+
+YOLO 가중치 · 실제 카메라 영상 없이 트래킹 파이프라인 전체를 돌리기 위해
+단색 사각형이 움직이는 짧은 mp4 를 만들고, 색으로 사각형을 찾는 가짜 모델을 쓴다.
+  빨강 = ripe (class 0), 초록 = unripe (class 1)
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+import supervision as sv
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "trackers"))
+
+CLIP_W, CLIP_H = 640, 360
+BOX = 36
+
+
+# ---------------------------------------------------------------------------
+# 합성 영상
+# ---------------------------------------------------------------------------
+
+def write_clip(path: Path, frames: int = 120, speed: int = 8, seed: int = 0, n_objects: int = 10) -> Path:
+    """왼쪽 → 오른쪽으로 speed px/frame 이동하는 사각형 영상 (배경 고정)"""
+    rng = np.random.default_rng(seed)
+    objs = [(int(rng.integers(-BOX - speed * frames // 2, CLIP_W // 2)),
+             int(rng.integers(10, CLIP_H - BOX - 10)),
+             int(rng.integers(0, 2))) for _ in range(n_objects)]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 30.0, (CLIP_W, CLIP_H))
+    for f in range(frames):
+        img = np.full((CLIP_H, CLIP_W, 3), 40, np.uint8)
+        for x0, y, cls in objs:
+            x = x0 + speed * f
+            if -BOX < x < CLIP_W:
+                color = (0, 0, 255) if cls == 0 else (0, 255, 0)
+                cv2.rectangle(img, (x, y), (x + BOX, y + BOX), color, -1)
+        writer.write(img)
+    writer.release()
+    return path
+
+
+# ---------------------------------------------------------------------------
+# 가짜 검출기 · 모션 추정
+# ---------------------------------------------------------------------------
+
+class BlobModel:
+    """YOLO 대체: 빨강/초록 영역의 연결 요소를 검출로 반환 (from_ultralytics 는 그대로 통과)"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, img, conf=0.5, verbose=False):
+        boxes, classes = [], []
+        for cls, ch in ((0, 2), (1, 1)):
+            mask = (img[:, :, ch] > 150).astype(np.uint8)
+            _, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+            for x, y, w, h, area in stats[1:]:
+                if area > 100:
+                    boxes.append([x, y, x + w, y + h])
+                    classes.append(cls)
+        if not boxes:
+            return [sv.Detections.empty()]
+        return [sv.Detections(xyxy=np.array(boxes, dtype=float),
+                              confidence=np.full(len(boxes), 0.9, dtype=np.float32),
+                              class_id=np.array(classes))]
+
+
+class StaticMotion:
+    """MotionEstimator 대체: 카메라 고정 (변환 없음)"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def update(self, frame):
+        return None
+
+    def reset(self):
+        pass
+
+
+@pytest.fixture
+def fake_detector(monkeypatch):
+    """tracker 모듈의 YOLO · MotionEstimator 를 가짜로 교체 (fork 워커에도 그대로 전달됨)"""
+    import tracker
+
+    monkeypatch.setattr(tracker, "YOLO", BlobModel)
+    monkeypatch.setattr(tracker, "MotionEstimator", StaticMotion)
+    monkeypatch.setattr(sv.Detections, "from_ultralytics", staticmethod(lambda res: res))
+    return tracker
@@ -0,0 +1,85 @@
+"""multi_stream: 여러 로컬 영상을 워커 프로세스로 동시에 트래킹"""
+
+import csv
+
+import pytest
+
+from conftest import write_clip
+
+
+@pytest.fixture
+def clips(tmp_path):
+    return [write_clip(tmp_path / f"cam{i}.mp4", frames=90, speed=speed, seed=i)
+            for i, speed in enumerate((6, 9, 12))]
+
+
+def _mot_key(rows):
+    return sorted(tuple(r) for r in rows)
+
+
+def test_streams_get_own_mot_rows_and_counts(fake_detector, clips, tmp_path):
+    import multi_stream
+
+    tracker = fake_detector
+    config = dict(multi_stream.CONFIG,
+                  streams=[{"name": p.stem, "source": str(p)} for p in clips],
+                  output_dir=str(tmp_path / "out"),
+                  start_method="fork",     # 가짜 검출기 패치를 워커에 전달
+                  max_workers=2)
+
+    results = multi_stream.run_streams(config)
+    assert list(results) == [p.stem for p in clips]
+
+    # 스트림마다 단독 run_benchmark 와 같은 결과 (스트림끼리 상태 공유 없음)
+    for p in clips:
+        r = results[p.stem]
+        assert "error" not in r
+        assert r["mot_rows"]
+        solo = tracker.run_benchmark(multi_stream.stream_config({"name": p.stem, "source": str(p)}, config, None))
+        assert _mot_key(r["mot_rows"]) == _mot_key(solo["mot_rows"])
+        assert r["counts"] == solo["counts"]
+        assert r["total_frames"] == solo["total_frames"] == 90
+    assert sum(sum(results[p.stem]["counts"].values()) for p in clips) > 0
+
+    rows = multi_stream.summarize(config, results, wall_time=1.0)
+    multi_stream.save_report(config, rows)
+    out_dir = tmp_path / "out"
+
+    by_name = {row["stream"]: row for row in rows}
+    assert list(by_name) == [p.stem for p in clips] + ["TOTAL"]
+    for p in clips:
+        r, row = results[p.stem], by_name[p.stem]
+        assert row["ripe_count"] == r["counts"][0]
+        assert row["unripe_count"] == r["counts"][1]
+        assert row["mot_rows"] == len(r["mot_rows"])
+        with open(out_dir / "mot" / f"{p.stem}.txt", newline="") as f:
+            assert len(list(csv.DictReader(f))) == len(r["mot_rows"])
+
+    total = by_name["TOTAL"]
+    assert total["source"] == f"{len(clips)}/{len(clips)} ok"
+    for key in ("frames", "ripe_count", "unripe_count", "ripe_ids", "unripe_ids", "mot_rows"):
+        assert total[key] == sum(by_name[p.stem][key] for p in clips)
+
+    with open(out_dir / "summary.csv", newline="", encoding="utf-8") as f:
+        saved = list(csv.DictReader(f))
+    assert [row["stream"] for row in saved] == [p.stem for p in clips] + ["TOTAL"]
+
+
+def test_failed_stream_does_not_block_others(fake_detector, clips, tmp_path):
+    import multi_stream
+
+    config = dict(multi_stream.CONFIG,
+                  streams=[{"name": "cam0", "source": str(clips[0])},
+                           {"name": "broken", "source": str(tmp_path / "missing.mp4")}],
+                  output_dir=str(tmp_path / "out"),
+                  start_method="fork",
+                  max_workers=2)
+
+    results = multi_stream.run_streams(config)
+    assert "error" in results["broken"]
+    assert results["cam0"]["mot_rows"]
+
+    rows = multi_stream.summarize(config, results, wall_time=1.0)
+    assert rows[-1]["stream"] == "TOTAL"
+    assert rows[-1]["source"] == "1/2 ok"
+    assert rows[-1]["mot_rows"] == len(results["cam0"]["mot_rows"])